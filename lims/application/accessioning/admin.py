@@ -14,10 +14,10 @@ from util.util import get_printer_by_category, GenerateLabel, generate_automatic
 from .models import Accession, AccessionICDCodeMap, BioPharmaAccession
 from .forms import AccessionForm, SampleInlineForm, AccessionICDCodeMapForm, SampleInlineFormSet, BioPharmaAccessionForm
 from sample.models import Sample, SampleTestMap
+from routinginfo.results import RoutingResultUtilClass
 from routinginfo.util import UtilClass
 from process.models import ContainerType
 from django.db import connection
-from django.utils.safestring import mark_safe
 from workflows.models import Workflow, ModalityModelMap
 from django.apps import apps
 from django.urls import reverse, path
@@ -88,6 +88,13 @@ def generate_accession(self, request, queryset):
             for m in ModalityModelMap.objects.filter(modality__in=workflow_names)
         }
 
+        # First test map workflow of each sample, read in one query instead of one per sample
+        sample_testmap_workflow = {}
+        for sample_id, workflow_id in SampleTestMap.objects.filter(
+                sample_id__in=samples.values_list('sample_id', flat=True)
+        ).order_by('sample_test_map_id').values_list('sample_id', 'workflow_id_id'):
+            sample_testmap_workflow.setdefault(sample_id, workflow_id)
+
         bulk_insert_map = {}
         successfully_inserted_samples = set()
         for sample in samples:
@@ -95,9 +102,7 @@ def generate_accession(self, request, queryset):
             if sample.workflow_id_id:
                 workflow_name = workflow_map_direct.get(sample.workflow_id_id)
             else:
-                workflow_id = SampleTestMap.objects.filter(
-                    sample_id=sample.sample_id
-                ).values_list("workflow_id_id", flat=True).first()
+                workflow_id = sample_testmap_workflow.get(sample.sample_id)
                 workflow_name = workflow_map_testmap.get(workflow_id)
 
             if not child_sample_creation and workflow_name:
@@ -109,16 +114,13 @@ def generate_accession(self, request, queryset):
                         bulk_insert_map[(app_name, model)] = []
 
                     bulk_insert_map[(app_name, model)].append(sample.sample_id)
-        with connection.cursor() as cursor:
-            for (app_name, model), sample_ids in bulk_insert_map.items():
-                table_name = f"{app_name}_{model}"
-                query = f"INSERT INTO {table_name} (sample_ptr_id) VALUES (%s) ON CONFLICT DO NOTHING;"
-                values = [(sample_id,) for sample_id in sample_ids]  # Convert to tuple list
-                cursor.executemany(query, values)  # Bulk insert
-                successfully_inserted_samples.update(sample_ids)
+        for (app_name, model), sample_ids in bulk_insert_map.items():
+            # Child table rows plus the sample_kind discriminator
+            Sample.objects.attach_kind(apps.get_model(app_name, model), sample_ids)
+            successfully_inserted_samples.update(sample_ids)
 
-                if successfully_inserted_samples:
-                    Sample.objects.filter(sample_id__in=successfully_inserted_samples).update(isvisible=False)
+        if successfully_inserted_samples:
+            Sample.objects.filter(sample_id__in=successfully_inserted_samples).update(isvisible=False)
 
         module = importlib.import_module("routinginfo.util")
         GenericUtilClass = getattr(module, "UtilClass")
@@ -135,36 +137,10 @@ def generate_accession(self, request, queryset):
                                   args=(request, sample_ids, "Generate Accession"))
             t1.start()
 
-            table_rows = "".join(
-                [f"<tr><td>{sample['sample_id']}</td><td>{sample['current_step']}</td></tr>" for sample in
-                 success_samples]
-            )
-
-            message = f"""
-                        <p><strong>Generate Accession completed. Routed samples to below step:</strong></p>
-                        <button onclick="toggleTable()" style="margin-bottom: 10px; padding: 5px 10px; background-color: #007bff; color: white; border: none; cursor: pointer; border-radius: 5px;">
-                            Expand/Collapse
-                        </button>
-                        <div id="sampleTable" style="display: none;">
-                            <table border="1" cellpadding="2" cellspacing="0" style="border-collapse: collapse; width: 50%;">
-                                <tr><th>Sample ID</th><th>Next Step</th></tr>
-                                {table_rows}
-                            </table>
-                        </div>
-
-                        <script>
-                            function toggleTable() {{
-                                var table = document.getElementById("sampleTable");
-                                if (table.style.display === "none") {{
-                                    table.style.display = "block";
-                                }} else {{
-                                    table.style.display = "none";
-                                }}
-                            }}
-                        </script>
-                    """
             log.info(f"Generate Accession Success ---> ")
-            self.message_user(request, mark_safe(message), level="INFO")
+            message = RoutingResultUtilClass.record(request, success_samples,
+                                                    title="Generate Accession completed. Routed samples")
+            self.message_user(request, message, level="INFO")
             log.info("Preparing to send emails for Pharma Accession in a separate thread")
             t2 = threading.Thread(target=send_pharma_emails, args=(accession_ids,))
             t2.start()
@@ -291,6 +267,11 @@ class SampleInline(admin.TabularInline):
 
         return fields
 
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.user_id = request.user.id
+        return formset
+
     def safe_cast(self, field_name):
         return Cast(
             Coalesce(
@@ -636,23 +617,9 @@ class AccessionAdmin(TZIndependentAdmin, GulfModelAdmin):
                     super().save_model(request, obj, form, change)
 
                 if accession_template_instance:
-                    list_template_samples = Sample.objects.filter(
-                        accession_id_id=accession_template_instance.accession_id)
-                    module = importlib.import_module("sample.util")
-                    SampleUtilClass = getattr(module, "SampleUtilClass")
-                    SampleUtilClass.create_samples_from_existing_list_of_samples(list_template_samples, request, obj)
-                    list_accession_icd_code_map = AccessionICDCodeMap.objects.filter(
-                        accession_id_id=accession_template_instance.accession_id)
-                    if list_accession_icd_code_map:
-                        list_new_accession_icd_code_map = []
-                        for accession_icd_code_map_instance in list_accession_icd_code_map:
-                            new_accession_icd_code_map_instance = AccessionICDCodeMap()
-                            new_accession_icd_code_map_instance.accession_id = obj
-                            new_accession_icd_code_map_instance.icd_code_id = accession_icd_code_map_instance.icd_code_id
-                            new_accession_icd_code_map_instance.created_by = user_map_obj
-                            new_accession_icd_code_map_instance.mod_by = user_map_obj
-                            list_new_accession_icd_code_map.append(new_accession_icd_code_map_instance)
-                        AccessionICDCodeMap.objects.bulk_create(list_new_accession_icd_code_map)
+                    module = importlib.import_module("accessioning.util")
+                    AccessionPlanUtilClass = getattr(module, "AccessionPlanUtilClass")
+                    AccessionPlanUtilClass.clone_template(accession_template_instance.accession_id, [obj], request)
 
         except Exception as e:
             self.message_user(request, f"An error occurred while saving: {e}", level=messages.ERROR)
@@ -1032,23 +999,9 @@ class BioPharmaAccessionAdmin(AccessionAdmin):
                     super(AccessionAdmin, self).save_model(request, obj, form, change)
 
                 if accession_template_instance:
-                    list_template_samples = Sample.objects.filter(
-                        accession_id_id=accession_template_instance.accession_id)
-                    module = importlib.import_module("sample.util")
-                    SampleUtilClass = getattr(module, "SampleUtilClass")
-                    SampleUtilClass.create_samples_from_existing_list_of_samples(list_template_samples, request, obj)
-                    list_accession_icd_code_map = AccessionICDCodeMap.objects.filter(
-                        accession_id_id=accession_template_instance.accession_id)
-                    if list_accession_icd_code_map:
-                        list_new_accession_icd_code_map = []
-                        for accession_icd_code_map_instance in list_accession_icd_code_map:
-                            new_accession_icd_code_map_instance = AccessionICDCodeMap()
-                            new_accession_icd_code_map_instance.accession_id = obj
-                            new_accession_icd_code_map_instance.icd_code_id = accession_icd_code_map_instance.icd_code_id
-                            new_accession_icd_code_map_instance.created_by = user_map_obj
-                            new_accession_icd_code_map_instance.mod_by = user_map_obj
-                            list_new_accession_icd_code_map.append(new_accession_icd_code_map_instance)
-                        AccessionICDCodeMap.objects.bulk_create(list_new_accession_icd_code_map)
+                    module = importlib.import_module("accessioning.util")
+                    AccessionPlanUtilClass = getattr(module, "AccessionPlanUtilClass")
+                    AccessionPlanUtilClass.clone_template(accession_template_instance.accession_id, [obj], request)
 
         except Exception as e:
             self.message_user(request, f"An error occurred while saving: {e}", level=messages.ERROR)
@@ -1,5 +1,6 @@
 from django.http import JsonResponse
 
+from accessioning.lookups import REMOTE_LOOKUPS
 from logutil.log import log
 from masterdata.models import PatientInsuranceInfo, Patient, Physician, ClientDoctorInfo, Client, AccessionType, \
     Sponsor, ProjectVisitMap, BioSite, BioProject, ProjectFieldsMap, ProjectPhysicianMap
@@ -402,4 +403,20 @@ def upload_scanned_images(request):
     obj.mod_by = request.user
     obj.save()
 
-    return JsonResponse({"successs": "File uploaded successfully"})
\ No newline at end of file
+    return JsonResponse({"successs": "File uploaded successfully"})
+
+
+# This is for paging through the large accession masters (clients, patients, templates) in select2 boxes
+def remote_lookup(request, lookup_name):
+    lookup = REMOTE_LOOKUPS.get(lookup_name)
+    if lookup is None or not request.user.is_authenticated:
+        return JsonResponse({'error': 'Unknown lookup'}, status=404)
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+    choices, more = lookup.search(request.GET.get('term', '').strip(), page)
+    return JsonResponse({
+        'results': [{'id': value, 'text': label} for value, label in choices],
+        'pagination': {'more': more},
+    })
@@ -2,18 +2,19 @@ import pytz
 from django import forms
 from django.utils import timezone
 
-from security.models import SiteTimezone
 from util.models import SequenceGen
 from workflows.models import Workflow
+from .lookups import REMOTE_LOOKUPS, remote_select, remote_choice_field
 from .models import Accession, BioPharmaAccession
+from util.choices import ChoiceUtilClass
 from util.util import UtilClass
 from controllerapp import settings
-from process.models import SampleType, ContainerType
+from process.models import ContainerType
 from sample.models import Sample, SampleTestMap
-from masterdata.models import Client, BodySubSiteMap, BodySite, BioProject, Sponsor, BioSite, ProjectVisitMap, Subject, \
-    AccessionPrefix
+from masterdata.models import BodySubSiteMap, BodySite, BioProject, Sponsor, BioSite, ProjectVisitMap, Subject
 from tests.models import ICDCode
-from django.db import models, transaction
+from django.db import models
+from django.utils.functional import cached_property
 from .widgets import LookupWidget, NextLinkWidget, FinishLinkWidget, PrevLinkNextLinkWidget, MagnifyingTextInput, \
     PartNoInputWidget
 from django.forms import BaseInlineFormSet
@@ -169,12 +170,7 @@ class AccessionForm(forms.ModelForm):
 
         # Only apply this for forms that want the filter
         if getattr(self, 'filter_patient_without_subject', False) and 'patient_id' in self.fields:
-            subject_patient_ids = Subject.objects.values_list('patient_id', flat=True).distinct()
-            self.fields['patient_id'].queryset = (
-                self.fields['patient_id'].queryset.exclude(
-                    patient_id__in=subject_patient_ids
-                )
-            )
+            self.fields['patient_id'].queryset = REMOTE_LOOKUPS['non_subject_patient'].get_queryset()
 
         self.request = request
         session_timezone = request.session.get('currenttimezone',
@@ -208,21 +204,16 @@ class AccessionForm(forms.ModelForm):
             widget=forms.Select(attrs={'onchange': 'onChangeAccessionCategory()'}),
         )
 
-        self.fields["accession_template"] = forms.ChoiceField(
-            choices=[(None, "Select an Option")] + [(obj.accession_id, obj.accession_id) for obj in
-                                                    Accession.objects.filter(is_template=True).exclude(
-                                                        accession_category='Pharma')],
-            required=False, label="Accession Template"
+        self.fields["accession_template"] = remote_choice_field(
+            'accession_template', required=False, label="Accession Template"
         )
 
         self.fields["accession_prefix"] = forms.ChoiceField(
-            choices=[(None, "Select an Option")] + [(obj.accession_prefix, obj.accession_prefix) for
-                                                    obj in AccessionPrefix.objects.all()],
+            choices=[(None, "Select an Option")] + ChoiceUtilClass.get_static_choices('accession_prefix'),
             required=False, label="Accession Prefix"
         )
         self.fields["collection_dt_timezone"] = forms.ChoiceField(
-            choices=[(None, "Select an Option")] + [(obj.name, obj.name) for
-                                                    obj in SiteTimezone.objects.all()],
+            choices=[(None, "Select an Option")] + ChoiceUtilClass.get_static_choices('site_timezone'),
             required=False,
         )
         self.fields['collection_dt_timezone'].initial = session_timezone
@@ -236,11 +227,8 @@ class AccessionForm(forms.ModelForm):
         if 'payment_type' in self.fields:
             self.fields['payment_type'].initial = 'Insurance'
 
-        self.fields['sample_type'].choices = [(None, "Select an Option")] + [(obj.sample_type_id, obj.sample_type) for
-                                                                             obj in SampleType.objects.all()]
-        if 'client_id' in self.fields:
-            self.fields['client_id'].choices = [(None, "Select an Option")] + [(obj.client_id, obj.name) for
-                                                                               obj in Client.objects.all()]
+        self.fields['sample_type'].choices = [(None, "Select an Option")] + ChoiceUtilClass.get_static_choices(
+            'sample_type')
         if self.instance.accession_id is not None:
             self.fields['case_id'].initial = self.instance.accession_id
             self.fields["accession_id"].initial = self.instance.accession_id
@@ -272,9 +260,11 @@ class AccessionForm(forms.ModelForm):
                   'status', 'insurance_group', 'payment_type', 'move_next_to_client_info_tab', 'hidden_auto_gen_pk',
                   'hidden_accession_prefix', 'hidden_accession_template', 'receive_dt_timezone', 'accession_type']
         widgets = {
-            'patient_id': forms.Select(attrs={'class': 'form-control', 'onchange': 'populateInsuranceDetails()'}),
+            'patient_id': remote_select('non_subject_patient',
+                                        attrs={'class': 'form-control', 'onchange': 'populateInsuranceDetails()'}),
             'insurance_id': forms.Select(attrs={'class': 'form-control', 'onchange': 'populateInsuranceGroup()'}),
-            'client_id': forms.Select(attrs={'class': 'form-control', 'onchange': 'populateDoctorsBasedOnClient()'}),
+            'client_id': remote_select('client',
+                                       attrs={'class': 'form-control', 'onchange': 'populateDoctorsBasedOnClient()'}),
             'is_auto_gen_pk': forms.CheckboxInput(attrs={'onclick': 'checkuncheckautogenprimarykey(this)'}),
             'accession_type': forms.Select(attrs={'class': 'form-control', 'onchange': 'populateAccessionTypeInfo()'}),
         }
@@ -297,6 +287,7 @@ class BioPharmaAccessionForm(AccessionForm):
     patient_id = SubjectChoiceField(
         queryset=Subject.objects.all().order_by('subject_id'),
         label='Subject',
+        widget=remote_select('subject'),
     )
 
     sponsor_name = forms.CharField(label='Sponsor Name', required=False,
@@ -331,13 +322,9 @@ class BioPharmaAccessionForm(AccessionForm):
         super().__init__(*args, **kwargs)
 
         if 'accession_template' in self.fields:
-            template_choices = [
-                (obj.accession_id, obj.accession_id)
-                for obj in BioPharmaAccession.objects.filter(is_template=True, accession_category='Pharma')
-            ]
-            self.fields['accession_template'].choices = [
-                                                            (None, "Select an Option")
-                                                        ] + template_choices
+            self.fields['accession_template'] = remote_choice_field(
+                'pharma_accession_template', required=False, label="Accession Template"
+            )
 
         self.fields['accession_category'] = forms.CharField(
             label='Accession Category',
@@ -380,6 +367,7 @@ class BioPharmaAccessionForm(AccessionForm):
         fields = AccessionForm.Meta.fields + ['project', 'sponsor', 'investigator', 'visit']
 
         widgets = {
+            'client_id': remote_select('client'),
             'sponsor': forms.Select(attrs={
                 'onchange': 'sponsorChanged(this)',
                 'class': 'admin-autocomplete form-control select2',
@@ -401,6 +389,55 @@ class BioPharmaAccessionForm(AccessionForm):
         }
 
 
+class SampleValidationContext:
+    """
+    Lookups shared by every row of one sample inline submit: the accession category, the container types and
+    the current sequence maxima per prefix are loaded once instead of per row and field. Block/Cassette and
+    Slide sequence bumps found while cleaning are collected and written by apply_sequence_bumps() in one locked,
+    audited update.
+    """
+
+    def __init__(self, accession_id, accession_category=None, user_id=None):
+        self.accession_id = accession_id
+        self.fallback_accession_category = accession_category
+        self.user_id = user_id
+        self.sequence_bumps = {}
+
+    @cached_property
+    def accession_category(self):
+        accession_category = Accession.objects.filter(accession_id=self.accession_id).values_list(
+            'accession_category', flat=True).first()
+        return accession_category if accession_category is not None else self.fallback_accession_category
+
+    @cached_property
+    def container_types(self):
+        return {obj.container_type_id: obj for obj in ContainerType.objects.all()}
+
+    @cached_property
+    def sequence_maxima(self):
+        return dict(SequenceGen.objects.filter(prefix_id__startswith=f"{self.accession_id}-").values(
+            'prefix_id').annotate(max_seq=models.Max('seq_no')).values_list('prefix_id', 'max_seq'))
+
+    def get_container_type(self, container_type_id):
+        container_type = self.container_types.get(container_type_id)
+        if container_type is None:
+            raise forms.ValidationError("Invalid container type. Please select a valid one.")
+        return container_type
+
+    def bump_sequence(self, prefix_id, seq_no):
+        # Later rows of the same submit see the bumped value, as they did when each row wrote it directly
+        if seq_no > (self.sequence_maxima.get(prefix_id) or 0):
+            self.sequence_maxima[prefix_id] = seq_no
+            self.sequence_bumps[prefix_id] = seq_no
+
+    def apply_sequence_bumps(self):
+        if not self.sequence_bumps:
+            return
+        # max keeps a sequence that another request moved past this submit in the meantime
+        UtilClass.update_sequences('Sample', self.sequence_bumps, self.user_id, max)
+        self.sequence_bumps = {}
+
+
 # Form for the Sample Inline
 class SampleInlineForm(forms.ModelForm):
     sample_id = forms.CharField(label='Sample ID', max_length=40, required=False,
@@ -454,9 +491,7 @@ class SampleInlineForm(forms.ModelForm):
     # This is for providing validation on th part no
     def clean_part_no(self):
         part_no = self.cleaned_data.get('part_no')
-        accession_id = self.instance.accession_id
-        accession_category = Accession.objects.get(
-            accession_id=accession_id).accession_category
+        accession_category = self.validation_context.accession_category
         if not part_no and accession_category != 'Clinical':
             raise forms.ValidationError("Part No is required.")
         return part_no
@@ -464,34 +499,18 @@ class SampleInlineForm(forms.ModelForm):
     # This is for providing validation on Block/Cassette Sequence
     def clean_block_or_cassette_seq(self):
         block_or_cassette_seq = self.cleaned_data.get('block_or_cassette_seq')
-        container_type = self.instance.container_type
-        accession_id = self.instance.accession_id
-        accession_category = Accession.objects.get(
-            accession_id=accession_id).accession_category
-        if container_type is not None and accession_category != 'Clinical':
-            try:
-                container_Type = ContainerType.objects.get(
-                    container_type=container_type)
-                gen_block_or_cassette_seq = container_Type.gen_block_or_cassette_seq
-                gen_slide_seq = container_Type.gen_slide_seq
-            except ContainerType.DoesNotExist:
-                raise forms.ValidationError("Invalid container type. Please select a valid one.")
+        container_type_id = self.instance.container_type_id
+        accession_category = self.validation_context.accession_category
+        if container_type_id is not None and accession_category != 'Clinical':
+            container_Type = self.validation_context.get_container_type(container_type_id)
+            gen_block_or_cassette_seq = container_Type.gen_block_or_cassette_seq
+            gen_slide_seq = container_Type.gen_slide_seq
             if gen_block_or_cassette_seq or gen_slide_seq:
                 if not block_or_cassette_seq:
                     raise forms.ValidationError("Block/Cassette # is required.")
-                accession_id = self.instance.accession_id
                 part_no = self.cleaned_data.get('part_no')
-                prefix_id = str(accession_id) + '-' + str(part_no)
-                max_block_cassette_seq = SequenceGen.objects.filter(
-                    prefix_id=prefix_id
-                ).aggregate(max_seq=models.Max('seq_no'))['max_seq'] or 0
-                if max_block_cassette_seq is not None and int(block_or_cassette_seq) > int(max_block_cassette_seq):
-                    with transaction.atomic():
-                        sequence_gen, created = SequenceGen.objects.update_or_create(
-                            model_id='Sample',
-                            prefix_id=prefix_id,
-                            defaults={'seq_no': int(block_or_cassette_seq)}
-                        )
+                prefix_id = str(self.validation_context.accession_id) + '-' + str(part_no)
+                self.validation_context.bump_sequence(prefix_id, int(block_or_cassette_seq))
             elif not gen_block_or_cassette_seq and not gen_slide_seq:
                 if block_or_cassette_seq is not None and block_or_cassette_seq != '':
                     raise forms.ValidationError('Block/Cassette # is not required.')
@@ -500,36 +519,20 @@ class SampleInlineForm(forms.ModelForm):
     # This for providing validation on the slide seq
     def clean_slide_seq(self):
         slide_seq = self.cleaned_data.get('slide_seq')
-        container_type = self.instance.container_type
-        accession_id = self.instance.accession_id
-        accession_category = Accession.objects.get(
-            accession_id=accession_id).accession_category
-        if container_type is not None and accession_category != 'Clinical':
-            try:
-                container_Type = ContainerType.objects.get(container_type=container_type)
-                child_sample_creation = container_Type.child_sample_creation
-                gen_slide_seq = container_Type.gen_slide_seq
-            except ContainerType.DoesNotExist:
-                raise forms.ValidationError("Invalid container type. Please select a valid one.")
+        container_type_id = self.instance.container_type_id
+        accession_category = self.validation_context.accession_category
+        if container_type_id is not None and accession_category != 'Clinical':
+            gen_slide_seq = self.validation_context.get_container_type(container_type_id).gen_slide_seq
 
             if gen_slide_seq:
                 if slide_seq is None or slide_seq == '':
                     raise forms.ValidationError("Slide # is required")
                 else:
-                    accession_id = self.instance.accession_id
                     part_no = self.cleaned_data.get('part_no')
                     block_or_cassette_seq = self.cleaned_data.get('block_or_cassette_seq')
-                    prefix_id = str(accession_id) + '-' + str(part_no) + '-' + str(block_or_cassette_seq)
-                    max_slide_seq = SequenceGen.objects.filter(
-                        prefix_id=prefix_id
-                    ).aggregate(max_seq=models.Max('seq_no'))['max_seq'] or 0
-                    if max_slide_seq is not None and int(slide_seq) > int(max_slide_seq):
-                        with transaction.atomic():
-                            sequence_gen, created = SequenceGen.objects.update_or_create(
-                                model_id='Sample',
-                                prefix_id=prefix_id,
-                                defaults={'seq_no': int(slide_seq)}
-                            )
+                    prefix_id = str(self.validation_context.accession_id) + '-' + str(part_no) + '-' + str(
+                        block_or_cassette_seq)
+                    self.validation_context.bump_sequence(prefix_id, int(slide_seq))
             else:
                 if slide_seq is not None and slide_seq != '':
                     raise forms.ValidationError("Slide # is not required")
@@ -537,6 +540,8 @@ class SampleInlineForm(forms.ModelForm):
         return slide_seq
 
     def save(self, commit=True):
+        if commit and self.owns_validation_context:
+            self.validation_context.apply_sequence_bumps()
         instance = super().save(commit)
         test_id = self.cleaned_data.get("test_id")
         set_test_id = None
@@ -560,8 +565,14 @@ class SampleInlineForm(forms.ModelForm):
 
         return instance
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, validation_context=None, **kwargs):
         super().__init__(*args, **kwargs)
+        # Rows of a SampleInlineFormSet share the formset's context; a standalone form builds its own
+        self.owns_validation_context = validation_context is None
+        if validation_context is None:
+            validation_context = SampleValidationContext(self.instance.accession_id_id,
+                                                         user_id=self.instance.mod_by_id or self.instance.created_by_id)
+        self.validation_context = validation_context
         if self.instance.sample_id is not None:
             sample_type_instance = self.instance.sample_type
             if sample_type_instance is not None:
@@ -653,13 +664,30 @@ class AccessionICDCodeMapForm(forms.ModelForm):
 
 
 class SampleInlineFormSet(BaseInlineFormSet):
+    # Set by SampleInline.get_formset so the sequence bumps are written and audited as the requesting user
+    user_id = None
+
+    @cached_property
+    def validation_context(self):
+        return SampleValidationContext(self.instance.accession_id, getattr(self.instance, 'accession_category', None),
+                                       self.user_id)
+
+    def get_form_kwargs(self, index):
+        kwargs = super().get_form_kwargs(index)
+        kwargs['validation_context'] = self.validation_context
+        return kwargs
+
+    def save(self, commit=True):
+        if commit:
+            self.validation_context.apply_sequence_bumps()
+        return super().save(commit)
+
     # This is for validating the fields in the sample inline
     def clean(self):
         accession_id = self.instance.accession_id
         if accession_id is None or accession_id == '':
             return
-        accession_category = Accession.objects.get(
-            accession_id=accession_id).accession_category
+        accession_category = self.validation_context.accession_category
         if accession_category != 'Clinical':
             sample_dict = {}
             sampleid_duplicate_seq = ""
@@ -722,7 +750,7 @@ class SampleInlineFormSet(BaseInlineFormSet):
                 accession_id = self.instance.accession_id
                 existing_samples = Sample.objects.filter(
                     accession_id=accession_id
-                ).exclude(sample_id__in=list_samples)
+                ).exclude(sample_id__in=list_samples).select_related('container_type')
 
                 if existing_samples.exists():
                     for samples in existing_samples:
@@ -737,7 +765,7 @@ class SampleInlineFormSet(BaseInlineFormSet):
                 accession_id = self.instance.accession_id
                 existing_samples = Sample.objects.filter(
                     accession_id=accession_id
-                ).exclude(sample_id__in=list_samples)
+                ).exclude(sample_id__in=list_samples).select_related('container_type')
 
                 if existing_samples.exists():
                     for samples in existing_samples:
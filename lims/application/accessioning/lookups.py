@@ -0,0 +1,94 @@
+from django.db.models import Exists, OuterRef, Q
+from django.urls import reverse_lazy
+
+from accessioning.models import Accession, BioPharmaAccession
+from masterdata.models import Client, Patient, Subject
+from util.choices import RemoteLookup, RemoteSelect, RemoteChoiceField
+
+
+class ClientLookup(RemoteLookup):
+    value_field = 'client_id'
+    search_fields = ('name__icontains',)
+    ordering = ('name',)
+    only_fields = ('client_id', 'name')
+
+    def get_queryset(self):
+        return Client.objects.all()
+
+
+class PatientLookup(RemoteLookup):
+    value_field = 'patient_id'
+    search_fields = ('last_name__istartswith', 'first_name__istartswith', 'mrn__istartswith')
+    ordering = ('last_name', 'first_name', 'patient_id')
+    only_fields = ('patient_id', 'first_name', 'last_name')
+
+    def get_queryset(self):
+        return Patient.objects.all()
+
+    def get_search_filter(self, term):
+        search_filter = super().get_search_filter(term)
+        if term.isdigit():
+            search_filter |= Q(patient_id=int(term))
+        return search_filter
+
+
+class NonSubjectPatientLookup(PatientLookup):
+    """Patients that are not BioPharma subjects; an anti-join instead of a materialized exclusion list."""
+
+    def get_queryset(self):
+        return Patient.objects.filter(~Exists(Subject.objects.filter(patient_ptr=OuterRef('pk'))))
+
+
+class SubjectLookup(RemoteLookup):
+    value_field = 'pk'
+    search_fields = ('subject_id__istartswith', 'last_name__istartswith', 'first_name__istartswith')
+    ordering = ('subject_id',)
+    only_fields = ('patient_ptr', 'subject_id')
+
+    def get_queryset(self):
+        return Subject.objects.all()
+
+    def get_label(self, obj):
+        return obj.subject_id
+
+
+class AccessionTemplateLookup(RemoteLookup):
+    value_field = 'accession_id'
+    search_fields = ('accession_id__istartswith',)
+    ordering = ('accession_id',)
+    only_fields = ('accession_id',)
+
+    def get_queryset(self):
+        return Accession.objects.filter(is_template=True).exclude(accession_category='Pharma')
+
+    def get_label(self, obj):
+        return obj.accession_id
+
+
+class PharmaAccessionTemplateLookup(AccessionTemplateLookup):
+
+    def get_queryset(self):
+        return BioPharmaAccession.objects.filter(is_template=True, accession_category='Pharma')
+
+
+# Served by accessioning/ajax/ajax.py remote_lookup, also used by the template app's forms
+REMOTE_LOOKUPS = {
+    'client': ClientLookup(),
+    'patient': PatientLookup(),
+    'non_subject_patient': NonSubjectPatientLookup(),
+    'subject': SubjectLookup(),
+    'accession_template': AccessionTemplateLookup(),
+    'pharma_accession_template': PharmaAccessionTemplateLookup(),
+}
+
+
+def get_lookup_url(name):
+    return reverse_lazy('accessioning:ajax_remote_lookup', args=[name])
+
+
+def remote_select(name, attrs=None):
+    return RemoteSelect(REMOTE_LOOKUPS[name], get_lookup_url(name), attrs=attrs)
+
+
+def remote_choice_field(name, **kwargs):
+    return RemoteChoiceField(REMOTE_LOOKUPS[name], get_lookup_url(name), **kwargs)
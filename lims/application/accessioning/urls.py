@@ -42,5 +42,6 @@ class URLS:
              name='ajax_get_physicians_by_project'),
         path('ajax/upload_scanned_images/', ajax.upload_scanned_images,
              name='ajax_upload_scanned_images'),
+        path('ajax/lookup/<str:lookup_name>/', ajax.remote_lookup, name='ajax_remote_lookup'),
 
     ]
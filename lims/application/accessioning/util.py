@@ -0,0 +1,180 @@
+import hashlib
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+
+from accessioning.models import AccessionICDCodeMap
+from logutil.log import log
+from sample.models import Sample, SampleTestMap
+from security.models import JobType
+from util.util import UtilClass
+
+# Template sample fields copied onto every clone when they are set on the template
+TEMPLATE_SAMPLE_COPY_FIELDS = [
+    "part_no", "sample_type_id", "container_type_id", "previous_step", "next_step",
+    "accession_sample_id", "pending_action", "body_site", "sub_site", "collection_method",
+    "workflow_id_id", "size", "pieces", "num_of_blocks", "num_of_slides", "num_of_manualsmear_slides",
+    "num_of_thinprep_slides", "grossing_comments", "gross_code", "gross_description", "descriptive", "isvisible",
+    "smearing_process", "label_count",
+]
+
+
+class AccessionPlanUtilClass:
+    """
+    Clones template accessions from a compiled "accession plan": the template samples with the fields
+    to copy, their tests and workflows, the ICD codes and the sequences every clone needs.
+    The plan is built once per template version and cached; each clone then reserves its sequence
+    numbers in blocks and is written with bulk inserts.
+    """
+
+    @staticmethod
+    def get_template_version(template_accession_id):
+        """
+        Fingerprint of the template content; it changes whenever a template sample, test map or ICD code
+        is added, removed or edited, so stale plans are never used.
+        """
+        sample_info = Sample.objects.filter(accession_id_id=template_accession_id).aggregate(
+            sample_count=Count('sample_id', distinct=True), sample_mod_dt=Max('mod_dt'))
+        # SampleTestMap has no mod_dt; its rows carry exactly what the plan copies, so they are fingerprinted as is
+        test_maps = list(SampleTestMap.objects.filter(sample_id__accession_id_id=template_accession_id).order_by(
+            'sample_test_map_id').values_list('sample_test_map_id', 'sample_id', 'test_id_id', 'workflow_id_id'))
+        icd_info = AccessionICDCodeMap.objects.filter(accession_id_id=template_accession_id).aggregate(
+            icd_count=Count('accession_icd_code_map_id'), icd_mod_dt=Max('mod_dt'))
+        fingerprint = repr((sorted({**sample_info, **icd_info}.items()), test_maps))
+        return hashlib.md5(fingerprint.encode()).hexdigest()
+
+    @staticmethod
+    def compile_plan(template_accession_id):
+        template_samples = list(
+            Sample.objects.filter(accession_id_id=template_accession_id).order_by('sample_id').values(
+                'sample_id', 'slide_seq', 'block_or_cassette_seq', *TEMPLATE_SAMPLE_COPY_FIELDS)
+        )
+        tests_by_sample = {}
+        for sample_id, test_id, workflow_id in SampleTestMap.objects.filter(
+                sample_id__accession_id_id=template_accession_id
+        ).order_by('sample_test_map_id').values_list('sample_id', 'test_id_id', 'workflow_id_id'):
+            tests_by_sample.setdefault(sample_id, []).append((test_id, workflow_id))
+
+        plan_samples = []
+        for template_sample in template_samples:
+            fields = {field: template_sample[field] for field in TEMPLATE_SAMPLE_COPY_FIELDS if template_sample[field]}
+            # A slide keeps the template block number and gets the next slide number of that block,
+            # a block or cassette gets the next block number of its part
+            if template_sample['slide_seq']:
+                fields['block_or_cassette_seq'] = template_sample['block_or_cassette_seq']
+                sequence = "slide"
+            elif template_sample['block_or_cassette_seq']:
+                sequence = "block"
+            else:
+                sequence = None
+            plan_samples.append({
+                "fields": fields,
+                "sequence": sequence,
+                "tests": tests_by_sample.get(template_sample['sample_id'], []),
+            })
+
+        icd_code_ids = list(AccessionICDCodeMap.objects.filter(
+            accession_id_id=template_accession_id).order_by('accession_icd_code_map_id').values_list(
+            'icd_code_id_id', flat=True))
+        return {"template_id": template_accession_id, "samples": plan_samples, "icd_code_ids": icd_code_ids}
+
+    @staticmethod
+    def get_plan(template_accession_id):
+        version = AccessionPlanUtilClass.get_template_version(template_accession_id)
+        cache_key = f"accession_plan_{template_accession_id}_{version}"
+        plan = cache.get(cache_key)
+        if plan is None:
+            plan = AccessionPlanUtilClass.compile_plan(template_accession_id)
+            cache.set(cache_key, plan, timeout=settings.ACCESSION_PLAN_CACHE_TIMEOUT)
+        return plan
+
+    @staticmethod
+    def get_sequence_prefix(accession_id, fields, sequence):
+        part_no = fields.get("part_no") or ""
+        if sequence == "slide":
+            return f"{accession_id}-{part_no}-{fields.get('block_or_cassette_seq')}"
+        return f"{accession_id}-{part_no}"
+
+    @staticmethod
+    def instantiate_plan(plan, accessions, request):
+        """
+        Creates the samples, test maps, routing info and ICD code maps of the plan for every accession.
+        Sample, block and slide numbers for all accessions are reserved up front in one statement.
+        """
+        user = request.user
+        plan_samples = plan["samples"]
+        if not accessions:
+            return []
+
+        current_date = datetime.now()
+        sample_prefix = f"S-{current_date.strftime('%m%d%Y')}"
+        prefix_counts = {sample_prefix: len(plan_samples) * len(accessions)}
+        for accession in accessions:
+            for plan_sample in plan_samples:
+                if plan_sample["sequence"]:
+                    prefix = AccessionPlanUtilClass.get_sequence_prefix(accession.accession_id, plan_sample["fields"],
+                                                                        plan_sample["sequence"])
+                    prefix_counts[prefix] = prefix_counts.get(prefix, 0) + 1
+
+        department_id = None
+        current_jobtype = request.session.get('currentjobtype', '')
+        if current_jobtype:
+            department_id = JobType.objects.filter(name=current_jobtype).values_list('departmentid', flat=True).first()
+
+        with transaction.atomic():
+            next_numbers = UtilClass.reserve_sequence_blocks(prefix_counts, "Sample", user.id)
+
+            list_samples_to_be_created = []
+            list_sample_test_map = []
+            list_accession_icd_code_map = []
+            for accession in accessions:
+                for plan_sample in plan_samples:
+                    fields = plan_sample["fields"]
+                    # Clones always start at Accessioning, whatever step the template sample is in
+                    defaults = {**fields, 'current_step': "Accessioning", 'avail_at': current_date,
+                                'accession_generated': False, 'sample_status': "Initial",
+                                'custodial_department_id': department_id, 'custodial_user': user,
+                                'created_by': user, 'mod_by': user, 'accession_id': accession}
+                    sample_instance = Sample(**defaults)
+                    seq_no = next_numbers[sample_prefix]
+                    next_numbers[sample_prefix] += 1
+                    sample_instance.sample_id = f"{sample_prefix}-{seq_no:05}"
+                    if plan_sample["sequence"]:
+                        prefix = AccessionPlanUtilClass.get_sequence_prefix(accession.accession_id, fields,
+                                                                            plan_sample["sequence"])
+                        seq_no = next_numbers[prefix]
+                        next_numbers[prefix] += 1
+                        if plan_sample["sequence"] == "slide":
+                            sample_instance.slide_seq = str(seq_no)
+                        else:
+                            sample_instance.block_or_cassette_seq = str(seq_no)
+                    list_samples_to_be_created.append(sample_instance)
+
+                    for test_id, workflow_id in plan_sample["tests"]:
+                        list_sample_test_map.append(SampleTestMap(sample_id=sample_instance, test_id_id=test_id,
+                                                                  workflow_id_id=workflow_id, test_status="Initial"))
+
+                for icd_code_id in plan["icd_code_ids"]:
+                    list_accession_icd_code_map.append(AccessionICDCodeMap(accession_id=accession,
+                                                                           icd_code_id_id=icd_code_id,
+                                                                           created_by=user, mod_by=user))
+
+            if list_samples_to_be_created:
+                Sample.objects.bulk_create(list_samples_to_be_created)
+                UtilClass.createRoutingInfoForSample(list_samples_to_be_created)
+            if list_sample_test_map:
+                SampleTestMap.objects.bulk_create(list_sample_test_map)
+            if list_accession_icd_code_map:
+                AccessionICDCodeMap.objects.bulk_create(list_accession_icd_code_map)
+
+        log.info(f"Template {plan['template_id']} cloned into {len(accessions)} accession(s): "
+                 f"{len(list_samples_to_be_created)} samples created")
+        return list_samples_to_be_created
+
+    @staticmethod
+    def clone_template(template_accession_id, accessions, request):
+        plan = AccessionPlanUtilClass.get_plan(template_accession_id)
+        return AccessionPlanUtilClass.instantiate_plan(plan, accessions, request)
@@ -1,14 +1,16 @@
 import importlib
 import os
+from collections import Counter
 from datetime import datetime
+from functools import lru_cache
 
 from django.apps import apps
 from django.conf import settings
 from django.contrib import admin, messages
 from django.db.models import Q, CharField, Case, When, Value, F
 from django.http import HttpResponseRedirect, JsonResponse, HttpResponse
-from django.utils.safestring import mark_safe
 from django.urls import path, reverse
+from django.utils.text import slugify
 from django.shortcuts import render, redirect
 from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
 from controllerapp.views import controller
@@ -17,15 +19,17 @@ from django.template import loader
 from django.views.decorators.csrf import csrf_exempt, csrf_protect
 from django.contrib.admin import helpers
 
-from analysis.forms import ReportOptionDtlForm, MergeReportingDtlForm, MergeReportingForm, ReportOptionForm, \
-    HistoricMergeReportingForm
+from analysis.forms import AnalyteDtlFormSet, ReportOptionDtlForm, MergeReportingDtlForm, MergeReportingForm, \
+    ReportOptionForm, HistoricMergeReportingForm
 from analysis.models import ReportOption, ReportOptionDtl, HistoricalReportOption, MergeReporting, MergeReportingDtl, \
     HistoricalMergeReporting
 from controllerapp.views import controller
+from routinginfo.results import RoutingResultUtilClass
 from routinginfo.util import UtilClass
 from security.forms import User
 from util.actions import GenericAction
 from util.admin import TZIndependentAdmin
+from util.storagetier import STORAGE_TIER_HOT
 from logutil.log import log
 
 
@@ -37,38 +41,10 @@ def execute_routing(self, request, queryset):
         success_report_options = UtilClass.process_workflow_steps_drylab(self, request, queryset, report_option_id,
                                                                          accession_flag='N')
         if success_report_options:
-            table_rows = "".join(
-                [f"<tr><td>{reportoption['report_option_id']}</td><td>{reportoption['current_step']}</td></tr>" for
-                 reportoption in
-                 success_report_options]
-            )
-
-            message = f"""
-               <p><strong>Routed Report Options to below step:</strong></p>
-                        <button onclick="toggleTable()" style="margin-bottom: 10px; padding: 5px 10px; background-color: #007bff; color: white; border: none; cursor: pointer; border-radius: 5px;">
-                            Expand/Collapse
-                        </button>
-                        <div id="reportOptionTable" style="display: none;">
-                            <table border="1" cellpadding="2" cellspacing="0" style="border-collapse: collapse; width: 50%;">
-                                <tr><th>Report Option ID</th><th>Next Step</th></tr>
-                                {table_rows}
-                            </table>
-                        </div>
-
-
-                    <script>
-                        function toggleTable() {{
-                            var table = document.getElementById("reportOptionTable");
-                            if (table.style.display === "none") {{
-                                table.style.display = "block";
-                            }} else {{
-                                table.style.display = "none";
-                            }}
-                        }}
-                    </script>
-                """
+            message = RoutingResultUtilClass.record(request, success_report_options, id_key="report_option_id",
+                                                    title="Routed Report Options", id_label="Report Option ID")
             log.info(f"Successful Reportoption routing ---> {success_report_options}")
-            self.message_user(request, mark_safe(message), level="INFO")
+            self.message_user(request, message, level="INFO")
 
     else:
         log.error("No reportoption(s) found")
@@ -101,8 +77,13 @@ class ReportOptionDtlAdmin(admin.TabularInline):
     readonly_fields = ["analyte_id",
                        ]
     form = ReportOptionDtlForm
+    formset = AnalyteDtlFormSet
     extra = 0
 
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        return qs.select_related("report_option_id")
+
     def get_readonly_fields(self, request, obj=None):
         if obj is None or obj.assign_pathologist != request.user:
             # If obj is None or the assigned pathologist is not the current user,
@@ -219,7 +200,7 @@ class ReportOptionAdmin(TZIndependentAdmin):
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        qs = qs.filter(reporting_status="In-progress")
+        qs = qs.filter(reporting_status="In-progress", storage_tier=STORAGE_TIER_HOT)
 
         try:
             user_id = request.user.id
@@ -371,6 +352,7 @@ class MergeReportingDtlAdmin(admin.TabularInline):
     readonly_fields = ["analyte_id",
                        ]
     form = MergeReportingDtlForm
+    formset = AnalyteDtlFormSet
     extra = 0
 
     def get_queryset(self, request):
@@ -388,7 +370,132 @@ class MergeReportingDtlAdmin(admin.TabularInline):
             return ["analyte_id"]
 
 
-class MergeReportingAdmin(TZIndependentAdmin):
+class PreloadedInlineFormSet(AnalyteDtlFormSet):
+    """
+    Inline formset fed from rows loaded up front instead of running its own query.
+    """
+    preloaded_rows = None
+
+    def get_queryset(self):
+        if self.preloaded_rows is None:
+            return super().get_queryset()
+        return self.preloaded_rows
+
+
+class GroupedMergeReportingDtlAdmin(MergeReportingDtlAdmin):
+    """
+    MergeReportingDtl rows of one report option, shown as their own inline on the merge report.
+    The rows are handed in by the parent admin, see load_merge_reporting_dtl_groups.
+    """
+    formset = PreloadedInlineFormSet
+    extra = 0
+    max_num = 0
+    report_option_id = None
+    merge_reporting_id = None
+    preloaded_rows = None
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).filter(
+            report_option_id_id=self.report_option_id,
+            merge_reporting_id_id=self.merge_reporting_id
+        )
+
+    def get_formset(self, request, obj=None, **kwargs):
+        FormSet = super().get_formset(request, obj, **kwargs)
+        FormSet.preloaded_rows = self.preloaded_rows
+        return FormSet
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@lru_cache(maxsize=256)
+def get_grouped_merge_reporting_dtl_inline(display_label):
+    # Grouped inlines only differ by their label, so the classes are built once per label
+    return type(
+        f"GroupedMergeReportingDtlAdmin_{slugify(display_label)}",
+        (GroupedMergeReportingDtlAdmin,),
+        {'verbose_name_plural': display_label}
+    )
+
+
+def load_merge_reporting_dtl_groups(request, inline, merge_reporting_id):
+    """
+    Loads every detail row of a merge report with its report option, test, part and analyte in one query.
+    The detail forms take their analyte setup from the cached field specs (see AnalyteDtlFormSet).
+    Returns {(report_option_id, merge_reporting_id): [rows]}.
+    """
+    rows = list(
+        inline.get_queryset(request).filter(merge_reporting_id=merge_reporting_id)
+        .select_related('report_option_id__test_id', 'report_option_id__root_sample_id', 'analyte_id')
+        .order_by('pk')
+    )
+    groups = {}
+    for row in rows:
+        groups.setdefault((row.report_option_id_id, row.merge_reporting_id_id), []).append(row)
+    return groups
+
+
+class MergeReportingDtlGroupedMixin:
+    """
+    Splits the MergeReportingDtl inline into one inline per report option, labelled by part and test.
+    """
+
+    def get_formsets_with_inlines(self, request, obj=None):
+        if obj:
+            inline_instances = []
+            label_group = []
+
+            # Gather all groups
+            for inline in self.get_inline_instances(request, obj):
+                if isinstance(inline, MergeReportingDtlAdmin):
+                    groups = load_merge_reporting_dtl_groups(request, inline, obj.pk)
+                    for (report_option_id, merge_reporting_id), rows in groups.items():
+                        ro = rows[0].report_option_id
+                        test_name = ro.test_id.test_name if ro.test_id else "NoTest"
+                        part_no = ro.root_sample_id.part_no if ro.root_sample_id else "NoPart"
+                        if test_name == settings.TEST_ID_GULF:
+                            base_label = f"{part_no}"
+                        else:
+                            base_label = f"{part_no} - {test_name}"
+
+                        label_group.append({
+                            "base_label": base_label,
+                            "report_option_id": report_option_id,
+                            "merge_reporting_id": merge_reporting_id,
+                            "rows": rows
+                        })
+                else:
+                    inline_instances.append((inline.get_formset(request, obj), inline))
+
+            # Determine if any base_label is duplicated
+            labels = [g["base_label"] for g in label_group]
+            duplicate_exists = any(count > 1 for count in Counter(labels).values())
+
+            # Sort groups alphabetically by base_label
+            label_group.sort(key=lambda g: g["base_label"].lower())
+
+            # Create and number (if needed)
+            for idx, group in enumerate(label_group, start=1):
+                base_label = group["base_label"]
+                display_label = f"{base_label} (#{idx})" if duplicate_exists else base_label
+
+                InlineGrouped = get_grouped_merge_reporting_dtl_inline(display_label)
+                inline_instance = InlineGrouped(self.model, self.admin_site)
+                inline_instance.report_option_id = group["report_option_id"]
+                inline_instance.merge_reporting_id = group["merge_reporting_id"]
+                inline_instance.preloaded_rows = group["rows"]
+                inline_instances.append((inline_instance.get_formset(request, obj), inline_instance))
+
+            # Yield all in the sorted order
+            for formset, inline in inline_instances:
+                yield formset, inline
+
+
+class MergeReportingAdmin(MergeReportingDtlGroupedMixin, TZIndependentAdmin):
     form = MergeReportingForm
 
     def get_form(self, request, obj=None, **kwargs):
@@ -500,103 +607,6 @@ class MergeReportingAdmin(TZIndependentAdmin):
     def has_view_permission(self, request, obj=None):
         return True
 
-    def get_formsets_with_inlines(self, request, obj=None):
-        if obj:
-            from itertools import groupby
-            from operator import attrgetter
-            from django.utils.text import slugify
-
-            inline_instances = []
-            label_group = []
-
-            # Gather all groups
-            for inline in self.get_inline_instances(request, obj):
-                if isinstance(inline, MergeReportingDtlAdmin):
-                    qs = inline.get_queryset(request).filter(
-                        merge_reporting_id=obj.pk
-                    ).order_by("report_option_id_id", "merge_reporting_id_id")
-
-                    grouped = groupby(
-                        qs, key=attrgetter("report_option_id_id", "merge_reporting_id_id")
-                    )
-
-                    for (report_option_id, merge_reporting_id), _ in grouped:
-                        try:
-                            ro = ReportOption.objects.select_related('test_id', 'root_sample_id').get(
-                                pk=report_option_id
-                            )
-                            test_name = ro.test_id.test_name if ro.test_id else "NoTest"
-                            part_no = ro.root_sample_id.part_no if ro.root_sample_id else "NoPart"
-                            if test_name == settings.TEST_ID_GULF:
-                                base_label = f"{part_no}"
-                            else:
-                                base_label = f"{part_no} - {test_name}"
-                        except ReportOption.DoesNotExist:
-                            base_label = f"{report_option_id} - {merge_reporting_id}"
-
-                        label_group.append({
-                            "base_label": base_label,
-                            "report_option_id": report_option_id,
-                            "merge_reporting_id": merge_reporting_id,
-                            "inline": inline
-                        })
-                else:
-                    inline_instances.append((inline.get_formset(request, obj), inline))
-
-            # Determine if any base_label is duplicated
-            labels = [g["base_label"] for g in label_group]
-            duplicate_exists = any(count > 1 for count in __import__('collections').Counter(labels).values())
-
-            # Sort groups alphabetically by base_label
-            label_group.sort(key=lambda g: g["base_label"].lower())
-
-            # Create and number (if needed)
-            def make_get_queryset(inline, r_id, m_id):
-                def get_queryset(self, request):
-                    return inline.get_queryset(request).filter(
-                        report_option_id_id=r_id,
-                        merge_reporting_id_id=m_id
-                    )
-
-                return get_queryset
-
-            for idx, group in enumerate(label_group, start=1):
-                inline = group["inline"]
-                base_label = group["base_label"]
-                ro_id = group["report_option_id"]
-                mr_id = group["merge_reporting_id"]
-
-                if duplicate_exists:
-                    display_label = f"{base_label} (#{idx})"
-                    # ensure unique classname even if base_label duplicates
-                    uniq = idx
-                else:
-                    display_label = base_label
-                    # use report_option_id to differentiate classes uniquely
-                    uniq = ro_id
-
-                dynamic_class_name = f"{inline.__class__.__name__}_{slugify(base_label)}_{uniq}"
-
-                InlineGrouped = type(
-                    dynamic_class_name,
-                    (MergeReportingDtlAdmin,),
-                    {
-                        'verbose_name_plural': display_label,
-                        'get_queryset': make_get_queryset(inline, ro_id, mr_id),
-                        'has_add_permission': staticmethod(lambda request, obj=None: False),
-                        'has_delete_permission': staticmethod(lambda request, obj=None: False),
-                        'extra': 0,
-                        'max_num': 0,
-                    }
-                )
-
-                inline_instance = InlineGrouped(self.model, self.admin_site)
-                inline_instances.append((inline_instance.get_formset(request, obj), inline_instance))
-
-            # Yield all in the sorted order
-            for formset, inline in inline_instances:
-                yield formset, inline
-
     def save_model(self, request, obj, form, change):
         try:
             if request.user.is_authenticated:
@@ -619,7 +629,7 @@ class MergeReportingAdmin(TZIndependentAdmin):
             return qs.none()
 
 
-class HistoricMergeReportingAdmin(TZIndependentAdmin):
+class HistoricMergeReportingAdmin(MergeReportingDtlGroupedMixin, TZIndependentAdmin):
     form = HistoricMergeReportingForm
 
     def get_form(self, request, obj=None, **kwargs):
@@ -732,103 +742,6 @@ class HistoricMergeReportingAdmin(TZIndependentAdmin):
     def has_view_permission(self, request, obj=None):
         return True
 
-    def get_formsets_with_inlines(self, request, obj=None):
-        if obj:
-            from itertools import groupby
-            from operator import attrgetter
-            from django.utils.text import slugify
-
-            inline_instances = []
-            label_group = []
-
-            # Gather all groups
-            for inline in self.get_inline_instances(request, obj):
-                if isinstance(inline, MergeReportingDtlAdmin):
-                    qs = inline.get_queryset(request).filter(
-                        merge_reporting_id=obj.pk
-                    ).order_by("report_option_id_id", "merge_reporting_id_id")
-
-                    grouped = groupby(
-                        qs, key=attrgetter("report_option_id_id", "merge_reporting_id_id")
-                    )
-
-                    for (report_option_id, merge_reporting_id), _ in grouped:
-                        try:
-                            ro = ReportOption.objects.select_related('test_id', 'root_sample_id').get(
-                                pk=report_option_id
-                            )
-                            test_name = ro.test_id.test_name if ro.test_id else "NoTest"
-                            part_no = ro.root_sample_id.part_no if ro.root_sample_id else "NoPart"
-                            if test_name == settings.TEST_ID_GULF:
-                                base_label = f"{part_no}"
-                            else:
-                                base_label = f"{part_no} - {test_name}"
-                        except ReportOption.DoesNotExist:
-                            base_label = f"{report_option_id} - {merge_reporting_id}"
-
-                        label_group.append({
-                            "base_label": base_label,
-                            "report_option_id": report_option_id,
-                            "merge_reporting_id": merge_reporting_id,
-                            "inline": inline
-                        })
-                else:
-                    inline_instances.append((inline.get_formset(request, obj), inline))
-
-            # Determine if any base_label is duplicated
-            labels = [g["base_label"] for g in label_group]
-            duplicate_exists = any(count > 1 for count in __import__('collections').Counter(labels).values())
-
-            # Sort groups alphabetically by base_label
-            label_group.sort(key=lambda g: g["base_label"].lower())
-
-            # Create and number (if needed)
-            def make_get_queryset(inline, r_id, m_id):
-                def get_queryset(self, request):
-                    return inline.get_queryset(request).filter(
-                        report_option_id_id=r_id,
-                        merge_reporting_id_id=m_id
-                    )
-
-                return get_queryset
-
-            for idx, group in enumerate(label_group, start=1):
-                inline = group["inline"]
-                base_label = group["base_label"]
-                ro_id = group["report_option_id"]
-                mr_id = group["merge_reporting_id"]
-
-                if duplicate_exists:
-                    display_label = f"{base_label} (#{idx})"
-                    # ensure unique classname even if base_label duplicates
-                    uniq = idx
-                else:
-                    display_label = base_label
-                    # use report_option_id to differentiate classes uniquely
-                    uniq = ro_id
-
-                dynamic_class_name = f"{inline.__class__.__name__}_{slugify(base_label)}_{uniq}"
-
-                InlineGrouped = type(
-                    dynamic_class_name,
-                    (MergeReportingDtlAdmin,),
-                    {
-                        'verbose_name_plural': display_label,
-                        'get_queryset': make_get_queryset(inline, ro_id, mr_id),
-                        'has_add_permission': staticmethod(lambda request, obj=None: False),
-                        'has_delete_permission': staticmethod(lambda request, obj=None: False),
-                        'extra': 0,
-                        'max_num': 0,
-                    }
-                )
-
-                inline_instance = InlineGrouped(self.model, self.admin_site)
-                inline_instances.append((inline_instance.get_formset(request, obj), inline_instance))
-
-            # Yield all in the sorted order
-            for formset, inline in inline_instances:
-                yield formset, inline
-
     def save_model(self, request, obj, form, change):
         try:
             if request.user.is_authenticated:
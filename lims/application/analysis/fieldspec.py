@@ -0,0 +1,205 @@
+import re
+from collections import namedtuple
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+
+from util.choices import ChoiceUtilClass
+from util.util import UtilClass
+
+ANALYTE_FIELD_SPEC_VERSION_CACHE_KEY = "analyte_field_specs_version"
+
+# How the analyte_value field of one analyte is drawn; compiled from its TestAnalyte row
+AnalyteFieldSpec = namedtuple('AnalyteFieldSpec', [
+    'test_analyte_id', 'input_mode', 'data_type', 'reference_type', 'sql', 'lookups',
+])
+
+SQL_INPUT_MODES = ('dropdown_sql', 'input_sql')
+
+
+class AnalyteFieldSpecUtilClass:
+    """
+    Per test, the immutable field specs of its analytes ({analyte_id: AnalyteFieldSpec}), compiled from TestAnalyte
+    in one query and kept in the shared cache. Every test is dropped at once when a TestAnalyte changes
+    (see the receiver in tests/models.py). Reference dropdown choices come from ChoiceUtilClass.
+    """
+
+    @staticmethod
+    def get_version():
+        version = cache.get(ANALYTE_FIELD_SPEC_VERSION_CACHE_KEY)
+        if version is None:
+            cache.add(ANALYTE_FIELD_SPEC_VERSION_CACHE_KEY, 1, timeout=None)
+            version = cache.get(ANALYTE_FIELD_SPEC_VERSION_CACHE_KEY, 1)
+        return version
+
+    @staticmethod
+    def invalidate():
+        try:
+            cache.incr(ANALYTE_FIELD_SPEC_VERSION_CACHE_KEY)
+        except ValueError:
+            cache.set(ANALYTE_FIELD_SPEC_VERSION_CACHE_KEY, 1, timeout=None)
+
+    @staticmethod
+    def compile_specs(test_ids):
+        TestAnalyte = apps.get_model('tests', 'TestAnalyte')
+        specs = {test_id: {} for test_id in test_ids}
+        for ta in TestAnalyte.objects.filter(test_id_id__in=test_ids).select_related(
+                'dropdown_reference_type').order_by('pk'):
+            sql = ta.dropdown_sql or ''
+            lookups = tuple(lookup.strip() for lookup in re.findall(r':\w+\|([^\'"]+)', sql))
+            specs[ta.test_id_id].setdefault(ta.analyte_id_id, AnalyteFieldSpec(
+                test_analyte_id=ta.pk,
+                input_mode=ta.input_mode,
+                data_type=ta.data_type,
+                reference_type=ta.dropdown_reference_type.name if ta.dropdown_reference_type else None,
+                sql=sql,
+                lookups=lookups,
+            ))
+        return specs
+
+    @staticmethod
+    def get_specs(test_ids):
+        """Returns {test_id: {analyte_id: AnalyteFieldSpec}} for the given tests."""
+        test_ids = {test_id for test_id in test_ids if test_id}
+        if not test_ids:
+            return {}
+        version = AnalyteFieldSpecUtilClass.get_version()
+        cache_keys = {f"analyte_field_specs_{version}_{test_id}": test_id for test_id in test_ids}
+        specs = {cache_keys[key]: value for key, value in cache.get_many(cache_keys.keys()).items()}
+        missing = test_ids - specs.keys()
+        if missing:
+            compiled = AnalyteFieldSpecUtilClass.compile_specs(missing)
+            cache.set_many({f"analyte_field_specs_{version}_{test_id}": value for test_id, value in compiled.items()},
+                           timeout=settings.ANALYTE_FIELD_SPEC_CACHE_TIMEOUT)
+            specs.update(compiled)
+        return specs
+
+    @staticmethod
+    def get_reference_choices(spec):
+        if not spec.reference_type:
+            return []
+        return [('', '')] + ChoiceUtilClass.get_refvalue_choices(spec.reference_type)
+
+
+class AnalyteFieldSpecContext:
+    """
+    Lookups shared by every analyte row of one report form (ReportOptionDtl or MergeReportingDtl formset):
+    the field specs of the report tests, and the values of the SQL driven analytes. The SQL of a report is
+    resolved in one pass the first time one of its rows asks for it; the placeholder values of all its
+    statements come from a single query over the detail rows instead of one or two queries per placeholder.
+    """
+
+    def __init__(self, model_class, rows=()):
+        self.model_class = model_class
+        self.specs = {}
+        self.report_options = {}
+        self.sql_rows = {}
+        self.report_analytes = {}
+        for row in rows:
+            report_option = row.report_option_id
+            if report_option is not None:
+                self.report_options[report_option.pk] = report_option
+                self.report_analytes.setdefault(report_option.pk, set()).add(row.analyte_id_id)
+        self.specs.update(AnalyteFieldSpecUtilClass.get_specs(
+            {report_option.test_id_id for report_option in self.report_options.values()}))
+
+    def get_report_option(self, report_option_id):
+        if report_option_id not in self.report_options:
+            ReportOption = apps.get_model('analysis', 'ReportOption')
+            self.report_options[report_option_id] = ReportOption.objects.filter(pk=report_option_id).first()
+        return self.report_options[report_option_id]
+
+    def get_spec(self, test_id, analyte_id):
+        if test_id not in self.specs:
+            self.specs.update(AnalyteFieldSpecUtilClass.get_specs([test_id]))
+        return self.specs.get(test_id, {}).get(analyte_id)
+
+    def get_placeholder_values(self, report_option_id):
+        """
+        {analyte_id: value} and {analyte name: value} over the report's detail rows; like the per-placeholder
+        lookups, the lowest pk wins when an analyte has several rows.
+        """
+        values = {}
+        for analyte_id, analyte_name, analyte_value in self.model_class.objects.filter(
+                report_option_id=report_option_id).order_by('-pk').values_list(
+                'analyte_id', 'analyte_id__analyte', 'analyte_value'):
+            values[analyte_id] = analyte_value
+            values[analyte_name] = analyte_value
+        return values
+
+    def resolve_report_sql(self, report_option_id, test_id, requested_spec):
+        specs = self.specs.get(test_id, {})
+        sql_specs = {spec.test_analyte_id: spec for spec in (
+            specs.get(analyte_id) for analyte_id in self.report_analytes.get(report_option_id, ()))
+            if spec is not None and spec.input_mode in SQL_INPUT_MODES and spec.sql}
+        sql_specs[requested_spec.test_analyte_id] = requested_spec
+        placeholder_values = self.get_placeholder_values(report_option_id)
+        executed = {}
+        for spec in sql_specs.values():
+            params = {}
+            raw_sql = resolve_dynamic_placeholders(spec.sql, report_option_id, params, self.model_class,
+                                                   analyte_values=placeholder_values)
+            # Statements that resolve to the same SQL and parameters are run once
+            key = (raw_sql, tuple(sorted(params.items())))
+            if key not in executed:
+                executed[key] = UtilClass.resolve_sql(raw_sql, params)
+            self.sql_rows[(report_option_id, spec.test_analyte_id)] = executed[key]
+
+    def get_sql_rows(self, report_option_id, test_id, spec):
+        key = (report_option_id, spec.test_analyte_id)
+        if key not in self.sql_rows:
+            self.resolve_report_sql(report_option_id, test_id, spec)
+        return self.sql_rows[key]
+
+
+def resolve_dynamic_placeholders(raw_sql, report_option_id, params, model_class, analyte_values=None):
+    """
+    Dynamically resolves placeholders in SQL using the given model (e.g., ReportOptionDtl or MergeReportingDtl).
+    analyte_values, when given, holds the report's values by analyte id and name (see
+    AnalyteFieldSpecContext.get_placeholder_values) and replaces the per-placeholder queries.
+    """
+    if not isinstance(raw_sql, str):
+        raise TypeError(f"Expected raw_sql to be str, got {type(raw_sql).__name__}")
+
+    Analyte = apps.get_model('tests', 'Analyte')
+    pattern = re.compile(r"'?:(?P<key>\w+)\|(?P<lookup>[^']+)'?")
+
+    def _lookup_value(lookup):
+        if lookup.isdigit() and int(lookup) in analyte_values:
+            return analyte_values[int(lookup)]
+        return analyte_values.get(lookup)
+
+    def _replacer(match):
+        key = match.group('key')
+        lookup = match.group('lookup')
+
+        if analyte_values is not None:
+            val = _lookup_value(lookup)
+        else:
+            rod = None
+
+            if lookup.isdigit():
+                rod = model_class.objects.filter(
+                    report_option_id=report_option_id,
+                    analyte_id=int(lookup)
+                ).first()
+
+            if rod is None:
+                try:
+                    analyte_obj = Analyte.objects.get(analyte=lookup)
+                    rod = model_class.objects.filter(
+                        report_option_id=report_option_id,
+                        analyte_id=analyte_obj.pk
+                    ).first()
+                except Analyte.DoesNotExist:
+                    rod = None
+
+            val = rod.analyte_value if rod else None
+        safe = re.sub(r'[^0-9A-Za-z]+', '_', lookup).strip('_')
+        new_key = f"{key}__{safe}"
+        params[new_key] = val
+
+        return f":{new_key}"
+
+    return pattern.sub(_replacer, raw_sql)
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0011_mergereporting_amendment_comments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportoption',
+            name='storage_tier',
+            field=models.CharField(choices=[('hot', 'Hot'), ('cold', 'Cold')], default='hot', editable=False, max_length=10, verbose_name='Storage Tier'),
+        ),
+        migrations.AddIndex(
+            model_name='reportoption',
+            index=models.Index(condition=models.Q(('storage_tier', 'hot')), fields=['reporting_status', 'custodial_department'], name='reportoption_hot_status_idx'),
+        ),
+    ]
@@ -12,10 +12,17 @@ from masterdata.models import Client, Physician
 from sample.models import Sample
 from security.models import Department, User
 from tests.models import Test, Analyte, TestAnalyte
+from util.storagetier import STORAGE_TIER_CHOICES, STORAGE_TIER_COLD, STORAGE_TIER_HOT, \
+    TERMINAL_REPORTING_STATUSES, StorageTierQuerySet, StorageTierUtilClass
 from workflows.models import Workflow
 from template.models import Macros
 
 
+class ReportOptionQuerySet(StorageTierQuerySet):
+    status_field = 'reporting_status'
+    rewarm = staticmethod(StorageTierUtilClass.rewarm_report_options)
+
+
 class ReportOption(models.Model):
     report_option_id = models.CharField(primary_key=True, max_length=40, verbose_name="Report Option ID")
     accession_id = models.ForeignKey(Accession, on_delete=models.RESTRICT, null=False, blank=False,
@@ -59,11 +66,20 @@ class ReportOption(models.Model):
         verbose_name=_('Last Signed DateTime'), null=True, blank=True)
     last_signed_by = models.ForeignKey(security.models.User, null=True, blank=True, on_delete=models.RESTRICT,
                                        verbose_name="Last Signed By", related_name="last_signed_by")
+    storage_tier = models.CharField(max_length=10, choices=STORAGE_TIER_CHOICES, default=STORAGE_TIER_HOT,
+                                    editable=False, verbose_name="Storage Tier")
     history = AuditlogHistoryField()
 
+    objects = ReportOptionQuerySet.as_manager()
+
     class Meta:
         verbose_name = _("Report")
         verbose_name_plural = _("Reports")
+        indexes = [
+            # Active report worklists filter by status over hot rows only
+            models.Index(fields=['reporting_status', 'custodial_department'], name='reportoption_hot_status_idx',
+                         condition=models.Q(storage_tier=STORAGE_TIER_HOT)),
+        ]
         unique_together = (
             'report_option_id',
             'accession_id',
@@ -89,7 +105,14 @@ class ReportOption(models.Model):
         if is_update:
             old_instance = ReportOption.objects.filter(pk=self.pk).first()
 
+        if is_update:
+            # The tier is taken from the row, so a stale in-memory 'hot' cannot overwrite a cold row
+            self.storage_tier = ReportOption.objects.filter(pk=self.pk).values_list(
+                'storage_tier', flat=True).first() or self.storage_tier
         super().save(*args, **kwargs)
+        if self.storage_tier == STORAGE_TIER_COLD and self.reporting_status not in TERMINAL_REPORTING_STATUSES:
+            StorageTierUtilClass.rewarm_report_options([self.pk])
+            self.storage_tier = STORAGE_TIER_HOT
 
         if is_update:
             UtilClass.createRoutingInfoForReportOption(
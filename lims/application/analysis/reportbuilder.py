@@ -0,0 +1,67 @@
+from django.db import connection
+
+from analysis.models import ReportOptionDtl, MergeReportingDtl, ReportSignOut
+from util.util import UtilClass
+
+
+class MergeReportBuilderUtilClass:
+    """
+    Server-side copies for merge reporting: report option details into MergeReportingDtl and the
+    latest MergeReportingDtl version into ReportSignOut, each as a single INSERT ... SELECT.
+    Python only reserves ids and issues the statements, so its cost does not grow with the analyte count.
+    Like the bulk_create calls they replace, these inserts skip model validation and audit logging.
+    """
+
+    @staticmethod
+    def copy_report_option_details(merge_reporting_id, report_option_ids, version_id, user_id):
+        """
+        Copies the ReportOptionDtl rows of the report options into MergeReportingDtl under version_id.
+        MRD-xxxxxxxx ids come from one sequence block reserved for all rows. Returns the number of rows copied.
+        """
+        report_option_ids = list(report_option_ids)
+        row_count = ReportOptionDtl.objects.filter(report_option_id__in=report_option_ids).count()
+        if not row_count:
+            return 0
+        first_no = UtilClass.reserve_sequence_blocks({"MRD": row_count}, "MergeReportingDtl", user_id)["MRD"]
+
+        sql = f"""
+            INSERT INTO {MergeReportingDtl._meta.db_table}
+                (merge_reporting_dtl_id, merge_reporting_id_id, report_option_id_id, analyte_id_id, analyte_value,
+                 version_id, created_dt, created_by_id, mod_dt, mod_by_id)
+            SELECT 'MRD-' || LPAD(seq.seq_no::text, GREATEST(8, LENGTH(seq.seq_no::text)), '0'),
+                   %(merge_reporting_id)s, seq.report_option_id_id, seq.analyte_id_id, seq.analyte_value,
+                   %(version_id)s, NOW(), %(user_id)s, NOW(), %(user_id)s
+            FROM (
+                SELECT rod.report_option_id_id, rod.analyte_id_id, rod.analyte_value,
+                       %(first_no)s + ROW_NUMBER() OVER (
+                           ORDER BY rod.report_option_id_id, rod.report_option_dtl_id
+                       ) - 1 AS seq_no
+                FROM {ReportOptionDtl._meta.db_table} rod
+                WHERE rod.report_option_id_id = ANY(%(report_option_ids)s)
+            ) seq
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, {"merge_reporting_id": merge_reporting_id, "version_id": version_id,
+                                 "user_id": user_id, "first_no": first_no, "report_option_ids": report_option_ids})
+            return cursor.rowcount
+
+    @staticmethod
+    def snapshot_signout(merge_reporting_id, dtl_version_id, signout_version_id, user_id):
+        """
+        Copies the MergeReportingDtl rows of dtl_version_id into ReportSignOut as signout_version_id.
+        Returns the number of rows copied.
+        """
+        sql = f"""
+            INSERT INTO {ReportSignOut._meta.db_table}
+                (merge_reporting_id_id, report_option_id_id, version_id, analyte_id_id, analyte_value,
+                 created_dt, created_by_id, mod_dt, mod_by_id)
+            SELECT mrd.merge_reporting_id_id, mrd.report_option_id_id, %(signout_version_id)s, mrd.analyte_id_id,
+                   mrd.analyte_value, NOW(), %(user_id)s, NOW(), %(user_id)s
+            FROM {MergeReportingDtl._meta.db_table} mrd
+            WHERE mrd.merge_reporting_id_id = %(merge_reporting_id)s AND mrd.version_id = %(dtl_version_id)s
+            ORDER BY mrd.merge_reporting_dtl_id
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, {"merge_reporting_id": merge_reporting_id, "dtl_version_id": dtl_version_id,
+                                 "signout_version_id": signout_version_id, "user_id": user_id})
+            return cursor.rowcount
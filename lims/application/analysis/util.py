@@ -1,29 +1,43 @@
+import importlib
 import os
 import re
 from collections import defaultdict
 from datetime import datetime
+from functools import lru_cache
 from typing import Tuple
 
-import matplotlib
-import matplotlib.patches as mpatches
-import matplotlib.pyplot as plt
-import numpy as np
-from PIL import Image
-from bs4 import BeautifulSoup
 from django.shortcuts import get_object_or_404
-from matplotlib import transforms
-from matplotlib.lines import Line2D
 
 from analysis.models import MergeReportingDtl
 from controllerapp.settings import REPORT_IMAGE_OUTPUT_PATH
 from masterdata.models import BodySite, ReportImgPropInfo, BodySubSiteMap
 from logutil.log import log
 
-matplotlib.use("Agg")
+
+# matplotlib, numpy, PIL and bs4 are only needed to draw report maps; they are imported on first use
+# instead of at module load so the many views that import this module do not pay for them.
+@lru_cache(maxsize=None)
+def get_pyplot():
+    """matplotlib.pyplot on the headless Agg backend."""
+    matplotlib = importlib.import_module("matplotlib")
+    matplotlib.use("Agg")
+    return importlib.import_module("matplotlib.pyplot")
+
+
+def get_numpy():
+    return importlib.import_module("numpy")
+
+
+def get_pil_image():
+    return importlib.import_module("PIL.Image")
+
+
+def get_beautiful_soup():
+    return importlib.import_module("bs4").BeautifulSoup
 
 
 def load_user_data_from_db(merge_reporting_id):
-    log.info(f"merge_reporting_id ---> {merge_reporting_id}")
+    log.info("merge_reporting_id ---> %s", merge_reporting_id)
     # 0) Validate the merge ID exists
     get_object_or_404(
         MergeReportingDtl._meta.get_field('merge_reporting_id').related_model,
@@ -72,7 +86,7 @@ def load_user_data_from_db(merge_reporting_id):
                 "category": category,
             })
 
-    log.info(f"Sample Data --->{data}")
+    log.debug("Sample Data --->%s", data)
     return data
 
 
@@ -99,7 +113,7 @@ def get_coordinates_map_for_sites(keywords):
 
         ds_map[cat][base_img][label] = (subsite.x_axis, subsite.y_axis)
 
-    log.info(f"Map coordinate details --->{ds_map}")
+    log.debug("Map coordinate details --->%s", ds_map)
     return ds_map
 
 
@@ -113,7 +127,7 @@ def get_image_map_props():
             "color": e.color,
             "label": e.category
         }
-    log.info(f"Image map properties --->{style_map}")
+    log.debug("Image map properties --->%s", style_map)
     return style_map
 
 
@@ -123,6 +137,9 @@ def plot_one_map(ax, img_path, coords_map, style_map, data,
     Draw the base image and scatter any sample points whose category
     has a defined style; skips any records with missing style or data.
     """
+    Image = get_pil_image()
+    np = get_numpy()
+    transforms = importlib.import_module("matplotlib.transforms")
     # if there's nothing to plot, just show the image
     if not data or not style_map:
         with Image.open(img_path) as pil:
@@ -181,7 +198,7 @@ def load_user_data_with_diagnosis(merge_reporting_id):
         category: str    # first Category analyte or ""
       }
     """
-    log.info(f"merge_reporting_id ---> {merge_reporting_id}")
+    log.info("merge_reporting_id ---> %s", merge_reporting_id)
     # 0) Ensure the merge exists
     get_object_or_404(
         MergeReportingDtl._meta.get_field('merge_reporting_id').related_model,
@@ -234,7 +251,7 @@ def load_user_data_with_diagnosis(merge_reporting_id):
             "category": category,
         })
 
-    log.info(f"Sample Data with diagnosis --->{out}")
+    log.debug("Sample Data with diagnosis --->%s", out)
     return out
 
 
@@ -244,6 +261,7 @@ def extract_plain_text(input_text: str) -> str:
     Removes tags but preserves line breaks between paragraphs.
     If the input is just a plain text string, returns it stripped.
     """
+    BeautifulSoup = get_beautiful_soup()
     soup = BeautifulSoup(input_text, "html.parser")
 
     # collect text from each <p> or <div>
@@ -274,9 +292,9 @@ def parse_diagnosis(input_text: str) -> Tuple[str, str, str, float]:
     <p><b>Prostatic Adenocarcinoma, Gleason score 9 (4+5)</b></p>
     <p>Involving 75% of the cores</p>
     """
-    log.info(f"Input for parse_diagnosis before extracting into plain text---> {input_text}")
+    log.debug("Input for parse_diagnosis before extracting into plain text---> %s", input_text)
     text = extract_plain_text(input_text)
-    log.info(f"Input for parse_diagnosis after extracting into plain text---> {text}")
+    log.debug("Input for parse_diagnosis after extracting into plain text---> %s", text)
     # 1) disease before first comma
     disease = text.split(",", 1)[0].strip()
 
@@ -293,8 +311,8 @@ def parse_diagnosis(input_text: str) -> Tuple[str, str, str, float]:
     pct = float(m_pct.group(1)) if m_pct else 0.0
 
     log.info(
-        f"Output(s) for parse_diagnosis ---> disease: {disease}, gleason_score : {gleason_score}"
-        f", pattern : {pattern},  pct : {pct}")
+        "Output(s) for parse_diagnosis ---> disease: %s, gleason_score : %s, pattern : %s,  pct : %s",
+        disease, gleason_score, pattern, pct)
     return disease, gleason_score, pattern, pct
 
 
@@ -315,6 +333,7 @@ def annotate_core(ax, x: float, y: float,
     then after plotting the pattern, reset y to the original
     y and shift x by +100 for the remainder.
     """
+    mpatches = importlib.import_module("matplotlib.patches")
     disease, gleason, pattern, pct = parse_diagnosis(diagnosis)
 
     dy = 12
@@ -384,6 +403,8 @@ def generate_category1_map(merge_reporting_id, base_groups, output_dir):
     at least one sample whose category has a style defined AND whose
     keyword maps into that image’s coords_map. Return [] if none apply.
     """
+    plt = get_pyplot()
+    Line2D = importlib.import_module("matplotlib.lines").Line2D
     data = load_user_data_from_db(merge_reporting_id)
     style_map = get_image_map_props()
 
@@ -447,6 +468,9 @@ def generate_category2_map(merge_reporting_id, base_groups, output_dir):
 
     Otherwise, return [] and never write a file.
     """
+    Image = get_pil_image()
+    np = get_numpy()
+    plt = get_pyplot()
     # 1) Fetch all diagnosis+category data
     data = load_user_data_with_diagnosis(merge_reporting_id)
 
@@ -528,6 +552,7 @@ def generate_category2_map(merge_reporting_id, base_groups, output_dir):
 
 
 def merge_category_images(paths_by_category: dict, output_path: str, bg_color=(255, 255, 255)):
+    Image = get_pil_image()
     # 1) Build each row image
     row_imgs = []
     for cat, paths in paths_by_category.items():
@@ -555,7 +580,7 @@ def merge_category_images(paths_by_category: dict, output_path: str, bg_color=(2
 
     # 4) Save
     final.save(output_path, "JPEG", quality=90)
-    log.info(f"Final output path---> {output_path}")
+    log.info("Final output path---> %s", output_path)
     return output_path
 
 
@@ -565,8 +590,8 @@ def generate_image_map(
         merge_images: bool = False
 ):
     log.info(
-        f"Parameters for generate_image_map ---> merge_reporting_id: {merge_reporting_id}, "
-        f", output_dir : {output_dir},  merge_images : {merge_images} ")
+        "Parameters for generate_image_map ---> merge_reporting_id: %s, , output_dir : %s,  merge_images : %s ",
+        merge_reporting_id, output_dir, merge_images)
     os.makedirs(output_dir, exist_ok=True)
 
     # 1) Load & group
@@ -618,5 +643,5 @@ def generate_image_map(
         except OSError:
             pass
 
-    log.info(f"Final image path---> {final_path}")
+    log.info("Final image path---> %s", final_path)
     return final_path
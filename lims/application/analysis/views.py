@@ -35,29 +35,29 @@ def report_option_dtl_autosave(request, report_option_id):
       - On success → 200 + {"status":"success"}
     """
     if not request.user.is_authenticated:
-        log.error(f"User is not authenticated!")
+        log.error("User is not authenticated!")
         return JsonResponse({'status': 'forbidden'}, status=403)
 
     dtl_id = request.POST.get("reportoptiondtlid")
     raw_analyte = request.POST.get("analyte_id", "").strip()
     analyte_value = request.POST.get("analyte_value", "").strip()
-    log.info(f"reportoptiondtlid ---> {dtl_id}")
-    log.info(f"analyte_id ---> {raw_analyte}")
-    log.info(f"analyte_value ---> {analyte_value}")
+    log.debug("reportoptiondtlid ---> %s", dtl_id)
+    log.debug("analyte_id ---> %s", raw_analyte)
+    log.debug("analyte_value ---> %s", analyte_value)
     try:
         if raw_analyte.isdigit():
             analyte_obj = Analyte.objects.get(pk=int(raw_analyte))
         else:
             analyte_obj = Analyte.objects.get(analyte=raw_analyte)
     except Analyte.DoesNotExist:
-        log.error(f"Analyte '{raw_analyte}' not found")
+        log.error("Analyte '%s' not found", raw_analyte)
         return JsonResponse({
             "status": "error",
             "message": f"Analyte '{raw_analyte}' not found"
         }, status=404)
 
     if not dtl_id:
-        log.error(f"Missing reportoptiondtlid")
+        log.error("Missing reportoptiondtlid")
         return JsonResponse({
             "status": "error",
             "message": "Missing reportoptiondtlid"
@@ -70,7 +70,7 @@ def report_option_dtl_autosave(request, report_option_id):
             analyte_id=analyte_obj
         )
     except ReportOptionDtl.DoesNotExist:
-        log.error(f"Detail row not found")
+        log.error("Detail row not found")
         return JsonResponse({
             "status": "error",
             "message": "Detail row not found"
@@ -79,13 +79,13 @@ def report_option_dtl_autosave(request, report_option_id):
     dtl.analyte_value = analyte_value
     try:
         dtl.save()
-        log.info(f"Report Option Detail ID analyte record saved successfully ---> {dtl_id}")
+        log.info("Report Option Detail ID analyte record saved successfully ---> %s", dtl_id)
         return JsonResponse({"status": "success"})
 
     except ValidationError as ve:
         test_obj = dtl.report_option_id.test_id
         if not test_obj:
-            log.error(f"Test ID not configured for this Report Option")
+            log.error("Test ID not configured for this Report Option")
             return JsonResponse({
                 "status": "error",
                 "message": "Test ID not configured for this Report Option"
@@ -124,7 +124,7 @@ def report_option_dtl_autosave(request, report_option_id):
             expected = "Invalid value."
 
         log.error(
-            f"Validation error: {ve.message_dict} | Expected: {expected} | Current: {analyte_value}"
+            "Validation error: %s | Expected: %s | Current: %s", ve.message_dict, expected, analyte_value
         )
         return JsonResponse({
             "status": "error",
@@ -134,7 +134,7 @@ def report_option_dtl_autosave(request, report_option_id):
         }, status=400)
 
     except Exception as e:
-        log.error(f"Error Message : {str(e)}")
+        log.error("Error Message : %s", e)
         return JsonResponse({
             "status": "error",
             "message": str(e)
@@ -143,12 +143,12 @@ def report_option_dtl_autosave(request, report_option_id):
 
 def open_pdf_after_action(request):
     pdf_url = request.session.pop("pdf_report_url", None)
-    log.info(f"pdf_report_url ---> {pdf_url}")
+    log.info("pdf_report_url ---> %s", pdf_url)
     return JsonResponse({"pdf_url": pdf_url})
 
 
 def get_amendment_types(request):
-    log.info(f"Getting the configuration refvalues and referencetype")
+    log.info("Getting the configuration refvalues and referencetype")
     RefValues = apps.get_model('configuration', 'RefValues')
     ReferenceType = apps.get_model('configuration', 'ReferenceType')
 
@@ -158,20 +158,20 @@ def get_amendment_types(request):
                                                                                                              'display_value')
         return JsonResponse({"amendment_types": list(amendment_types)})
     except ReferenceType.DoesNotExist:
-        log.error(f"Amendment Types does not exist")
+        log.error("Amendment Types does not exist")
         return JsonResponse({"amendment_types": []})
 
 
 @csrf_exempt
 def amend_report_action(request):
-    log.info(f"request.method ---> {request.method}")
+    log.info("request.method ---> %s", request.method)
     if request.method == "POST":
         try:
             data = json.loads(request.body)
             selected_ids = data.get("selected_ids", [])
             amendment_type = data.get("amendment_type", "")
-            log.info(f"Selected Reportoption Ids ---> {selected_ids}")
-            log.info(f"Selected amendment_type ---> {amendment_type}")
+            log.info("Selected Reportoption Ids ---> %s", selected_ids)
+            log.info("Selected amendment_type ---> %s", amendment_type)
 
             # Get the model dynamically if not directly imported
             HistoricalReportOption = apps.get_model('analysis', 'HistoricalReportOption')
@@ -181,13 +181,13 @@ def amend_report_action(request):
                 pending_action=amendment_type
             )
 
-            log.info(f"Successfully updated ---> {selected_ids}")
+            log.info("Successfully updated ---> %s", selected_ids)
             return JsonResponse({"status": "success", "updated": updated})
         except Exception as e:
-            log.error(f"Error Message : {str(e)}")
+            log.error("Error Message : %s", e)
             return JsonResponse({"status": "error", "error": str(e)})
 
-    log.error(f"Error Message : Invalid method")
+    log.error("Error Message : Invalid method")
     return JsonResponse({"status": "error", "error": "Invalid method"})
 
 
@@ -197,10 +197,10 @@ def preview_report_view(request):
         return redirect(f"/gulfcoastpathologists/login/?{params}")
 
     report_option_id = request.GET.get("reportoption_id")
-    log.info(f"Preview report for ID ---> {report_option_id}")
+    log.info("Preview report for ID ---> %s", report_option_id)
 
     if not report_option_id:
-        log.error(f"Reportoption Id is invalid ---> {report_option_id}")
+        log.error("Reportoption Id is invalid ---> %s", report_option_id)
         return
 
     input_path = os.path.join(settings.BASE_DIR, 'static', 'reports', 'TestReport.jasper')
@@ -220,9 +220,9 @@ def preview_report_view(request):
         is_preview=True
     )
 
-    log.info(f"PDF relative path returned from generate_report ---> {pdf_rel_path}")
+    log.info("PDF relative path returned from generate_report ---> %s", pdf_rel_path)
     pdf_url = UtilClass.get_s3_url(pdf_rel_path)
-    log.info(f"PDF S3 URL path for report ---> {pdf_url}")
+    log.info("PDF S3 URL path for report ---> %s", pdf_url)
     request.current_app = "controllerapp"
     context = controller.each_context(request)
     context.update({
@@ -241,10 +241,10 @@ def merge_preview_report_view(request):
         return redirect(f"/gulfcoastpathologists/login/?{params}")
 
     merge_reporting_id = request.GET.get("merge_reporting_id")
-    log.info(f"Preview report for ID ---> {merge_reporting_id}")
+    log.info("Preview report for ID ---> %s", merge_reporting_id)
 
     if not merge_reporting_id:
-        log.error(f"Merge Reportoption Id is invalid ---> {merge_reporting_id}")
+        log.error("Merge Reportoption Id is invalid ---> %s", merge_reporting_id)
         return
 
     # Fetching the accession object and accession_category.
@@ -253,7 +253,7 @@ def merge_preview_report_view(request):
         accession = merge_reporting.accession_id
         accession_category = accession.accession_category
     except (MergeReporting.DoesNotExist, AttributeError) as e:
-        log.error(f"Could not retrieve accession or accession_category: {e}")
+        log.error("Could not retrieve accession or accession_category: %s", e)
         return
 
     # Deciding the report template based on accession_category.
@@ -279,9 +279,9 @@ def merge_preview_report_view(request):
         use_db=True,
         is_preview=True
     )
-    log.info(f"PDF relative path returned from generate_report ---> {pdf_rel_path}")
+    log.info("PDF relative path returned from generate_report ---> %s", pdf_rel_path)
     pdf_url = UtilClass.get_s3_url(pdf_rel_path)
-    log.info(f"PDF S3 URL path for report ---> {pdf_url}")
+    log.info("PDF S3 URL path for report ---> %s", pdf_url)
     request.current_app = "controllerapp"
     context = controller.each_context(request)
     context.update({
@@ -302,10 +302,10 @@ def merge_preview_report_view_for_amendment(request):
         return redirect(f"/gulfcoastpathologists/login/?{params}")
 
     merge_reporting_id = request.GET.get("merge_reporting_id")
-    log.info(f"Preview Amendment report for ID ---> {merge_reporting_id}")
+    log.info("Preview Amendment report for ID ---> %s", merge_reporting_id)
 
     if not merge_reporting_id:
-        log.error(f"Merge Reportoption Id is invalid ---> {merge_reporting_id}")
+        log.error("Merge Reportoption Id is invalid ---> %s", merge_reporting_id)
         return
 
     # Fetching the accession object and accession_category.
@@ -314,7 +314,7 @@ def merge_preview_report_view_for_amendment(request):
         accession = merge_reporting.accession_id
         accession_category = accession.accession_category
     except (MergeReporting.DoesNotExist, AttributeError) as e:
-        log.error(f"Could not retrieve accession or accession_category: {e}")
+        log.error("Could not retrieve accession or accession_category: %s", e)
         return
 
     # Deciding the report template based on accession_category.
@@ -340,9 +340,9 @@ def merge_preview_report_view_for_amendment(request):
         use_db=True,
         is_preview=True
     )
-    log.info(f"PDF relative path returned from generate_report ---> {pdf_rel_path}")
+    log.info("PDF relative path returned from generate_report ---> %s", pdf_rel_path)
     pdf_url = UtilClass.get_s3_url(pdf_rel_path)
-    log.info(f"PDF S3 URL path for report ---> {pdf_url}")
+    log.info("PDF S3 URL path for report ---> %s", pdf_url)
     request.current_app = "controllerapp"
     context = controller.each_context(request)
     context.update({
@@ -362,14 +362,14 @@ def report_signout_view(request):
 
     reportoption_id = request.GET.get("reportoption_id")
     is_signout_complete = request.GET.get("is_signout_complete")
-    log.info(f"Report signout for ID ---> {reportoption_id}")
-    log.info(f"Is signout complete? ---> {is_signout_complete}")
+    log.info("Report signout for ID ---> %s", reportoption_id)
+    log.info("Is signout complete? ---> %s", is_signout_complete)
 
     if "Y" == is_signout_complete and reportoption_id:
         return redirect(f"/gulfcoastpathologists/analysis/historicalreportoption/{reportoption_id}/change/")
     report_option = ReportOption.objects.get(report_option_id=reportoption_id)
     pdf_url = GenericAction().report_signout_method(request, reportoption_id)
-    log.info(f"PDF URL path for report ---> {pdf_url}")
+    log.info("PDF URL path for report ---> %s", pdf_url)
     request.current_app = "controllerapp"
     context = controller.each_context(request)
     context.update({
@@ -390,8 +390,8 @@ def merge_report_signout_view(request):
 
     merge_reporting_id = request.GET.get("merge_reporting_id")
     is_signout_complete = request.GET.get("is_signout_complete")
-    log.info(f"Report signout for ID ---> {merge_reporting_id}")
-    log.info(f"Is signout complete? ---> {is_signout_complete}")
+    log.info("Report signout for ID ---> %s", merge_reporting_id)
+    log.info("Is signout complete? ---> %s", is_signout_complete)
 
     if "Y" == is_signout_complete and merge_reporting_id:
         return redirect(f"/gulfcoastpathologists/analysisworklist/accessionhistoricalreportswrapper/")
@@ -399,7 +399,7 @@ def merge_report_signout_view(request):
     try:
         merge_report = MergeReporting.objects.get(merge_reporting_id=merge_reporting_id)
         pdf_url = GenericAction().merge_report_signout_method(request, merge_reporting_id)
-        log.info(f"PDF URL path for report ---> {pdf_url}")
+        log.info("PDF URL path for report ---> %s", pdf_url)
         request.current_app = "controllerapp"
         context = controller.each_context(request)
         context.update({
@@ -410,7 +410,7 @@ def merge_report_signout_view(request):
         })
         return render(request, "admin/analysis/mergereporting/merge_final_report.html", context)
     except Exception as e:
-        log.error(f"An error occurred: {str(e)}")
+        log.error("An error occurred: %s", e)
         messages.error(request, f"An error occurred: {str(e)}")
         referrer = request.META.get('HTTP_REFERER', '/gulfcoastpathologists/analysisworklist/')
         return redirect(referrer)
@@ -483,15 +483,15 @@ def merge_reporting_dtl_autosave(request, merge_reporting_id):
       - On success → 200 + {"status":"success"}
     """
     if not request.user.is_authenticated:
-        log.error(f"User is not authenticated!")
+        log.error("User is not authenticated!")
         return JsonResponse({'status': 'forbidden'}, status=403)
 
     dtl_id = request.POST.get("merge_reporting_dtl_id")
     raw_analyte = request.POST.get("analyte_id", "").strip()
     analyte_value = request.POST.get("analyte_value", "").strip()
-    log.info(f"merge_reporting_dtl_id ---> {dtl_id}")
-    log.info(f"analyte_id ---> {raw_analyte}")
-    log.info(f"analyte_value ---> {analyte_value}")
+    log.debug("merge_reporting_dtl_id ---> %s", dtl_id)
+    log.debug("analyte_id ---> %s", raw_analyte)
+    log.debug("analyte_value ---> %s", analyte_value)
 
     try:
         if raw_analyte.isdigit():
@@ -499,14 +499,14 @@ def merge_reporting_dtl_autosave(request, merge_reporting_id):
         else:
             analyte_obj = Analyte.objects.get(analyte=raw_analyte)
     except Analyte.DoesNotExist:
-        log.error(f"Analyte '{raw_analyte}' not found")
+        log.error("Analyte '%s' not found", raw_analyte)
         return JsonResponse({
             "status": "error",
             "message": f"Analyte '{raw_analyte}' not found"
         }, status=404)
 
     if not dtl_id:
-        log.error(f"Missing merge_reporting_dtl_id")
+        log.error("Missing merge_reporting_dtl_id")
         return JsonResponse({
             "status": "error",
             "message": "Missing merge_reporting_dtl_id"
@@ -519,7 +519,7 @@ def merge_reporting_dtl_autosave(request, merge_reporting_id):
             analyte_id=analyte_obj
         )
     except MergeReportingDtl.DoesNotExist:
-        log.error(f"Detail row not found")
+        log.error("Detail row not found")
         return JsonResponse({
             "status": "error",
             "message": "Detail row not found"
@@ -528,13 +528,13 @@ def merge_reporting_dtl_autosave(request, merge_reporting_id):
     dtl.analyte_value = analyte_value
     try:
         dtl.save()
-        log.info(f"Merge Report Option Detail ID analyte record saved successfully ---> {dtl_id}")
+        log.info("Merge Report Option Detail ID analyte record saved successfully ---> %s", dtl_id)
         return JsonResponse({"status": "success"})
 
     except ValidationError as ve:
         test_obj = dtl.report_option_id.test_id
         if not test_obj:
-            log.error(f"Test ID not configured for this Merge Report Option")
+            log.error("Test ID not configured for this Merge Report Option")
             return JsonResponse({
                 "status": "error",
                 "message": "Test ID not configured for this Merge Report Option"
@@ -573,7 +573,7 @@ def merge_reporting_dtl_autosave(request, merge_reporting_id):
             expected = "Invalid value."
 
         log.error(
-            f"Validation error: {ve.message_dict} | Expected: {expected} | Current: {analyte_value}"
+            "Validation error: %s | Expected: %s | Current: %s", ve.message_dict, expected, analyte_value
         )
         return JsonResponse({
             "status": "error",
@@ -583,7 +583,7 @@ def merge_reporting_dtl_autosave(request, merge_reporting_id):
         }, status=400)
 
     except Exception as e:
-        log.error(f"Error Message : {str(e)}")
+        log.error("Error Message : %s", e)
         return JsonResponse({
             "status": "error",
             "message": str(e)
@@ -594,8 +594,8 @@ def merge_reporting_dtl_autosave(request, merge_reporting_id):
 def fetch_analyte_value(request):
     ta_id = request.POST.get('ta_id')
     report_option_id = request.POST.get('reportoption_id')
-    log.info(f"Test Analyte ID ---> {ta_id}")
-    log.info(f"report_option_id ---> {report_option_id}")
+    log.info("Test Analyte ID ---> %s", ta_id)
+    log.info("report_option_id ---> %s", report_option_id)
 
     # Extract all analyte values sent from frontend
     analyte_values = {
@@ -607,7 +607,7 @@ def fetch_analyte_value(request):
     try:
         ta = TestAnalyte.objects.get(pk=ta_id)
     except TestAnalyte.DoesNotExist:
-        log.error(f"TestAnalyte does not exist.")
+        log.error("TestAnalyte does not exist.")
         return JsonResponse({'value': ''})
 
     raw_sql = ta.dropdown_sql or ''
@@ -677,7 +677,7 @@ def get_macros(request):
 
         return JsonResponse({"macros": list(macros)})
     except Exception as e:
-        log.error(f"Error while fetching Macros")
+        log.error("Error while fetching Macros")
         return JsonResponse({"macros": []})
 
 def get_macro_content(request):
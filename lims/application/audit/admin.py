@@ -1,7 +1,12 @@
+from datetime import timedelta
+
 from auditlog.admin import LogEntryAdmin
 from auditlog.filters import ResourceTypeFilter
 from auditlog.models import LogEntry
+from django.conf import settings
 from django.contrib import admin
+from django.http import HttpResponseRedirect
+from django.utils import timezone
 from rangefilter.filters import DateRangeFilter
 
 from audit.mixins import ArchivedAuditLogMixin
@@ -13,7 +18,25 @@ class CustomDateRangeFilter(DateRangeFilter):
     template = 'admin/audit/custom_date_range_filter.html'
 
 
-class CustomLogEntryAdmin(LogEntryAdmin):
+class AuditDateRangeMixin:
+    """
+    Audit tables only grow, so the change list always works on a timestamp range.
+    Without a selected range it opens on the last AUDIT_ADMIN_DEFAULT_DAYS days and the
+    full-table count is skipped.
+    """
+    show_full_result_count = False
+    date_range_param = 'timestamp__range__gte'
+
+    def changelist_view(self, request, extra_context=None):
+        if not any(param.startswith('timestamp__range__') for param in request.GET):
+            params = request.GET.copy()
+            start = timezone.localdate() - timedelta(days=getattr(settings, 'AUDIT_ADMIN_DEFAULT_DAYS', 30))
+            params[self.date_range_param] = start.isoformat()
+            return HttpResponseRedirect(f"{request.path}?{params.urlencode()}")
+        return super().changelist_view(request, extra_context=extra_context)
+
+
+class CustomLogEntryAdmin(AuditDateRangeMixin, LogEntryAdmin):
     search_fields = []
     list_filter = ['object_id', ResourceTypeFilter, 'action', ('timestamp', CustomDateRangeFilter)]
     change_form_template = 'admin/audit/audit_change_form.html'
@@ -36,7 +59,7 @@ class CustomLogEntryAdmin(LogEntryAdmin):
         return actions
 
 
-class ArchivedAuditLogAdmin(admin.ModelAdmin, ArchivedAuditLogMixin):
+class ArchivedAuditLogAdmin(AuditDateRangeMixin, admin.ModelAdmin, ArchivedAuditLogMixin):
     search_fields = []
     list_display = ["created", "resource_url", "action", "msg_short", "user_url"]
     list_filter = ['object_id', ResourceTypeFilter, 'action', ('timestamp', CustomDateRangeFilter)]
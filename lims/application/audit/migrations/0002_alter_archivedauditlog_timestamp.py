@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedauditlog',
+            name='timestamp',
+            field=models.DateTimeField(db_index=True, verbose_name='timestamp'),
+        ),
+    ]
@@ -1,6 +1,9 @@
+import threading
+from functools import partial
+
 from auditlog.models import LogEntryManager, LogEntry
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from django.db.models.signals import pre_delete, post_save
 from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
@@ -48,8 +51,9 @@ class ArchivedAuditLog(models.Model):
     remote_addr = models.GenericIPAddressField(
         blank=True, null=True, verbose_name=_("remote address")
     )
+    # Time of the original LogEntry, copied when the row is archived
     timestamp = models.DateTimeField(
-        db_index=True, auto_now_add=True, verbose_name=_("timestamp")
+        db_index=True, verbose_name=_("timestamp")
     )
 
     objects = LogEntryManager()
@@ -61,6 +65,43 @@ class ArchivedAuditLog(models.Model):
         verbose_name_plural = _("Archived data log entries")
 
 
+_archive_buffer = threading.local()
+
+
+def flush_archived_audit_logs(savepoint_key):
+    rows = getattr(_archive_buffer, "rows", {}).pop(savepoint_key, [])
+    if rows:
+        ArchivedAuditLog.objects.bulk_create(rows, batch_size=getattr(settings, 'AUDIT_ARCHIVE_BATCH_SIZE', 1000))
+
+
+def buffer_archived_audit_log(archived_log):
+    """
+    Archive rows are collected for the running transaction and written with one bulk_create per savepoint
+    when it commits, instead of one insert per audit event inside the user's transaction.
+    Rows are buffered under the savepoints open when they were added, with one on_commit flush per savepoint
+    level; rolling a savepoint back discards its flush, and with it the rows added inside it.
+    Outside of a transaction the row is written straight away.
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        archived_log.save()
+        return
+
+    savepoint_key = tuple(connection.savepoint_ids)
+    buffered = getattr(_archive_buffer, "rows", {})
+    if savepoint_key not in buffered or not any(
+            isinstance(func, partial) and func.func is flush_archived_audit_logs and func.args == (savepoint_key,)
+            for _, func, *_ in connection.run_on_commit):
+        # Rows of rolled back transactions and savepoints have lost their flush and are dropped here
+        pending_keys = {func.args[0] for _, func, *_ in connection.run_on_commit
+                        if isinstance(func, partial) and func.func is flush_archived_audit_logs}
+        buffered = {key: rows for key, rows in buffered.items() if key in pending_keys}
+        buffered[savepoint_key] = []
+        _archive_buffer.rows = buffered
+        transaction.on_commit(partial(flush_archived_audit_logs, savepoint_key))
+    buffered[savepoint_key].append(archived_log)
+
+
 @receiver(post_save, sender=LogEntry, dispatch_uid='save_logentry_signal')
 @receiver(pre_delete, sender=LogEntry, dispatch_uid='delete_logentry_signal')
 def archive_audit_logs(sender, instance, **kwargs):
@@ -76,4 +117,4 @@ def archive_audit_logs(sender, instance, **kwargs):
         archived_log.changes = instance.changes
         archived_log.content_type_id = instance.content_type_id
         archived_log.audit_sequence = instance.id
-        archived_log.save()
+        buffer_archived_audit_log(archived_log)
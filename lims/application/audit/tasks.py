@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from audit.util import AuditUtilClass
+
+
+@shared_task
+def rollover_audit_logs():
+    # Scheduled from django_celery_beat periodic tasks
+    return AuditUtilClass.rollover_audit_logs()
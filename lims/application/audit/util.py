@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from auditlog.models import LogEntry
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from audit.models import ArchivedAuditLog
+from logutil.log import log
+
+
+class AuditUtilClass:
+
+    @staticmethod
+    def rollover_audit_logs():
+        """
+        Moves LogEntry rows older than AUDIT_LOG_RETENTION_DAYS into ArchivedAuditLog, keeping their timestamp,
+        and purges archived rows whose timestamp is older than AUDIT_ARCHIVE_RETENTION_DAYS. Works in batches so each transaction stays small;
+        the move relies on archive_audit_logs, which copies every deleted LogEntry with one bulk_create per batch.
+        """
+        batch_size = getattr(settings, 'AUDIT_ARCHIVE_BATCH_SIZE', 1000)
+        moved = 0
+        purged = 0
+
+        log_retention_days = getattr(settings, 'AUDIT_LOG_RETENTION_DAYS', None)
+        if log_retention_days:
+            cutoff = timezone.now() - timedelta(days=log_retention_days)
+            while True:
+                with transaction.atomic():
+                    ids = list(LogEntry.objects.filter(timestamp__lt=cutoff)
+                               .order_by('timestamp').values_list('id', flat=True)[:batch_size])
+                    if not ids:
+                        break
+                    LogEntry.objects.filter(id__in=ids).delete()
+                moved += len(ids)
+
+        archive_retention_days = getattr(settings, 'AUDIT_ARCHIVE_RETENTION_DAYS', None)
+        if archive_retention_days:
+            cutoff = timezone.now() - timedelta(days=archive_retention_days)
+            while True:
+                ids = list(ArchivedAuditLog.objects.filter(timestamp__lt=cutoff)
+                           .order_by('timestamp').values_list('id', flat=True)[:batch_size])
+                if not ids:
+                    break
+                ArchivedAuditLog.objects.filter(id__in=ids).delete()
+                purged += len(ids)
+
+        log.info(f"Audit log rollover moved {moved} entries to archive and purged {purged} archived entries")
+        return {"moved": moved, "purged": purged}
@@ -0,0 +1,227 @@
+import random
+
+from auditlog.context import disable_auditlog
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accessioning.models import Accession
+from analysis.models import ReportOption, ReportOptionDtl, MergeReporting, MergeReportingDtl, ReportSignOut
+from ihcworkflow.models import IhcWorkflow
+from process.models import SampleType, ContainerType
+from reporting.models import LabelMethod
+from routinginfo.models import RoutingInfo
+from sample.models import Sample, SampleTestMap
+from security.models import Site, Department, JobType, User
+from tests.models import Test, Analyte, TestAnalyte, TestWorkflowStep, TestWorkflowStepActionMap
+from util.models import SequenceGen
+from workflows.models import Workflow, WorkflowStep
+
+
+class SyntheticDataset:
+    """
+    Keys of everything the generator created, handed to the benchmark scenarios.
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.user = None
+        self.department = None
+        self.jobtype = None
+        self.workflow = None
+        self.steps = []
+        self.tests = []
+        self.analytes = []
+        self.sample_type = None
+        self.container_type = None
+        self.label_method = None
+        self.accession_ids = []
+        self.sample_ids = []
+        self.slide_ids = []
+        self.report_option_ids = []
+
+
+class SyntheticDataGenerator:
+    """
+    Deterministic synthetic lab data for benchmarks: site, department, job type, a WetLab workflow,
+    tests with analytes, and N accessions x M samples with IHC slides and report options.
+    Every key carries the BM<seed> prefix so a dataset can be regenerated or removed on its own.
+    Rows are written with bulk_create and without audit logging, so model save() validation is not run.
+    """
+
+    def __init__(self, seed=1, accessions=10, samples_per_accession=3, slides_per_sample=2, tests=3,
+                 analytes_per_test=5, steps=5):
+        self.seed = seed
+        self.accessions = accessions
+        self.samples_per_accession = samples_per_accession
+        self.slides_per_sample = slides_per_sample
+        self.tests = tests
+        self.analytes_per_test = analytes_per_test
+        self.steps = steps
+        self.prefix = f"BM{seed}"
+        self.random = random.Random(seed)
+
+    def generate(self):
+        self.clear()
+        dataset = SyntheticDataset(self.prefix)
+        with disable_auditlog(), transaction.atomic():
+            self._create_master_data(dataset)
+            self._create_accessions(dataset)
+        return dataset
+
+    def clear(self):
+        prefix = self.prefix
+        with disable_auditlog(), transaction.atomic():
+            sample_filter = {"sample_id__startswith": f"{prefix}-"}
+            report_options = ReportOption.objects.filter(report_option_id__startswith=f"{prefix}-")
+            merge_reportings = MergeReporting.objects.filter(accession_id__accession_id__startswith=f"{prefix}-")
+            ReportSignOut.objects.filter(merge_reporting_id__in=merge_reportings).delete()
+            MergeReportingDtl.objects.filter(merge_reporting_id__in=merge_reportings).delete()
+            merge_reportings.delete()
+            RoutingInfo.objects.filter(report_option_id__in=report_options).delete()
+            ReportOptionDtl.objects.filter(report_option_id__in=report_options).delete()
+            report_options.delete()
+            RoutingInfo.objects.filter(sample_id__sample_id__startswith=f"{prefix}-").delete()
+            SampleTestMap.objects.filter(sample_id__sample_id__startswith=f"{prefix}-").delete()
+            with connection.cursor() as cursor:
+                cursor.execute(f"DELETE FROM {IhcWorkflow._meta.db_table} WHERE sample_ptr_id LIKE %s", [f"{prefix}-%"])
+            Sample.objects.filter(accession_sample__isnull=False, **sample_filter).delete()
+            Sample.objects.filter(**sample_filter).delete()
+            Accession.objects.filter(accession_id__startswith=f"{prefix}-").delete()
+            SequenceGen.objects.filter(prefix_id__startswith=f"{prefix}-").delete()
+            TestWorkflowStepActionMap.objects.filter(workflow_step_id__workflow_id__workflow_name=f"{prefix}-IHC").delete()
+            TestWorkflowStep.objects.filter(test_id__test_name__startswith=f"{prefix}-").delete()
+            TestAnalyte.objects.filter(test_id__test_name__startswith=f"{prefix}-").delete()
+            Analyte.objects.filter(analyte__startswith=f"{prefix}-").delete()
+            Test.objects.filter(test_name__startswith=f"{prefix}-").delete()
+            WorkflowStep.objects.filter(workflow_id__workflow_name=f"{prefix}-IHC").delete()
+            ContainerType.objects.filter(container_type__startswith=f"{prefix}-").delete()
+            SampleType.objects.filter(sample_type__startswith=f"{prefix}-").delete()
+            Workflow.objects.filter(workflow_name=f"{prefix}-IHC").delete()
+            LabelMethod.objects.filter(label_method_name=f"{prefix}-Label").delete()
+            User.objects.filter(username=f"{prefix.lower()}_bench").delete()
+            JobType.objects.filter(name=f"{prefix}-Histology").delete()
+            Department.objects.filter(name=f"{prefix}-Histology").delete()
+            Site.objects.filter(name=f"{prefix}-Site").delete()
+
+    def _create_master_data(self, dataset):
+        prefix = self.prefix
+        site = Site.objects.create(name=f"{prefix}-Site", abbreviation=prefix)
+        dataset.department = Department.objects.create(name=f"{prefix}-Histology", siteid=site, lab_name=prefix)
+        dataset.jobtype = JobType.objects.create(name=f"{prefix}-Histology", departmentid=dataset.department)
+        dataset.user = User.objects.create_user(username=f"{prefix.lower()}_bench", password=None,
+                                                first_name="Bench", last_name=prefix,
+                                                email=f"{prefix.lower()}@example.com", is_staff=True,
+                                                is_superuser=True)
+        dataset.user.groups.add(dataset.jobtype)
+
+        dataset.sample_type = SampleType.objects.create(sample_type=f"{prefix}-Tissue")
+        dataset.container_type = ContainerType.objects.create(container_type=f"{prefix}-Slide",
+                                                              gen_slide_seq=True)
+        dataset.workflow = Workflow.objects.create(workflow_name=f"{prefix}-IHC", methodology="IHC",
+                                                   created_by=dataset.user)
+        dataset.steps = WorkflowStep.objects.bulk_create([
+            WorkflowStep(workflow_id=dataset.workflow, step_id=f"Step{n}", step_no=n,
+                         department=dataset.department.name, workflow_type="WetLab", backward_movement="Y")
+            for n in range(1, self.steps + 1)
+        ])
+        # Staining is started and completed on the first step, as the HL7 stainer flow does
+        TestWorkflowStepActionMap.objects.bulk_create([
+            TestWorkflowStepActionMap(workflow_step_id=dataset.steps[0], action="StartStaining",
+                                      action_method="start_staining_method", sequence=1),
+            TestWorkflowStepActionMap(workflow_step_id=dataset.steps[0], action="CompleteStaining",
+                                      action_method="complete_staining_method", sequence=2),
+        ])
+
+        dataset.tests = Test.objects.bulk_create([
+            Test(test_name=f"{prefix}-T{n}", version=1, active_flag="Y", created_by=dataset.user)
+            for n in range(1, self.tests + 1)
+        ])
+        dataset.analytes = Analyte.objects.bulk_create([
+            Analyte(analyte=f"{prefix}-A{t}-{n}", created_by=dataset.user)
+            for t in range(1, self.tests + 1) for n in range(1, self.analytes_per_test + 1)
+        ])
+        TestAnalyte.objects.bulk_create([
+            TestAnalyte(test_id=test, analyte_id=dataset.analytes[t * self.analytes_per_test + n],
+                        input_mode="Text", data_type="Text")
+            for t, test in enumerate(dataset.tests) for n in range(self.analytes_per_test)
+        ])
+        TestWorkflowStep.objects.bulk_create([
+            TestWorkflowStep(test_id=test, workflow_id=dataset.workflow, workflow_step_id=step,
+                             sample_type_id=dataset.sample_type, container_type=dataset.container_type,
+                             backward_movement="Y")
+            for test in dataset.tests for step in dataset.steps
+        ])
+
+        dataset.label_method = LabelMethod.objects.create(
+            label_method_name=f"{prefix}-Label", label_method_version_id=1, label_method_desc="Benchmark label",
+            designer_format="benchmark.btw", export_location="", file_format="dd",
+            label_query="SELECT sample_id, part_no, slide_seq FROM sample_sample WHERE sample_id IN (%s)")
+
+    def _create_accessions(self, dataset):
+        prefix = self.prefix
+        now = timezone.now()
+        user = dataset.user
+        first_step = dataset.steps[0].step_id
+
+        accessions = []
+        samples = []
+        slides = []
+        test_maps = []
+        report_options = []
+        report_option_details = []
+        for a in range(1, self.accessions + 1):
+            accession_id = f"{prefix}-{a:05d}"
+            accessions.append(Accession(accession_id=accession_id, created_by=user, status="Initial",
+                                        accession_category="Clinical", created_by_dept=dataset.department))
+            for s in range(1, self.samples_per_accession + 1):
+                part_no = chr(ord("A") + (s - 1) % 26)
+                test = self.random.choice(dataset.tests)
+                sample = Sample(sample_id=f"{accession_id}-S{s:02d}", part_no=part_no,
+                                sample_type=dataset.sample_type, container_type=dataset.container_type,
+                                custodial_department=dataset.department, custodial_user=user,
+                                current_step=first_step, accession_id_id=accession_id, avail_at=now,
+                                accession_generated=True, workflow_id=dataset.workflow, created_by=user,
+                                mod_by=user, sample_status="Initial", block_or_cassette_seq="1")
+                samples.append(sample)
+                test_maps.append(SampleTestMap(sample_id=sample, test_id=test, workflow_id=dataset.workflow,
+                                               test_status="Pending"))
+                for n in range(1, self.slides_per_sample + 1):
+                    slide = Sample(sample_id=f"{accession_id}-{part_no}-1-{n}", part_no=part_no,
+                                   sample_type=dataset.sample_type, container_type=dataset.container_type,
+                                   custodial_department=dataset.department, custodial_user=user,
+                                   current_step=first_step, accession_id_id=accession_id, avail_at=now,
+                                   accession_sample=sample, accession_generated=True, created_by=user,
+                                   mod_by=user, sample_status="Initial", block_or_cassette_seq="1",
+                                   slide_seq=str(n), pending_action="StartStaining",
+                                   sample_kind=IhcWorkflow._meta.model_name)
+                    slides.append(slide)
+                    test_maps.append(SampleTestMap(sample_id=slide, test_id=test, workflow_id=dataset.workflow,
+                                                   test_status="Pending"))
+
+                report_option_id = f"{accession_id}-R{s:02d}"
+                report_options.append(ReportOption(report_option_id=report_option_id, accession_id_id=accession_id,
+                                                   root_sample_id=sample, version_id=1, test_id=test,
+                                                   reporting_status="Pending", methodology="IHC",
+                                                   workflow_id=dataset.workflow, created_by=user, mod_by=user))
+                test_index = dataset.tests.index(test)
+                for n in range(self.analytes_per_test):
+                    analyte = dataset.analytes[test_index * self.analytes_per_test + n]
+                    report_option_details.append(ReportOptionDtl(
+                        report_option_dtl_id=f"{report_option_id}-{n + 1:02d}", report_option_id_id=report_option_id,
+                        version_id=1, analyte_id=analyte, analyte_value=str(self.random.randint(0, 100)),
+                        created_by=user, mod_by=user))
+
+        Accession.objects.bulk_create(accessions)
+        Sample.objects.bulk_create(samples)
+        Sample.objects.bulk_create(slides)
+        with connection.cursor() as cursor:
+            cursor.executemany(f"INSERT INTO {IhcWorkflow._meta.db_table} (sample_ptr_id) VALUES (%s)",
+                               [(slide.sample_id,) for slide in slides])
+        SampleTestMap.objects.bulk_create(test_maps)
+        ReportOption.objects.bulk_create(report_options)
+        ReportOptionDtl.objects.bulk_create(report_option_details)
+
+        dataset.accession_ids = [a.accession_id for a in accessions]
+        dataset.sample_ids = [s.sample_id for s in samples]
+        dataset.slide_ids = [s.sample_id for s in slides]
+        dataset.report_option_ids = [r.report_option_id for r in report_options]
@@ -0,0 +1,97 @@
+import json
+import platform
+import subprocess
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmark.generator import SyntheticDataGenerator
+from benchmark.scenarios import SCENARIOS, run_scenario
+
+
+class Command(BaseCommand):
+    help = ("Generates a deterministic synthetic dataset and runs timed, query-counted benchmark scenarios "
+            "for the core lab flows. Results are written as JSON so runs can be compared across commits.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--accessions', type=int, default=10)
+        parser.add_argument('--samples', type=int, default=3, help="Samples per accession")
+        parser.add_argument('--slides', type=int, default=2, help="IHC slides per sample")
+        parser.add_argument('--tests', type=int, default=3)
+        parser.add_argument('--analytes', type=int, default=5, help="Analytes per test")
+        parser.add_argument('--analytes-sweep', help="Comma separated analyte counts; the dataset is regenerated "
+                                                     "and the scenarios rerun for each, e.g. 5,50,500")
+        parser.add_argument('--steps', type=int, default=5, help="WetLab steps in the workflow")
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--scenario', action='append', dest='scenarios', choices=sorted(SCENARIOS),
+                            help="Scenario to run, can be repeated. Defaults to all.")
+        parser.add_argument('--output', help="Write the JSON result to this file instead of stdout")
+        parser.add_argument('--keep-data', action='store_true', help="Keep the synthetic dataset after the run")
+
+    def handle(self, *args, **options):
+        if not settings.DATABASES['default']['ENGINE'].endswith('postgresql'):
+            raise CommandError("Benchmarks run against PostgreSQL only.")
+
+        if options['analytes_sweep']:
+            analyte_counts = [int(count) for count in options['analytes_sweep'].split(",")]
+        else:
+            analyte_counts = [options['analytes']]
+
+        runs = []
+        for analytes in analyte_counts:
+            generator = SyntheticDataGenerator(seed=options['seed'], accessions=options['accessions'],
+                                               samples_per_accession=options['samples'],
+                                               slides_per_sample=options['slides'], tests=options['tests'],
+                                               analytes_per_test=analytes, steps=options['steps'])
+            start = time.perf_counter()
+            dataset = generator.generate()
+            generate_seconds = time.perf_counter() - start
+
+            try:
+                results = [run_scenario(name, dataset, repeat=options['repeat'])
+                           for name in (options['scenarios'] or SCENARIOS)]
+            finally:
+                if not options['keep_data']:
+                    generator.clear()
+            runs.append({
+                "dataset": {
+                    "seed": options['seed'],
+                    "accessions": len(dataset.accession_ids),
+                    "samples": len(dataset.sample_ids),
+                    "slides": len(dataset.slide_ids),
+                    "report_options": len(dataset.report_option_ids),
+                    "analytes_per_test": analytes,
+                    "generate_seconds": generate_seconds,
+                },
+                "results": results,
+            })
+
+        report = {
+            "commit": self.get_commit(),
+            "build_number": getattr(settings, 'BUILD_NUMBER', None),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        if options['analytes_sweep']:
+            report["sweep"] = runs
+        else:
+            report.update(runs[0])
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+            self.stdout.write(self.style.SUCCESS(f"Benchmark results written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    @staticmethod
+    def get_commit():
+        try:
+            return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True,
+                                           stderr=subprocess.DEVNULL).strip()
+        except Exception:
+            return None
@@ -0,0 +1,199 @@
+import tempfile
+import time
+
+from django.contrib import admin
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.contrib.sessions.backends.signed_cookies import SessionStore
+from django.db import connection, transaction
+from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from accessioning.admin import generate_accession
+from accessioning.models import Accession
+from analysis.models import ReportOption, MergeReporting, MergeReportingDtl
+from analysis.reportbuilder import MergeReportBuilderUtilClass
+from controllerapp.views import controller
+from hl7.listener import HL7Listener
+from reporting.models import LabelMethod
+from sample.admin import execute_routing
+from sample.models import Sample
+from sample.util import SampleUtilClass
+from util.actions import GenericAction
+from util.util import UtilClass, GenerateLabel
+
+
+def build_request(dataset):
+    """
+    POST request for the benchmark user with the session keys the lab flows read.
+    """
+    request = RequestFactory().post("/benchmark/")
+    request.user = dataset.user
+    request.session = SessionStore()
+    request.session['currentjobtype'] = dataset.jobtype.name
+    request.session['currentdepartmentid'] = dataset.department.name
+    request.session['currentsite'] = dataset.department.siteid.name
+    request.session['currenttimezone'] = 'UTC'
+    request._messages = CookieStorage(request)
+    return request
+
+
+def scenario_create_sample(dataset, request):
+    test_id = str(dataset.tests[0].test_id)
+
+    def run():
+        for accession_id in dataset.accession_ids:
+            SampleUtilClass.create_sample(accession_id, dataset.sample_type.sample_type_id,
+                                          dataset.container_type.container_type_id, 1, test_id, request, "Z",
+                                          "false", "N", None, workflow_id=dataset.workflow.workflow_id)
+
+    return run
+
+
+def scenario_generate_accession(dataset, request):
+    Sample.objects.filter(sample_id__in=dataset.sample_ids).update(accession_generated=False)
+    model_admin = admin.ModelAdmin(Accession, controller)
+
+    def run():
+        generate_accession(model_admin, request, Accession.objects.filter(accession_id__in=dataset.accession_ids))
+
+    return run
+
+
+def scenario_execute_routing(dataset, request):
+    model_admin = admin.ModelAdmin(Sample, controller)
+
+    def run():
+        execute_routing(model_admin, request, Sample.objects.filter(sample_id__in=dataset.sample_ids))
+
+    return run
+
+
+def scenario_generic_action_call(dataset, request):
+    def run():
+        GenericAction().generic_action_call(request, Sample.objects.filter(sample_id__in=dataset.slide_ids),
+                                            desired_action="StartStaining", action_desc="Start Staining")
+
+    return run
+
+
+def scenario_completewetlab(dataset, request):
+    Sample.objects.filter(sample_id__in=dataset.slide_ids).update(pending_action=None)
+
+    def run():
+        UtilClass.completewetlab(None, request, Sample.objects.filter(sample_id__in=dataset.slide_ids))
+
+    return run
+
+
+def scenario_generate_report_method(dataset, request):
+    def run():
+        action = GenericAction()
+        for accession_id in dataset.accession_ids:
+            action.generate_report_method(request, ReportOption.objects.filter(accession_id=accession_id))
+
+    return run
+
+
+def scenario_merge_report_signout(dataset, request):
+    action = GenericAction()
+    for accession_id in dataset.accession_ids:
+        action.generate_report_method(request, ReportOption.objects.filter(accession_id=accession_id))
+    merge_reportings = list(MergeReporting.objects.filter(accession_id__in=dataset.accession_ids).values_list(
+        'merge_reporting_id', flat=True))
+    dtl_versions = dict(MergeReportingDtl.objects.filter(merge_reporting_id__in=merge_reportings).values_list(
+        'merge_reporting_id', 'version_id').distinct())
+
+    def run():
+        for merge_reporting_id in merge_reportings:
+            MergeReportBuilderUtilClass.snapshot_signout(merge_reporting_id, dtl_versions[merge_reporting_id], 1,
+                                                         dataset.user.id)
+
+    return run
+
+
+def scenario_print_label(dataset, request):
+    export_location = tempfile.mkdtemp(prefix="benchmark_labels_") + "/"
+    LabelMethod.objects.filter(pk=dataset.label_method.pk).update(export_location=export_location)
+
+    def run():
+        GenerateLabel().print_label(request, list(dataset.slide_ids), model_pk=list(dataset.slide_ids),
+                                    model_app_id="sample/Sample", label_method_id=dataset.label_method.pk,
+                                    communication_type="File Driven", printer="BenchmarkPrinter", count=1)
+
+    return run
+
+
+def scenario_hl7_process_message(dataset, request):
+    Sample.objects.filter(sample_id__in=dataset.slide_ids).update(pending_action="CompleteStaining")
+    listener = HL7Listener("127.0.0.1", 0)
+    messages = [
+        f"MSH|^~\\&|VitroStainer|LAB|LIS|LAB|20260101120000||ORR^O02|BM{n}|P|2.5.1\r"
+        f"MSA|AA|BM{n}\rORC|OK|{slide_id}\rOBR|1|{slide_id}||IHC\r"
+        for n, slide_id in enumerate(dataset.slide_ids)
+    ]
+
+    def run():
+        for hl7_text in messages:
+            listener.process_message(hl7_text)
+
+    return run
+
+
+SCENARIOS = {
+    "create_sample": scenario_create_sample,
+    "generate_accession": scenario_generate_accession,
+    "execute_routing": scenario_execute_routing,
+    "generic_action_call": scenario_generic_action_call,
+    "completewetlab": scenario_completewetlab,
+    "generate_report_method": scenario_generate_report_method,
+    "merge_report_signout": scenario_merge_report_signout,
+    "print_label": scenario_print_label,
+    "hl7_process_message": scenario_hl7_process_message,
+}
+
+
+def run_scenario(name, dataset, repeat=1):
+    """
+    Runs one scenario `repeat` times, each time inside a transaction that is rolled back,
+    so every run starts from the generated dataset. Setup done by the scenario factory is not timed.
+    cpu_seconds is the process time of the run, i.e. the Python-side cost without database wait.
+    Work the flows hand to background threads runs on other connections and is not measured.
+    """
+    timings = []
+    cpu_timings = []
+    query_counts = []
+    error = None
+    for _ in range(repeat):
+        try:
+            with transaction.atomic():
+                request = build_request(dataset)
+                run = SCENARIOS[name](dataset, request)
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    cpu_start = time.process_time()
+                    run()
+                    cpu_elapsed = time.process_time() - cpu_start
+                    elapsed = time.perf_counter() - start
+                timings.append(elapsed)
+                cpu_timings.append(cpu_elapsed)
+                query_counts.append(len(queries))
+                transaction.set_rollback(True)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            break
+
+    result = {
+        "scenario": name,
+        "runs": len(timings),
+        "seconds": timings,
+        "cpu_seconds": cpu_timings,
+        "queries": query_counts,
+    }
+    if timings:
+        result["min_seconds"] = min(timings)
+        result["mean_seconds"] = sum(timings) / len(timings)
+        result["mean_cpu_seconds"] = sum(cpu_timings) / len(cpu_timings)
+        result["max_queries"] = max(query_counts)
+    if error:
+        result["error"] = error
+    return result
@@ -1,6 +1,10 @@
+import importlib
+
 from auditlog.models import AuditlogHistoryField
 from auditlog.registry import auditlog
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 
 import security
@@ -44,3 +48,29 @@ class RefValues(models.Model):
 
 auditlog.register(ReferenceType)
 auditlog.register(RefValues)
+
+
+@receiver(post_save, sender=RefValues, dispatch_uid='refvalues_save_module_images_signal')
+@receiver(post_delete, sender=RefValues, dispatch_uid='refvalues_delete_module_images_signal')
+@receiver(post_save, sender=ReferenceType, dispatch_uid='referencetype_save_module_images_signal')
+@receiver(post_delete, sender=ReferenceType, dispatch_uid='referencetype_delete_module_images_signal')
+def invalidate_module_images(sender, instance, **kwargs):
+    module = importlib.import_module("controllerapp.shellcontext")
+    transaction.on_commit(module.ShellContextUtilClass.invalidate_module_images)
+
+
+@receiver(post_save, sender=RefValues, dispatch_uid='refvalues_save_refvalue_choices_signal')
+@receiver(post_delete, sender=RefValues, dispatch_uid='refvalues_delete_refvalue_choices_signal')
+@receiver(post_save, sender=ReferenceType, dispatch_uid='referencetype_save_refvalue_choices_signal')
+@receiver(post_delete, sender=ReferenceType, dispatch_uid='referencetype_delete_refvalue_choices_signal')
+def invalidate_refvalue_choices(sender, instance, **kwargs):
+    module = importlib.import_module("util.choices")
+    transaction.on_commit(module.ChoiceUtilClass.invalidate_refvalue_choices)
+
+
+@receiver(post_save, sender=ReferenceType, dispatch_uid='referencetype_save_field_spec_signal')
+@receiver(post_delete, sender=ReferenceType, dispatch_uid='referencetype_delete_field_spec_signal')
+def invalidate_analyte_field_specs(sender, instance, **kwargs):
+    # Analyte field specs refer to their dropdown reference type by name
+    module = importlib.import_module("analysis.fieldspec")
+    transaction.on_commit(module.AnalyteFieldSpecUtilClass.invalidate)
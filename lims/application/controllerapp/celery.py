@@ -5,7 +5,7 @@ import os
 from logging.handlers import RotatingFileHandler
 
 from celery import Celery
-from celery.signals import after_setup_logger
+from celery.signals import after_setup_logger, worker_init
 from django.conf import settings
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'controllerapp.settings')
@@ -37,3 +37,13 @@ def setup_logging(**kwargs):
 
 
 after_setup_logger.connect(setup_logging)
+
+
+def preload_worker(**kwargs):
+    # Runs in the parent before the prefork pool starts, so every pool process starts warm
+    if getattr(settings, 'WORKER_PRELOAD_ENABLED', False):
+        from controllerapp.warmup import preload_worker_stacks
+        preload_worker_stacks()
+
+
+worker_init.connect(preload_worker)
@@ -16,6 +16,12 @@ from pathlib import Path
 
 import environ
 
+# Opt-in: record module import time from here on so startup cost is reported per app (logutil)
+if os.getenv("DJANGO_REPORT_IMPORT_TIME", "False").lower() in ("1", "true", "yes"):
+    from logutil.importtime import install as install_import_time_recorder
+
+    install_import_time_recorder()
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -75,7 +81,8 @@ INSTALLED_APPS = [
     'tpcm',
     'restapi',
     'channels',
-    'scanner'
+    'scanner',
+    'benchmark'
 ]
 
 MIDDLEWARE = [
@@ -90,6 +97,7 @@ MIDDLEWARE = [
     'auditlog.middleware.AuditlogMiddleware',
     'security.middleware.TimezoneMiddleware',
     'logutil.middleware.ResetThreadSeqMiddleware',
+    'logutil.middleware.CallTracingMiddleware',
 ]
 
 ROOT_URLCONF = 'controllerapp.urls'
@@ -149,6 +157,23 @@ CHANNEL_LAYERS = {
 
 
 CACHE_TIMEOUT = 300  # 5 minutes
+# Scanner jobs are kept in the cache so every worker sees the same state
+SCANNER_JOB_TIMEOUT = 1800  # 30 minutes
+# Compiled accession template plans, keyed by template content version
+ACCESSION_PLAN_CACHE_TIMEOUT = 86400  # 1 day
+# Backward movement eligibility shared by the popup validation, prompt and submit of one selection
+BACKWARD_MOVEMENT_CACHE_TIMEOUT = 300  # 5 minutes
+# Admin shell (app list, top menu) per role, job type and build; dropped on permission changes
+SHELL_CONTEXT_CACHE_TIMEOUT = 3600  # 1 hour
+# Small choice masters (sample types, prefixes, timezones, reference values); dropped when rows change
+STATIC_CHOICES_CACHE_TIMEOUT = 86400  # 1 day
+# Rows per page returned by the remote choice lookups (clients, patients, templates)
+REMOTE_CHOICE_PAGE_SIZE = 25
+# Compiled analyte field specs of the report detail forms, per test; dropped on TestAnalyte changes
+ANALYTE_FIELD_SPEC_CACHE_TIMEOUT = 86400  # 1 day
+# Per-user routing outcomes linked from the routing messages; rows per page of the results view
+ROUTING_RESULT_CACHE_TIMEOUT = 3600  # 1 hour
+ROUTING_RESULT_PAGE_SIZE = 50
 
 # Use cache-backed sessions
 SESSION_ENGINE = "django.contrib.sessions.backends.cache"
@@ -183,6 +208,8 @@ LOG_APP_SQL_DIR = os.path.join(BASE_DIR, 'log/app/sql')
 os.makedirs(LOG_APP_DIR, exist_ok=True)
 os.makedirs(LOG_APP_ERROR_DIR, exist_ok=True)
 os.makedirs(LOG_APP_SQL_DIR, exist_ok=True)
+os.makedirs(os.path.join(BASE_DIR, 'log/info'), exist_ok=True)
+os.makedirs(os.path.join(BASE_DIR, 'log/error'), exist_ok=True)
 
 # Per-node log filename using hostname
 hostname = socket.gethostname()
@@ -190,6 +217,20 @@ APP_LOG_FILE = f"gulflims_{hostname}_app.log"
 APP_ERROR_LOG_FILE = f"gulflims_{hostname}_error.log"
 APP_SQL_LOG_FILE = f"gulflims_{hostname}_sql.log"
 
+# Loggers write through a queue drained by one writer thread (logutil.queuelogging), so file I/O never
+# blocks a request, task or HL7 ACK; records beyond LOG_QUEUE_MAXSIZE waiting records are dropped and counted
+LOGGING_CONFIG = "logutil.queuelogging.configure_logging"
+LOG_QUEUE_ENABLED = os.getenv("DJANGO_LOG_QUEUE_ENABLED", "True").lower() in ("1", "true", "yes")
+LOG_QUEUE_MAXSIZE = 10000
+
+# Records allowed per call site and window before repeats are suppressed (ERROR and above always pass)
+LOG_RATE_LIMIT_COUNT = 20
+LOG_RATE_LIMIT_SECONDS = 60
+
+# "text" or "json" (one JSON object per line) for the log files
+LOG_FORMAT = os.getenv("DJANGO_LOG_FORMAT", "text").lower()
+LOG_FILE_FORMATTER = "json" if LOG_FORMAT == "json" else "verbose"
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -201,6 +242,12 @@ LOGGING = {
         "require_debug_true": {
             "()": "django.utils.log.RequireDebugTrue",
         },
+        "rate_limit": {
+            "()": "logutil.filters.RateLimitFilter",
+            "count": LOG_RATE_LIMIT_COUNT,
+            "seconds": LOG_RATE_LIMIT_SECONDS,
+            "exclude": ("django.db.backends",),
+        },
     },
 
     "formatters": {
@@ -210,13 +257,17 @@ LOGGING = {
             "style": "{",
             "datefmt": "%d-%b-%Y %H:%M:%S,%f",
         },
+        "json": {
+            "()": "logutil.formatter.JsonFormatter",
+            "datefmt": "%Y-%m-%dT%H:%M:%S.%f",
+        },
     },
 
     "handlers": {
         "console": {
             "class": "logging.StreamHandler",
             "formatter": "verbose",
-            "filters": ["thread_seq_filter"],
+            "filters": ["thread_seq_filter", "rate_limit"],
             "stream": "ext://sys.stdout",
         },
 
@@ -226,8 +277,8 @@ LOGGING = {
             "filename": os.path.join(LOG_APP_DIR, APP_LOG_FILE),  # Per-node log file
             "maxBytes": 100 * 1024 * 1024,  # 100 MB
             "backupCount": 10,
-            "formatter": "verbose",
-            "filters": ["thread_seq_filter"],
+            "formatter": LOG_FILE_FORMATTER,
+            "filters": ["thread_seq_filter", "rate_limit"],
             "encoding": "utf-8",
             "delay": True,
         },
@@ -238,8 +289,8 @@ LOGGING = {
             "filename": os.path.join(LOG_APP_ERROR_DIR, APP_ERROR_LOG_FILE),
             "maxBytes": 100 * 1024 * 1024,
             "backupCount": 10,
-            "formatter": "verbose",
-            "filters": ["thread_seq_filter"],
+            "formatter": LOG_FILE_FORMATTER,
+            "filters": ["thread_seq_filter", "rate_limit"],
             "encoding": "utf-8",
             "delay": True,
         },
@@ -250,8 +301,8 @@ LOGGING = {
             "filename": os.path.join(LOG_APP_SQL_DIR, APP_SQL_LOG_FILE),
             "maxBytes": 100 * 1024 * 1024,
             "backupCount": 10,
-            "formatter": "verbose",
-            "filters": ["thread_seq_filter"],
+            "formatter": LOG_FILE_FORMATTER,
+            "filters": ["thread_seq_filter", "rate_limit"],
             "encoding": "utf-8",
             "delay": True,
         },
@@ -262,8 +313,8 @@ LOGGING = {
             "filename": os.path.join(BASE_DIR, "log/info/info.log"),
             "maxBytes": 1024 * 1024 * 300,
             "backupCount": 5,
-            "formatter": "verbose",
-            "filters": ["thread_seq_filter"],
+            "formatter": LOG_FILE_FORMATTER,
+            "filters": ["thread_seq_filter", "rate_limit"],
             "encoding": "utf-8",
             "delay": True,
         },
@@ -273,8 +324,8 @@ LOGGING = {
             "filename": os.path.join(BASE_DIR, "log/error/error.log"),
             "maxBytes": 1024 * 1024 * 300,
             "backupCount": 5,
-            "formatter": "verbose",
-            "filters": ["thread_seq_filter"],
+            "formatter": LOG_FILE_FORMATTER,
+            "filters": ["thread_seq_filter", "rate_limit"],
             "encoding": "utf-8",
             "delay": True,
         }
@@ -307,17 +358,27 @@ LOGGING = {
 # === CUSTOMLOGGER CONFIG ===
 APPLICATION_NAME = "application"
 
-# Master switch — set to False to disable all customlogger wrapping
-CUSTOMLOGGER_ENABLED = True
+# Master switch for call tracing — off by default; when off no tracing code runs at all
+CUSTOMLOGGER_ENABLED = os.getenv("DJANGO_CUSTOMLOGGER_ENABLED", "False").lower() in ("1", "true", "yes")
+
+# Modules traced on every request/task (comma separated, '*' for all project apps); also switchable at
+# runtime with `manage.py trace_calls`, or per request by staff users through the header/cookie below
+CUSTOMLOGGER_TRACE_MODULES = [m.strip() for m in os.getenv("DJANGO_CUSTOMLOGGER_TRACE_MODULES", "").split(",")
+                              if m.strip()]
+CUSTOMLOGGER_TRACE_HEADER = "X-Trace-Modules"
+CUSTOMLOGGER_TRACE_COOKIE = "trace_modules"
+
+# Seconds a worker reuses the runtime trace modules before re-reading them from the cache
+CUSTOMLOGGER_RUNTIME_REFRESH_SECONDS = 10
 
-# Sampling — 1.0 = log every wrapped call, 0.1 = ~10% of calls
+# Sampling — 1.0 = trace every request/task, 0.1 = ~10% of them
 CUSTOMLOGGER_SAMPLE_RATE = float(os.getenv("DJANGO_CUSTOMLOGGER_SAMPLE_RATE", 1.0))
 
 # Log level: INFO by default (for both dev + prod), override via env
 # Allowed values: "DEBUG" or "INFO"
 CUSTOMLOGGER_LOG_LEVEL = os.getenv("DJANGO_CUSTOMLOGGER_LOG_LEVEL", "INFO").upper()
 
-# Modules/prefixes to exclude from auto-wrapping
+# Modules/prefixes never traced
 CUSTOMLOGGER_EXCLUDE_MODULES = [
     'django.',
     'django.contrib.',
@@ -334,11 +395,9 @@ CUSTOMLOGGER_EXCLUDE_MODULES = [
     'django_summernote.',
 ]
 
-CUSTOMLOGGER_IMPORT_MODULES = [
-    "accessioning.ajax.ajax",
-    "analysis.views",
-    # other modules that are lazily imported
-]
+# Opt-in warm start: preload the URLconf and report/plot/S3 stacks in the gunicorn master (gunicorn.conf.py)
+# and the Celery parent before forking, see controllerapp.warmup
+WORKER_PRELOAD_ENABLED = os.getenv("DJANGO_WORKER_PRELOAD", "False").lower() in ("1", "true", "yes")
 
 # Optional: detect environment
 ENV = os.getenv("DJANGO_ENV", "development")  # "development" or "production"
@@ -489,6 +548,21 @@ CELERY_LOG_FILE_FOR_ERROR = 'log/error/task_log/error.log'
 CELERY_LOG_MAX_BYTES = 1024 * 1024 * 300
 CELERY_LOG_BACKUP_COUNT = 10
 
+# Audit log archiving and retention (audit.tasks.rollover_audit_logs)
+AUDIT_ARCHIVE_BATCH_SIZE = 1000
+AUDIT_LOG_RETENTION_DAYS = 365
+AUDIT_ARCHIVE_RETENTION_DAYS = None
+# Audit change lists open on this many days when no date range is selected
+AUDIT_ADMIN_DEFAULT_DAYS = 30
+
+# Hot/cold storage tiering (util.tasks.move_to_cold_tier): completed and cancelled rows untouched this long go cold
+STORAGE_TIER_COLD_AFTER_DAYS = 90
+STORAGE_TIER_BATCH_SIZE = 1000
+
+# Routing dwell rollups (routinginfo.tasks.refresh_routing_rollups) rebuild the days from the previous refresh
+# less this overlap, so routing rows committed late by long transactions are still counted
+ROUTING_ROLLUP_OVERLAP_MINUTES = 60
+
 env = environ.Env()
 environ.Env.read_env(os.path.join(os.path.dirname(__file__), "..", ".env"))
 
@@ -0,0 +1,114 @@
+import hashlib
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import Promise
+from django.utils.translation import get_language
+
+SHELL_CONTEXT_VERSION_CACHE_KEY = "shell_context_version"
+MODULE_IMAGES_CACHE_KEY = "shell_module_images"
+
+
+class ShellContextUtilClass:
+    """
+    Admin chrome rendered around every page: app list, filtered Jazzmin top menu and module images.
+    App list and menu are cached per (permission fingerprint, job type, build number), so users with the same
+    role share one entry; the fingerprint is cached per user. The receivers in security/models.py and
+    configuration/models.py drop entries when permissions, group membership or RefValues change.
+    """
+
+    @staticmethod
+    def get_version():
+        version = cache.get(SHELL_CONTEXT_VERSION_CACHE_KEY)
+        if version is None:
+            cache.add(SHELL_CONTEXT_VERSION_CACHE_KEY, 1, timeout=None)
+            version = cache.get(SHELL_CONTEXT_VERSION_CACHE_KEY, 1)
+        return version
+
+    @staticmethod
+    def invalidate_all():
+        # Group permissions changed: any cached fingerprint may be stale
+        try:
+            cache.incr(SHELL_CONTEXT_VERSION_CACHE_KEY)
+        except ValueError:
+            cache.set(SHELL_CONTEXT_VERSION_CACHE_KEY, 1, timeout=None)
+
+    @staticmethod
+    def get_fingerprint_cache_key(user_id, version):
+        return f"shell_permission_fingerprint_{user_id}_{version}"
+
+    @staticmethod
+    def invalidate_users(user_ids):
+        version = ShellContextUtilClass.get_version()
+        cache.delete_many([ShellContextUtilClass.get_fingerprint_cache_key(user_id, version) for user_id in user_ids])
+
+    @staticmethod
+    def invalidate_module_images():
+        cache.delete(MODULE_IMAGES_CACHE_KEY)
+
+    @staticmethod
+    def get_permission_fingerprint(user, version):
+        cache_key = ShellContextUtilClass.get_fingerprint_cache_key(user.pk, version)
+        fingerprint = cache.get(cache_key)
+        if fingerprint is None:
+            if not user.is_active:
+                permissions = []
+            elif user.is_superuser:
+                permissions = ["*"]  # every permission, no need to load them
+            else:
+                permissions = sorted(user.get_all_permissions())
+            raw = f"{user.is_superuser}|{user.is_staff}|{user.is_active}|{','.join(permissions)}"
+            fingerprint = hashlib.md5(raw.encode()).hexdigest()
+            cache.set(cache_key, fingerprint, timeout=settings.SHELL_CONTEXT_CACHE_TIMEOUT)
+        return fingerprint
+
+    @staticmethod
+    def get_job_type(request):
+        current_jobtype = request.session.get('currentjobtype', '')
+        if '-' in current_jobtype:
+            return current_jobtype.split('-')[1]
+        return current_jobtype
+
+    @staticmethod
+    def resolve_lazy(value):
+        # Lazy translation strings (verbose names) cannot be pickled into the cache
+        if isinstance(value, Promise):
+            return str(value)
+        if isinstance(value, dict):
+            return {key: ShellContextUtilClass.resolve_lazy(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [ShellContextUtilClass.resolve_lazy(item) for item in value]
+        return value
+
+    @staticmethod
+    def get_cached(request, part, site_name, build):
+        """
+        Returns the cached `part` of the shell for the request's role, calling build() on a miss.
+        Anonymous users are not cached.
+        """
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            return build()
+
+        version = ShellContextUtilClass.get_version()
+        fingerprint = ShellContextUtilClass.get_permission_fingerprint(user, version)
+        key_parts = f"{part}|{site_name}|{fingerprint}|{ShellContextUtilClass.get_job_type(request)}|" \
+                    f"{settings.BUILD_NUMBER}|{get_language()}|{version}"
+        cache_key = f"shell_context_{hashlib.md5(key_parts.encode()).hexdigest()}"
+        value = cache.get(cache_key)
+        if value is None:
+            value = ShellContextUtilClass.resolve_lazy(build())
+            cache.set(cache_key, value, timeout=settings.SHELL_CONTEXT_CACHE_TIMEOUT)
+        return value
+
+    @staticmethod
+    def get_module_images():
+        module_images = cache.get(MODULE_IMAGES_CACHE_KEY)
+        if module_images is None:
+            RefValues = apps.get_model('configuration', 'RefValues')
+            required_reftype = getattr(settings, 'APPLICATION_MODULE_IMAGES_REFERENCE', '')
+            module_images = dict(RefValues.objects.filter(reftype_id__name=required_reftype).values_list(
+                'value', 'display_value'))
+            cache.set(MODULE_IMAGES_CACHE_KEY, module_images, timeout=None)
+        return module_images
@@ -2,6 +2,8 @@ from django import template
 from django.conf import settings
 from jazzmin.utils import make_menu
 
+from controllerapp.shellcontext import ShellContextUtilClass
+
 register = template.Library()
 
 
@@ -11,7 +13,13 @@ def get_settings():
 
 @register.simple_tag(takes_context=True)
 def filtered_top_menu(context, user, admin_site='admin'):
+    # Same menu for every user of a role and job type, so it is built once and cached
     request = context['request']
+    return ShellContextUtilClass.get_cached(request, "top_menu", admin_site,
+                                            lambda: build_filtered_top_menu(request, user, admin_site))
+
+
+def build_filtered_top_menu(request, user, admin_site):
     options = get_settings()
     if "icons" not in options:
         options["icons"] = {}
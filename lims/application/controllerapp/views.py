@@ -7,11 +7,12 @@ from django.http import HttpResponseRedirect
 from django.urls import reverse, path
 from django.utils.translation import gettext as _
 
-from configuration.models import RefValues
 from controllerapp import settings
 from controllerapp.forms import AdminJobTypeChangeForm
+from controllerapp.shellcontext import ShellContextUtilClass
 from sample.views import SampleBulkEditView
 from ihcworkflow.views import IhcSampleBulkEditView
+from routinginfo.views import RoutingResultView
 from security.forms import UserGroupAuthenticationForm
 from security.views import JobTypeChangeView, JobTypeChangeDoneView
 
@@ -34,6 +35,7 @@ class Controller(AdminSite):
             path('bulk-edit-samples/', wrap(self.sample_bulk_edit, cacheable=True), name="sample_bulk_edit"),
             path('bulk-edit-ihc-samples/', wrap(self.ihc_sample_bulk_edit, cacheable=True),
                  name="ihc_sample_bulk_edit"),
+            path('routing-results/<str:run_id>/', wrap(self.routing_results), name="routing_results"),
         ]
         urls += super_urls
         return urls
@@ -78,10 +80,6 @@ class Controller(AdminSite):
         site_url = (
             script_name if self.site_url == "/" and script_name else self.site_url
         )
-        required_reftype = getattr(settings, 'APPLICATION_MODULE_IMAGES_REFERENCE', '')
-        module_images = RefValues.objects.filter(reftype_id__name=required_reftype).values_list('value',
-                                                                                                'display_value')
-        module_images_dict = {value: display_value for value, display_value in module_images}
         return {
             "site_title": self.site_title,
             "site_header": self.site_header,
@@ -91,9 +89,16 @@ class Controller(AdminSite):
             "is_popup": False,
             "is_nav_sidebar_enabled": self.enable_nav_sidebar,
             'build_number': settings.BUILD_NUMBER,
-            'module_images': module_images_dict,
+            'module_images': ShellContextUtilClass.get_module_images(),
         }
 
+    def get_app_list(self, request, app_label=None):
+        # The full app list is part of the shell around every page; it is cached per role and job type
+        if app_label is not None:
+            return super().get_app_list(request, app_label)
+        return ShellContextUtilClass.get_cached(request, "app_list", self.name,
+                                                lambda: super(Controller, self).get_app_list(request))
+
     def jobtype_change(self, request, extra_context=None):
         url = reverse("controllerapp:jobtype_change_done", current_app=self.name)
         defaults = {
@@ -125,5 +130,12 @@ class Controller(AdminSite):
         request.current_app = self.name
         return IhcSampleBulkEditView.as_view(**defaults)(request)
 
+    def routing_results(self, request, run_id, extra_context=None):
+        defaults = {
+            "extra_context": {**self.each_context(request), **(extra_context or {})},
+        }
+        request.current_app = self.name
+        return RoutingResultView.as_view(**defaults)(request, run_id=run_id)
+
 
 controller = Controller(name="controllerapp")
@@ -0,0 +1,36 @@
+import importlib
+
+from logutil.log import log
+
+# Modules a worker otherwise imports on its first requests; loaded once in the parent when preloading
+WARMUP_MODULES = (
+    "analysis.util",
+    "analysis.views",
+    "util.actions",
+)
+
+
+def preload_worker_stacks():
+    """
+    Imports the URLconf (and through it every admin and view module) plus the report, plot and S3 stacks
+    in the parent process, so forked gunicorn/Celery workers start warm and share the pages copy-on-write.
+    Database connections opened while warming up are closed so no child inherits a socket.
+    """
+    from django.db import connections
+    from django.urls import get_resolver
+
+    from analysis.util import get_beautiful_soup, get_numpy, get_pil_image, get_pyplot
+    from util.util import get_boto3, get_py_report_jasper, get_requests
+
+    get_resolver().url_patterns
+    for module in WARMUP_MODULES:
+        importlib.import_module(module)
+    for accessor in (get_pyplot, get_numpy, get_pil_image, get_beautiful_soup, get_boto3, get_requests,
+                     get_py_report_jasper):
+        try:
+            accessor()
+        except ImportError as e:
+            log.warning("Worker preload skipped %s: %s", accessor.__name__, e)
+
+    connections.close_all()
+    log.info("Worker stacks preloaded")
@@ -1,11 +1,11 @@
 from django.contrib import admin, messages
 from django.db.models import Q
-from django.utils.safestring import mark_safe
 from import_export.formats import base_formats
 
 from controllerapp.views import controller
 from cytoworkflow.models import CytoWorkflow
 from logutil.log import log
+from routinginfo.results import RoutingResultUtilClass
 from routinginfo.util import UtilClass
 from security.models import User, JobType
 
@@ -17,37 +17,9 @@ def execute_routing(self, request, queryset):
     if sample_ids:
         success_samples = UtilClass.process_workflow_steps_wetlab(self, request, sample_ids, accession_flag='N')
         if success_samples:
-            table_rows = "".join(
-                [f"<tr><td>{sample['sample_id']}</td><td>{sample['current_step']}</td></tr>" for sample in
-                 success_samples]
-            )
-
-            message = f"""
-               <p><strong>Routed samples to below step:</strong></p>
-                        <button onclick="toggleTable()" style="margin-bottom: 10px; padding: 5px 10px; background-color: #007bff; color: white; border: none; cursor: pointer; border-radius: 5px;">
-                            Expand/Collapse
-                        </button>
-                        <div id="sampleTable" style="display: none;">
-                            <table border="1" cellpadding="2" cellspacing="0" style="border-collapse: collapse; width: 50%;">
-                                <tr><th>Sample ID</th><th>Next Step</th></tr>
-                                {table_rows}
-                            </table>
-                        </div>
-
-
-                    <script>
-                        function toggleTable() {{
-                            var table = document.getElementById("sampleTable");
-                            if (table.style.display === "none") {{
-                                table.style.display = "block";
-                            }} else {{
-                                table.style.display = "none";
-                            }}
-                        }}
-                    </script>
-                """
+            message = RoutingResultUtilClass.record(request, success_samples, title="Routed samples")
             log.info(f"Routing is successful for sample ids ---> {sample_ids}")
-            self.message_user(request, mark_safe(message), level="INFO")
+            self.message_user(request, message, level="INFO")
 
     else:
         log.error(f"No sample(s) found")
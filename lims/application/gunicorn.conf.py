@@ -0,0 +1,11 @@
+import os
+
+# Opt-in warm start: DJANGO_WORKER_PRELOAD=true loads Django, the URLconf and the report/plot/S3 stacks once
+# in the master and forks the workers from it, so new and recycled workers serve their first request warm.
+preload_app = os.getenv("DJANGO_WORKER_PRELOAD", "False").lower() in ("1", "true", "yes")
+
+
+def when_ready(server):
+    if preload_app:
+        from controllerapp.warmup import preload_worker_stacks
+        preload_worker_stacks()
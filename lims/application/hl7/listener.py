@@ -36,7 +36,7 @@ class HL7Listener:
         )
 
     def handle_client(self, client_socket, address):
-        log.info(f"[+] Connected by {address}")
+        log.info("[+] Connected by %s", address)
         buffer = b""
 
         try:
@@ -54,7 +54,7 @@ class HL7Listener:
                     buffer = buffer[end + 2:]
 
                     hl7_text = raw_message.decode("utf-8", errors="ignore")
-                    log.info("Received HL7 Message:\n", hl7_text)
+                    log.debug("Received HL7 Message:\n%s", hl7_text)
 
                     # Extract message control ID
                     msg_match = re.search(
@@ -62,14 +62,14 @@ class HL7Listener:
                         hl7_text)
 
                     msg_control_id = msg_match.group('msg_id') if msg_match else 'UNKNOWN'
-                    log.info(f"Extracted Message Control ID: {msg_control_id}")
+                    log.info("Extracted Message Control ID: %s", msg_control_id)
 
                     # Send ACK immediately
                     ack_hl7 = self.generate_ack("AA", msg_control_id)
                     try:
                         client_socket.sendall(self.create_mllp_message(ack_hl7))
                     except Exception as e:
-                        log.error(f"Error sending ACK: {e}")
+                        log.error("Error sending ACK: %s", e)
 
                     # Enqueue message
                     message_queue.put(hl7_text)
@@ -78,10 +78,10 @@ class HL7Listener:
         except socket.timeout:
             log.error("Connection timed out.")
         except Exception as e:
-            log.errror(f"Error in handle_client(): {e}")
+            log.error("Error in handle_client(): %s", e)
         finally:
             client_socket.close()
-            log.error(f"Connection closed: {address}\n")
+            log.error("Connection closed: %s\n", address)
 
     def start_worker(self):
         def worker():
@@ -91,7 +91,7 @@ class HL7Listener:
                 try:
                     self.executor_process_message.submit(self.process_message, hl7_text)
                 except Exception as e:
-                    log.error(f"Worker error: {e}")
+                    log.error("Worker error: %s", e)
                 finally:
                     message_queue.task_done()
 
@@ -127,10 +127,10 @@ class HL7Listener:
                     accession_id = arr_slide_id[0] + "-" + arr_slide_id[1]
                     self.update_staining_status(slide_id, status="Rejected")
                     send_hl7_for_cancellation(slide_id, accession_id, staining_technique)
-                    log.info(f"Sent rejection message for {slide_id}")
+                    log.info("Sent rejection message for %s", slide_id)
 
         except Exception as e:
-            log.error(f"Error in process_message(): {e}")
+            log.error("Error in process_message(): %s", e)
 
     def update_staining_status(self, slide_id, status):
         # This is for updating the staining status when slide is rejected for staining
@@ -163,7 +163,7 @@ class HL7Listener:
                 )
 
         except Exception as e:
-            log.error(f"Error in update_staining_status(): {e}")
+            log.error("Error in update_staining_status(): %s", e)
         finally:
             connection.close()
 
@@ -196,7 +196,7 @@ class HL7Listener:
             action_instance.start_staining_method(None, None, queryset)
 
         except Exception as e:
-            log.error(f"Error in start_staining(): {e}")
+            log.error("Error in start_staining(): %s", e)
 
         finally:
             connection.close()
@@ -228,15 +228,15 @@ class HL7Listener:
             except (ConnectionRefusedError, OSError):
                 return False  # Port is not in use
             except Exception as e:
-                self.log.error(f"Unexpected error while checking port: {e}")
+                log.error("Unexpected error while checking port: %s", e)
                 return True  # Assume in use if error
 
     def start(self):
         if self.is_port_in_use():
-            log.info(f"Service already running on {self.host}:{self.port}, skipping start.")
+            log.info("Service already running on %s:%s, skipping start.", self.host, self.port)
             return
 
-        log.info(f"HL7 Listener running on {self.host}:{self.port}")
+        log.info("HL7 Listener running on %s:%s", self.host, self.port)
 
         self.start_worker()  # Start the single consumer thread
         server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
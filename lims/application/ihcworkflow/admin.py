@@ -12,20 +12,22 @@ from django.db.models.functions import Coalesce, Cast
 from django.http import HttpResponseRedirect, JsonResponse, HttpResponse
 from django.shortcuts import render
 from django.urls import reverse, path
-from django.utils.safestring import mark_safe
 from django.views.decorators.csrf import csrf_exempt
 from import_export.formats import base_formats
 
 from controllerapp.views import controller
 from hl7.sender import send_hl7_for_staining_complete
 from ihcworkflow.models import IhcWorkflow
+from ihcworkflow.testassignment import TestReassignmentUtilClass
 from logutil.log import log
 from reporting.models import ContainerTypeLabelMethodMap
+from routinginfo.results import RoutingResultUtilClass
 from routinginfo.util import UtilClass as RoutingUtilClass
 from sample.models import SampleTestMap, Sample
 from security.models import User, JobType
 from tests.models import WorkflowStepConfigField
 from util.actions import GenericAction
+from util.storagetier import STORAGE_TIER_HOT, StorageTierUtilClass
 from util.util import GenerateLabel, UtilClass as CommonUtilClass, \
     get_user_printer_selection_data
 from workflows.models import WorkflowStep
@@ -38,37 +40,8 @@ def execute_routing(self, request, queryset):
     if sample_ids:
         success_samples = RoutingUtilClass.process_workflow_steps_wetlab(self, request, sample_ids, accession_flag='N')
         if success_samples:
-            table_rows = "".join(
-                [f"<tr><td>{sample['sample_id']}</td><td>{sample['current_step']}</td></tr>" for sample in
-                 success_samples]
-            )
-
-            message = f"""
-               <p><strong>Routed samples to below step:</strong></p>
-                        <button onclick="toggleTable()" style="margin-bottom: 10px; padding: 5px 10px; background-color: #007bff; color: white; border: none; cursor: pointer; border-radius: 5px;">
-                            Expand/Collapse
-                        </button>
-                        <div id="sampleTable" style="display: none;">
-                            <table border="1" cellpadding="2" cellspacing="0" style="border-collapse: collapse; width: 50%;">
-                                <tr><th>Sample ID</th><th>Next Step</th></tr>
-                                {table_rows}
-                            </table>
-                        </div>
-
-
-                    <script>
-                        function toggleTable() {{
-                            var table = document.getElementById("sampleTable");
-                            if (table.style.display === "none") {{
-                                table.style.display = "block";
-                            }} else {{
-                                table.style.display = "none";
-                            }}
-                        }}
-                    </script>
-                """
-            log.info(f"Successful IHC Sample routing ---> {success_samples}")
-            self.message_user(request, mark_safe(message), level="INFO")
+            message = RoutingResultUtilClass.record(request, success_samples, title="Routed samples")
+            self.message_user(request, message, level="INFO")
 
     else:
         log.error("No sample(s) found")
@@ -304,18 +277,26 @@ class IhcWorkflowAdmin(admin.ModelAdmin):
 
     def get_queryset(self, request):
         """Override to filter samples based on user's department."""
-        qs = super().get_queryset(request)
-        qs = qs.exclude(pending_action='MoveToStorage') \
+        qs = self.filter_worklist(request, super().get_queryset(request))
+        return qs.prefetch_related(StorageTierUtilClass.hot_test_maps()).order_by(
+            'accession_id',
+            'part_no',
+            self.safe_cast('block_or_cassette_seq'),
+            self.safe_cast('slide_seq'), 'sample_id',
+        )
+
+    def filter_worklist(self, request, qs):
+        """
+        Status and department filters of the IHC changelist. They only touch Sample columns, so they also apply
+        to Sample.objects.of_kind('ihcworkflow') when no IHC column is needed.
+        """
+        qs = qs.filter(storage_tier=STORAGE_TIER_HOT) \
+            .exclude(pending_action='MoveToStorage') \
             .filter(custodial_storage_id__isnull=True) \
-            .exclude(sample_status__in=['Completed', 'Cancelled']).prefetch_related('sampletestmap_set__test_id')
+            .exclude(sample_status__in=['Completed', 'Cancelled'])
 
         if request.user.is_superuser:
-            return qs.order_by(
-                'accession_id',
-                'part_no',
-                self.safe_cast('block_or_cassette_seq'),
-                self.safe_cast('slide_seq'), 'sample_id',
-            )
+            return qs
 
         user_jobtype = request.session.get('currentjobtype', '')
         user_site = user_jobtype.split('-')[0]
@@ -327,12 +308,7 @@ class IhcWorkflowAdmin(admin.ModelAdmin):
                 custodial_department__name__endswith="-Global",  # Global department
                 custodial_department__name__startswith=user_site  # Site prefix should match
             )
-            return qs.filter(department_filter | global_storage_filter).order_by(
-                'accession_id',
-                'part_no',
-                self.safe_cast('block_or_cassette_seq'),
-                self.safe_cast('slide_seq'), 'sample_id',
-            )
+            return qs.filter(department_filter | global_storage_filter)
 
         except JobType.DoesNotExist:
             return qs.none()
@@ -720,10 +696,7 @@ def update_test_popup(admin_self, request):
 
 
 def update_test_submit(admin_self, request):
-    Sample = apps.get_model("sample", "Sample")
     SampleTestMap = apps.get_model("sample", "SampleTestMap")
-    IhcWorkflow = apps.get_model("ihcworkflow", "IhcWorkflow")
-    Test = apps.get_model("tests", "Test")
 
     ids = request.POST.get("ids", "")
     sample_ids = [s for s in ids.split(",") if s]
@@ -732,10 +705,9 @@ def update_test_submit(admin_self, request):
     if accession_filter:
         redirect_url += f'?q={accession_filter}'
 
-    existing_mappings = {
-        str(stm.sample_id): stm.test_id_id
-        for stm in SampleTestMap.objects.filter(sample_id__in=sample_ids)
-    }
+    existing_mappings = dict(
+        SampleTestMap.objects.filter(sample_id__in=sample_ids).values_list("sample_id", "test_id")
+    )
     # Collect only samples where a new test is selected (non-blank)
     sample_to_new_test = {}
     for sample_id in sample_ids:
@@ -755,60 +727,10 @@ def update_test_submit(admin_self, request):
             </script>
             """)
 
-    samples = Sample.objects.filter(sample_id__in=sample_to_new_test.keys())
-
-    # Group child samples by root
-    root_to_children = defaultdict(list)
-    for sample in samples:
-        root_sample = sample.accession_sample_id or sample  # root
-        root_to_children[root_sample].append(sample)
-
-    for root_sample, child_samples_list in root_to_children.items():
-        # Update only those selected children
-        for child_sample in child_samples_list:
-            SampleTestMap.objects.filter(sample_id=child_sample).delete()
-            test_id = sample_to_new_test.get(str(child_sample.sample_id))
-            if test_id:
-                SampleTestMap.objects.create(
-                    sample_id=child_sample,
-                    test_id_id=test_id,
-                    test_status="Pending"
-                )
-
-        # Sync root with all (not just updated) current children
-        all_child_samples = IhcWorkflow.objects.filter(
-            sample_ptr_id__accession_sample_id=root_sample
-        ).values_list("sample_ptr_id", flat=True)
-
-        child_tests = list(
-            SampleTestMap.objects.filter(sample_id__in=all_child_samples)
-            .values_list("test_id", flat=True)
-            .distinct()
-        )
+    summary = TestReassignmentUtilClass.reassign(sample_to_new_test, actor=request.user)
+    log.info("Test reassignment summary: %s", summary)
 
-        root_sample_obj = (
-            Sample.objects.get(sample_id=root_sample)
-            if isinstance(root_sample, str)
-            else root_sample
-        )
-        # Remove extra tests from root
-        SampleTestMap.objects.filter(sample_id=root_sample_obj).exclude(
-            test_id__in=child_tests
-        ).delete()
-        # Add missing tests to root with test_status="Initial"
-        existing_tests = set(
-            SampleTestMap.objects.filter(sample_id=root_sample_obj)
-            .values_list("test_id", flat=True)
-        )
-        for t in child_tests:
-            if t not in existing_tests:
-                SampleTestMap.objects.create(
-                    sample_id=root_sample_obj,
-                    test_id_id=t,
-                    test_status="Initial"
-                )
-
-    messages.success(request, f"Tests updated for {len(sample_to_new_test)} sample(s).")
+    messages.success(request, f"Tests updated for {summary['samples']} sample(s).")
     return HttpResponse("""
     <script type="text/javascript">
       window.opener.location.reload();
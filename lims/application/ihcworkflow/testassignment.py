@@ -0,0 +1,123 @@
+from collections import defaultdict
+
+from auditlog.context import disable_auditlog
+from auditlog.models import LogEntry
+from django.apps import apps
+from django.db import transaction
+from django.db.models import F, Q
+
+from util.audit import AuditUtilClass
+
+
+class TestReassignmentUtilClass:
+    """
+    Reassigns tests on IHC slides. Each selected slide gets exactly one 'Pending' mapping for its new test,
+    then every affected root sample is synced with the distinct tests of all its IHC children: tests no
+    child carries any more are removed, missing ones are added as 'Initial'.
+    The new mapping sets are computed in memory from two joined queries and written in one transaction
+    (one DELETE, one bulk_create, bulk audit entries).
+    """
+
+    @staticmethod
+    def load(sample_to_test):
+        """
+        Selected slides with their root samples, and every mapping of the slides, the roots and the roots'
+        IHC children. Related rows are joined in so the audit entries need no further queries.
+        """
+        Sample = apps.get_model("sample", "Sample")
+        SampleTestMap = apps.get_model("sample", "SampleTestMap")
+        ihc_kind = apps.get_model("ihcworkflow", "IhcWorkflow")._meta.model_name
+
+        samples = {
+            sample.sample_id: sample
+            for sample in Sample.objects.filter(sample_id__in=sample_to_test.keys()).select_related(
+                "accession_sample")
+        }
+        for sample in list(samples.values()):
+            if sample.accession_sample is not None:
+                samples.setdefault(sample.accession_sample_id, sample.accession_sample)
+        selected = {sample_id: (samples[sample_id].accession_sample_id or sample_id,
+                                samples[sample_id].sample_kind == ihc_kind)
+                    for sample_id in sample_to_test if sample_id in samples}
+        root_ids = {root_id for root_id, _ in selected.values()}
+        mappings = list(
+            SampleTestMap.objects.filter(
+                Q(sample_id__in=selected.keys())
+                | Q(sample_id__in=root_ids)
+                | Q(sample_id__accession_sample__in=root_ids, sample_id__sample_kind=ihc_kind)
+            ).select_related("sample_id", "test_id", "workflow_id").annotate(
+                root_id=F("sample_id__accession_sample"),
+                is_ihc=Q(sample_id__sample_kind=ihc_kind)
+            )
+        )
+        return samples, selected, mappings
+
+    @staticmethod
+    def plan(sample_to_test, selected, mappings):
+        """Returns (mappings to delete, (sample_id, test_id, test_status) to create) for the loaded state."""
+        # sample -> [(existing mapping or None, test_id, test_status)]
+        state = defaultdict(list)
+        ihc_children = defaultdict(set)
+        for mapping in mappings:
+            state[mapping.sample_id_id].append((mapping, mapping.test_id_id, mapping.test_status))
+            if mapping.is_ihc and mapping.root_id:
+                ihc_children[mapping.root_id].add(mapping.sample_id_id)
+        for sample_id, (root_id, is_ihc) in selected.items():
+            if is_ihc and root_id != sample_id:
+                ihc_children[root_id].add(sample_id)
+
+        to_delete = []
+        for sample_id in selected:
+            to_delete.extend(mapping for mapping, _, _ in state[sample_id] if mapping is not None)
+            state[sample_id] = [(None, sample_to_test[sample_id], "Pending")]
+
+        for root_id in {root_id for root_id, _ in selected.values()}:
+            child_tests = {test_id for child_id in ihc_children[root_id]
+                           for _, test_id, _ in state[child_id] if test_id is not None}
+            kept = []
+            for mapping, test_id, test_status in state[root_id]:
+                if test_id is not None and test_id not in child_tests:
+                    if mapping is not None:
+                        to_delete.append(mapping)
+                else:
+                    kept.append((mapping, test_id, test_status))
+            existing_tests = {test_id for _, test_id, _ in kept}
+            kept.extend((None, test_id, "Initial") for test_id in sorted(child_tests - existing_tests))
+            state[root_id] = kept
+
+        to_create = [(sample_id, test_id, test_status) for sample_id, entries in state.items()
+                     for mapping, test_id, test_status in entries if mapping is None]
+        return to_delete, to_create
+
+    @staticmethod
+    def reassign(sample_to_test, actor=None):
+        """
+        Applies {slide sample_id: test_id} and returns a summary:
+        {'samples': slides reassigned, 'roots': root samples synced, 'deleted': mappings removed,
+        'created': mappings added}.
+        """
+        SampleTestMap = apps.get_model("sample", "SampleTestMap")
+        Test = apps.get_model("tests", "Test")
+
+        samples, selected, mappings = TestReassignmentUtilClass.load(sample_to_test)
+        to_delete, to_create = TestReassignmentUtilClass.plan(sample_to_test, selected, mappings)
+        tests = Test.objects.in_bulk({test_id for _, test_id, _ in to_create})
+        new_mappings = [SampleTestMap(sample_id=samples[sample_id], test_id=tests.get(test_id),
+                                      test_status=test_status)
+                        for sample_id, test_id, test_status in to_create]
+
+        with transaction.atomic():
+            with disable_auditlog():
+                if to_delete:
+                    SampleTestMap.objects.filter(pk__in=[mapping.pk for mapping in to_delete]).delete()
+                SampleTestMap.objects.bulk_create(new_mappings)
+            AuditUtilClass.bulk_log(LogEntry.Action.DELETE, [(mapping, None, None) for mapping in to_delete], actor)
+            AuditUtilClass.bulk_log(LogEntry.Action.CREATE, [(None, mapping, None) for mapping in new_mappings],
+                                    actor)
+
+        return {
+            'samples': len(selected),
+            'roots': len({root_id for root_id, _ in selected.values()}),
+            'deleted': len(to_delete),
+            'created': len(new_mappings),
+        }
@@ -10,6 +10,7 @@ from django.views.decorators.debug import sensitive_post_parameters
 from django.utils.translation import gettext as _
 
 from routinginfo.util import UtilClass
+from sample.bulkedit import SampleBulkEditUtilClass
 from ihcworkflow.models import IhcWorkflow
 from ihcworkflow.forms import IhcSampleBulkEditForm
 from security.views import JobTypeContextMixin
@@ -65,8 +66,13 @@ class IhcSampleBulkEditView(JobTypeContextMixin, View):
         queryset = self.get_queryset(ids)
         SampleFormSet = modelformset_factory(IhcWorkflow, form=IhcSampleBulkEditForm, extra=0)
         formset = SampleFormSet(request.POST, queryset=queryset, auto_id='id_%s')
+        originals = SampleBulkEditUtilClass.snapshot(formset)
         if formset.is_valid():
-            formset.save()
+            try:
+                SampleBulkEditUtilClass.save_formset(formset, originals, actor=request.user)
+            except ValueError as e:
+                messages.error(request, str(e))
+                return render(request, self.template_name, self.get_context_data(formset=formset))
 
             q = request.GET.get('q', '')
 
@@ -43,3 +43,45 @@ class DeveloperContextFilter(logging.Filter):
         cls._local.module = None
         cls._local.func = None
         cls._local.cls = None
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets at most `count` records per call site through every `seconds`; the rest of the window is dropped
+    and the next record that gets through reports how many were suppressed. ERROR and above always pass.
+    Keyed on the call site and the unformatted message, so unrelated messages logged from the same line
+    (a shared helper, the log wrapper) are limited separately while %-style values do not split the key.
+    Records logged with extra={"skip_rate_limit": True} (call tracing) are never limited.
+    """
+
+    def __init__(self, count=20, seconds=60, exclude=(), name=""):
+        super().__init__(name)
+        self.count = count
+        self.seconds = seconds
+        self.exclude = tuple(exclude)
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if (record.levelno >= logging.ERROR or record.name.startswith(self.exclude)
+                or getattr(record, "skip_rate_limit", False)):
+            return True
+
+        key = (record.pathname, record.lineno, str(record.msg))
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or record.created - window[0] >= self.seconds:
+                suppressed = window[2] if window else 0
+                if len(self._windows) > 10000:
+                    self._windows.clear()
+                self._windows[key] = [record.created, 1, 0]
+            elif window[1] < self.count:
+                window[1] += 1
+                return True
+            else:
+                window[2] += 1
+                return False
+
+        if suppressed:
+            record.msg = f"{record.msg} [{suppressed} similar messages suppressed]"
+        return True
@@ -0,0 +1,79 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from logutil.importtime import get_package_report
+
+# Marks the line that carries the recorded timings among whatever else the bootstrap writes to stdout
+REPORT_MARKER = "IMPORT_TIME_REPORT "
+
+# What a web worker loads before serving its first request, timed by the DJANGO_REPORT_IMPORT_TIME recorder
+BOOTSTRAP_SCRIPT = """
+import importlib
+import json
+from logutil.importtime import install
+recorder = install()
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+for module in {modules!r}:
+    importlib.import_module(module)
+print({marker!r} + json.dumps(recorder.get_module_report()))
+"""
+
+
+class Command(BaseCommand):
+    help = ("Starts a fresh interpreter with the import-time recorder installed, bootstraps Django and the URLconf "
+            "the way a worker does, and reports the import cost per module and per top-level package.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--module', action='append', dest='modules', default=[],
+                            help="Extra module to import after the bootstrap, can be repeated")
+        parser.add_argument('--top', type=int, default=30, help="Number of modules to list")
+        parser.add_argument('--sort', choices=['self', 'cumulative'], default='cumulative')
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE',
+                                                                     'controllerapp.settings'))
+        result = subprocess.run(
+            [sys.executable, '-c', BOOTSTRAP_SCRIPT.format(modules=options['modules'], marker=REPORT_MARKER)],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True
+        )
+        report_lines = [line for line in result.stdout.splitlines() if line.startswith(REPORT_MARKER)]
+        if result.returncode != 0 or not report_lines:
+            raise CommandError(f"Bootstrap failed:\n{result.stderr[-2000:]}")
+        modules = json.loads(report_lines[-1][len(REPORT_MARKER):])
+
+        project_packages = {app_config.name.split('.')[0] for app_config in apps.get_app_configs()
+                            if str(app_config.path).startswith(str(settings.BASE_DIR))}
+        packages = get_package_report({entry['module']: entry['self_ms'] for entry in modules})
+
+        sort_key = 'self_ms' if options['sort'] == 'self' else 'cumulative_ms'
+        top_modules = sorted(modules, key=lambda entry: entry[sort_key], reverse=True)[:options['top']]
+        package_report = list(packages.items())
+        total_ms = sum(packages.values())
+
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'total_ms': round(total_ms, 1),
+                'modules': top_modules,
+                'packages': [{'package': package, 'self_ms': round(ms, 1), 'project': package in project_packages}
+                             for package, ms in package_report],
+            }, indent=2))
+            return
+
+        self.stdout.write(f"Total import time: {total_ms:.1f} ms over {len(modules)} modules\n")
+        self.stdout.write(f"{'self ms':>10} {'cumul ms':>10}  module")
+        for entry in top_modules:
+            self.stdout.write(f"{entry['self_ms']:>10.1f} {entry['cumulative_ms']:>10.1f}  {entry['module']}")
+        self.stdout.write(f"\n{'self ms':>10}  package")
+        for package, ms in package_report[:options['top']]:
+            marker = ' (app)' if package in project_packages else ''
+            self.stdout.write(f"{ms:>10.1f}  {package}{marker}")
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from logutil.customlogger import (RUNTIME_TRACE_MODULES_CACHE_KEY, parse_trace_modules,
+                                  set_runtime_trace_modules)
+
+
+class Command(BaseCommand):
+    help = ("Switches call tracing of project modules on or off for every running worker without a restart. "
+            "Workers pick the change up within CUSTOMLOGGER_RUNTIME_REFRESH_SECONDS.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('modules', nargs='?', help="Comma separated module prefixes, e.g. sample.util,util.util "
+                                                       "or '*' for all project apps")
+        parser.add_argument('--minutes', type=int, default=15, help="Switch tracing off again after this long")
+        parser.add_argument('--off', action='store_true', help="Stop tracing")
+
+    def handle(self, *args, **options):
+        if not getattr(settings, "CUSTOMLOGGER_ENABLED", False):
+            raise CommandError("Call tracing is disabled; set DJANGO_CUSTOMLOGGER_ENABLED on the workers first.")
+
+        if options['off']:
+            set_runtime_trace_modules(())
+            self.stdout.write("Call tracing switched off.")
+            return
+
+        modules = parse_trace_modules(options['modules'])
+        if not modules:
+            current = cache.get(RUNTIME_TRACE_MODULES_CACHE_KEY)
+            self.stdout.write(f"Traced modules: {', '.join(current) if current else 'none'}")
+            return
+
+        set_runtime_trace_modules(modules, timeout=options['minutes'] * 60)
+        self.stdout.write(f"Tracing {', '.join(modules)} for {options['minutes']} minutes "
+                          f"(sample rate {settings.CUSTOMLOGGER_SAMPLE_RATE}).")
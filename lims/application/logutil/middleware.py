@@ -1,3 +1,7 @@
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .customlogger import get_sampled_trace_modules, parse_trace_modules, trace_calls
 from .thread_seq_filter import reset_thread_seq
 
 
@@ -9,3 +13,32 @@ class ResetThreadSeqMiddleware:
         # reset at beginning of request so sequence starts at 1 per request
         reset_thread_seq()
         return self.get_response(request)
+
+
+class CallTracingMiddleware:
+    """
+    Traces project calls for a single request: modules named in the CUSTOMLOGGER_TRACE_HEADER header or
+    CUSTOMLOGGER_TRACE_COOKIE cookie (staff users only), otherwise the runtime/configured modules after sampling.
+    Removed from the chain entirely when CUSTOMLOGGER_ENABLED is off.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "CUSTOMLOGGER_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.header = "HTTP_" + settings.CUSTOMLOGGER_TRACE_HEADER.upper().replace("-", "_")
+        self.cookie = settings.CUSTOMLOGGER_TRACE_COOKIE
+
+    def get_trace_modules(self, request):
+        requested = request.META.get(self.header) or request.COOKIES.get(self.cookie)
+        user = getattr(request, "user", None)
+        if requested and user is not None and user.is_authenticated and user.is_staff:
+            return parse_trace_modules(requested)
+        return get_sampled_trace_modules()
+
+    def __call__(self, request):
+        modules = self.get_trace_modules(request)
+        if not modules:
+            return self.get_response(request)
+        with trace_calls(modules):
+            return self.get_response(request)
@@ -0,0 +1,135 @@
+import atexit
+import copy
+import logging
+import logging.config
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+
+class LogWriter(QueueListener):
+    """
+    The single writer thread: takes queued records and hands each one to the file/console handlers
+    of the logger that produced it, so disk I/O never runs on a request, task or HL7 thread.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue, respect_handler_level=True)
+        self.dropped = 0
+
+    def handle(self, record):
+        targets = record.__dict__.pop("_log_targets", ())
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            notice = logging.makeLogRecord({
+                "name": __name__, "levelno": logging.WARNING, "levelname": "WARNING", "funcName": "handle",
+                "msg": "Log queue full, %s records dropped", "args": (dropped,),
+            })
+            for handler in targets:
+                if notice.levelno >= handler.level:
+                    handler.handle(notice)
+        for handler in targets:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+_exception_formatter = logging.Formatter()
+
+
+class QueuedHandler(QueueHandler):
+    """
+    Stands in for a logger's handlers: the producing thread runs the cheap filters (thread sequence,
+    rate limiting), renders the message and traceback, and enqueues the record; layout and writing happen
+    on the writer thread. As in QueueHandler.prepare, the %-args are rendered before enqueueing so the writer
+    never touches objects (model instances, lazy querysets) that the caller goes on to change.
+    """
+
+    def __init__(self, targets, writer):
+        super().__init__(writer.queue)
+        self.targets = tuple(targets)
+        self.writer = writer
+
+    def prepare(self, record):
+        # A propagating record can reach several queued handlers, each with its own targets
+        record = copy.copy(record)
+        message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+        if record.exc_text:
+            message = f"{message}\n{record.exc_text}"
+        record.message = message
+        record.msg = message
+        record.args = None
+        record.exc_info = None
+        record.exc_text = None
+        record._log_targets = self.targets
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.writer.queue.put_nowait(record)
+        except queue.Full:
+            self.writer.dropped += 1
+
+
+_writer = None
+
+
+def _restart_writer_in_child():
+    # A forked child (Celery prefork, gunicorn --preload) inherits the queue but not the writer thread
+    if _writer is not None:
+        _writer.queue = queue.Queue(_writer.queue.maxsize)
+        _writer._thread = None
+        _writer.start()
+
+
+def _stop_writer():
+    if _writer is not None and _writer._thread is not None:
+        _writer.stop()
+
+
+def _wrap_handlers(loggers, writer):
+    groups = {}
+    for logger in loggers:
+        targets = tuple(logger.handlers)
+        if targets:
+            groups.setdefault(targets, []).append(logger)
+
+    # Filters shared by every target (thread sequence, rate limit) must run on the producing thread;
+    # they are collected for all groups first because handlers can be shared between groups
+    shared_filters = {
+        targets: [f for f in targets[0].filters if all(f in target.filters for target in targets)]
+        for targets in groups
+    }
+    for targets, group_loggers in groups.items():
+        handler = QueuedHandler(targets, writer)
+        handler.setLevel(min(target.level for target in targets))
+        for log_filter in shared_filters[targets]:
+            handler.addFilter(log_filter)
+            for target in targets:
+                if log_filter in target.filters:
+                    target.removeFilter(log_filter)
+        for logger in group_loggers:
+            logger.handlers = [handler]
+
+
+def configure_logging(logging_settings):
+    """
+    LOGGING_CONFIG entry point: applies LOGGING with dictConfig, then puts the root logger and every
+    logger declared in LOGGING behind one queue drained by a single LogWriter thread.
+    """
+    global _writer
+    from django.conf import settings
+
+    logging.config.dictConfig(logging_settings)
+    if not getattr(settings, "LOG_QUEUE_ENABLED", True):
+        return
+
+    if _writer is None:
+        _writer = LogWriter(queue.Queue(getattr(settings, "LOG_QUEUE_MAXSIZE", 10000)))
+        _writer.start()
+        atexit.register(_stop_writer)
+        os.register_at_fork(after_in_child=_restart_writer_in_child)
+
+    loggers = [logging.getLogger()] + [logging.getLogger(name) for name in logging_settings.get("loggers", {})]
+    _wrap_handlers(loggers, _writer)
@@ -8,7 +8,6 @@ _thread_local = threading.local()
 # read once at import time (fast)
 HOSTNAME = socket.gethostname()
 INSTANCE_ID = os.environ.get("INSTANCE_ID", HOSTNAME)
-PID = os.getpid()
 
 
 class ThreadSequenceFilter(logging.Filter):
@@ -31,7 +30,8 @@ class ThreadSequenceFilter(logging.Filter):
         record.thread_seq = seq
         record.hostname = HOSTNAME
         record.instance_id = INSTANCE_ID
-        record.process_id = PID
+        # read per record: gunicorn and Celery workers are forked after this module is imported
+        record.process_id = os.getpid()
         return True
 
 
@@ -1,7 +1,9 @@
 from auditlog.models import AuditlogHistoryField
 from auditlog.registry import auditlog
 from django.core.validators import RegexValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 import importlib
 import security
@@ -937,3 +939,10 @@ auditlog.register(AccessionPrefix)
 auditlog.register(ProjectFieldsMap)
 auditlog.register(DemographicFields)
 auditlog.register(ProjectPhysicianMap)
+
+
+@receiver(post_save, sender=AccessionPrefix, dispatch_uid='accessionprefix_save_static_choices_signal')
+@receiver(post_delete, sender=AccessionPrefix, dispatch_uid='accessionprefix_delete_static_choices_signal')
+def invalidate_accession_prefix_choices(sender, instance, **kwargs):
+    module = importlib.import_module("util.choices")
+    transaction.on_commit(lambda: module.ChoiceUtilClass.invalidate_static_choices('accession_prefix'))
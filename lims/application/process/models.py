@@ -1,6 +1,10 @@
+import importlib
+
 from auditlog.models import AuditlogHistoryField
 from auditlog.registry import auditlog
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 
 import security
@@ -107,3 +111,10 @@ auditlog.register(SampleType)
 auditlog.register(ContainerType)
 auditlog.register(SampleTypeContainerType)
 auditlog.register(ConsumableType)
+
+
+@receiver(post_save, sender=SampleType, dispatch_uid='sampletype_save_static_choices_signal')
+@receiver(post_delete, sender=SampleType, dispatch_uid='sampletype_delete_static_choices_signal')
+def invalidate_sample_type_choices(sender, instance, **kwargs):
+    module = importlib.import_module("util.choices")
+    transaction.on_commit(lambda: module.ChoiceUtilClass.invalidate_static_choices('sample_type'))
@@ -2,7 +2,7 @@ from django.contrib import admin, messages
 from import_export.formats import base_formats
 from controllerapp.views import controller
 from security.models import User
-from routinginfo.models import RoutingInfo
+from routinginfo.models import RoutingInfo, RoutingStepDailyRollup
 
 
 class RoutingInfoAdmin(admin.ModelAdmin):
@@ -56,4 +56,36 @@ class RoutingInfoAdmin(admin.ModelAdmin):
         return [f for f in formats if f().can_export()]
 
 
+class RoutingStepDailyRollupAdmin(admin.ModelAdmin):
+    list_display = (
+        "rollup_date",
+        "department",
+        "step",
+        "test_id",
+        "transition_count",
+        "avg_dwell_seconds",
+        "max_dwell_seconds",
+    )
+    list_display_links = None
+    list_filter = [
+        "department",
+        "step",
+        "test_id",
+    ]
+    list_select_related = ("department", "test_id")
+    date_hierarchy = 'rollup_date'
+
+    @admin.display(description="Avg Dwell (sec)")
+    def avg_dwell_seconds(self, obj):
+        return round(obj.avg_dwell_seconds, 1)
+
+    def has_add_permission(self, request):
+        # Rollups are maintained by the refresh_routing_rollups task
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 controller.register(RoutingInfo, RoutingInfoAdmin)
+controller.register(RoutingStepDailyRollup, RoutingStepDailyRollupAdmin)
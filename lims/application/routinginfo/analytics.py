@@ -0,0 +1,168 @@
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Max, Min, Sum
+from django.db.models.functions import Lag
+from django.db.models.expressions import Window
+from django.utils import timezone
+
+from logutil.log import log
+from analysis.models import ReportOption
+from routinginfo.models import RoutingInfo, RoutingStepDailyRollup, RoutingRollupState
+from sample.models import SampleTestMap
+
+STEP_DWELL_ROLLUP = "step_dwell"
+
+
+class RoutingAnalyticsUtilClass:
+    """
+    Turnaround-time (TAT) analytics over RoutingInfo.
+    A RoutingInfo row closes its from_step, so the dwell time of that step is the gap
+    to the previous transition of the same sample (or report option).
+    """
+
+    @staticmethod
+    def get_step_dwell_queryset(partition_field='sample_id'):
+        """
+        RoutingInfo rows annotated with the previous transition time and the dwell time
+        of from_step, computed with a LAG window per sample (or per report option).
+        """
+        return (
+            RoutingInfo.objects.filter(**{f"{partition_field}__isnull": False})
+            .annotate(
+                previous_dt=Window(
+                    expression=Lag('created_dt'),
+                    partition_by=[F(partition_field)],
+                    order_by=[F('created_dt').asc(), F('routing_info_id').asc()],
+                )
+            )
+            .annotate(dwell=F('created_dt') - F('previous_dt'))
+        )
+
+    @staticmethod
+    def get_accession_tat(accession_ids=None):
+        """
+        End-to-end TAT per accession: first to last routing transition of its samples.
+        """
+        queryset = RoutingInfo.objects.filter(sample_id__isnull=False)
+        if accession_ids is not None:
+            queryset = queryset.filter(sample_id__accession_id__in=accession_ids)
+        return (
+            queryset.values(accession_id=F('sample_id__accession_id'))
+            .annotate(first_dt=Min('created_dt'), last_dt=Max('created_dt'))
+            .annotate(tat=F('last_dt') - F('first_dt'))
+            .order_by('accession_id')
+        )
+
+    @staticmethod
+    def fold_step_dwell(partition_field, start_date):
+        """
+        (date, department, step, test, count, total dwell, max dwell) of the steps left on or after start_date
+        (everything when None), for routing by sample or by report option. Only the history of samples or report
+        options that moved in that range is scanned; the LAG window needs their earlier rows.
+        Every transition is counted once: sample steps under the first test mapped to the sample (one row per sample
+        is joined), report option steps under the report option's test.
+        """
+        routing_table = RoutingInfo._meta.db_table
+        partition_col = RoutingInfo._meta.get_field(partition_field).column
+        dept_col = RoutingInfo._meta.get_field('from_department').column
+        if partition_field == 'sample_id':
+            # Collapsed to one test per sample before the join, so a sample with several tests is not counted twice
+            map_sample_col = SampleTestMap._meta.get_field('sample_id').column
+            test_join = (f"LEFT JOIN (SELECT m.{map_sample_col} AS partition_id, "
+                         f"MIN(m.{SampleTestMap._meta.get_field('test_id').column}) AS test_id "
+                         f"FROM {SampleTestMap._meta.db_table} m "
+                         f"JOIN affected a ON a.partition_id = m.{map_sample_col} "
+                         f"GROUP BY m.{map_sample_col}) src ON src.partition_id = t.partition_id")
+            test_col = "src.test_id"
+        else:
+            test_join = (f"LEFT JOIN {ReportOption._meta.db_table} src "
+                         f"ON src.{ReportOption._meta.pk.column} = t.partition_id")
+            test_col = f"src.{ReportOption._meta.get_field('test_id').column}"
+        # Bare created_dt comparisons so the created_dt indexes can be used; rollup days are UTC days
+        start_dt = datetime.combine(start_date, time.min, tzinfo=dt_timezone.utc) if start_date else None
+        affected_filter = "AND created_dt >= %(start_dt)s" if start_date else ""
+        transition_filter = "AND t.created_dt >= %(start_dt)s" if start_date else ""
+
+        sql = f"""
+            WITH affected AS (
+                SELECT DISTINCT {partition_col} AS partition_id
+                FROM {routing_table}
+                WHERE {partition_col} IS NOT NULL {affected_filter}
+            ), transitions AS (
+                SELECT r.{partition_col} AS partition_id, r.from_step, r.{dept_col} AS department_id, r.created_dt,
+                       r.created_dt - LAG(r.created_dt) OVER (
+                           PARTITION BY r.{partition_col} ORDER BY r.created_dt, r.routing_info_id
+                       ) AS dwell
+                FROM {routing_table} r
+                JOIN affected a ON a.partition_id = r.{partition_col}
+            )
+            SELECT t.created_dt::date, t.department_id, t.from_step, {test_col},
+                   COUNT(*), SUM(EXTRACT(EPOCH FROM t.dwell)), MAX(EXTRACT(EPOCH FROM t.dwell))
+            FROM transitions t
+            {test_join}
+            WHERE t.dwell IS NOT NULL {transition_filter}
+            GROUP BY 1, 2, 3, 4
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, {"start_dt": start_dt})
+            return cursor.fetchall()
+
+    @staticmethod
+    def refresh_step_dwell_rollups():
+        """
+        Rebuilds the RoutingStepDailyRollup days from the previous refresh, less ROUTING_ROLLUP_OVERLAP_MINUTES,
+        to today. Rows are picked by created_dt rather than by id, and the trailing days are recomputed on
+        every run, so routing rows committed after a refresh that started before they were committed are still
+        counted. Dwell time is attributed to the day the step was left and its department.
+        """
+        with transaction.atomic():
+            state, _ = RoutingRollupState.objects.select_for_update().get_or_create(rollup_name=STEP_DWELL_ROLLUP)
+            now = timezone.now()
+            start_date = None
+            if state.refreshed_dt is not None:
+                overlap = timedelta(minutes=getattr(settings, 'ROUTING_ROLLUP_OVERLAP_MINUTES', 60))
+                start_date = (state.refreshed_dt - overlap).astimezone(dt_timezone.utc).date()
+
+            totals = {}
+            for partition_field in ('sample_id', 'report_option_id'):
+                for rollup_date, department_id, step, test_id, count, total_dwell, max_dwell in \
+                        RoutingAnalyticsUtilClass.fold_step_dwell(partition_field, start_date):
+                    key = (rollup_date, department_id, step, test_id)
+                    total = totals.setdefault(key, [0, 0.0, 0.0])
+                    total[0] += count
+                    total[1] += float(total_dwell or 0)
+                    total[2] = max(total[2], float(max_dwell or 0))
+
+            stale = RoutingStepDailyRollup.objects.all()
+            if start_date is not None:
+                stale = stale.filter(rollup_date__gte=start_date)
+            deleted, _ = stale.delete()
+            RoutingStepDailyRollup.objects.bulk_create([
+                RoutingStepDailyRollup(
+                    rollup_date=rollup_date, department_id=department_id, step=step, test_id_id=test_id,
+                    transition_count=count, total_dwell_seconds=total_dwell, max_dwell_seconds=max_dwell)
+                for (rollup_date, department_id, step, test_id), (count, total_dwell, max_dwell) in totals.items()
+            ])
+
+            state.refreshed_dt = now
+            state.save()
+
+        log.info(f"Routing rollups rebuilt from {start_date or 'the beginning'}: "
+                 f"{deleted} removed, {len(totals)} created")
+        return len(totals)
+
+    @staticmethod
+    def get_step_dwell_summary(start_date, end_date, group_by=('department', 'step'), **filters):
+        """
+        Average and max dwell time per group from the rollups, for dashboards and exports.
+        group_by may contain rollup_date, department, step and test_id; filters are passed to the rollup queryset.
+        """
+        return (
+            RoutingStepDailyRollup.objects.filter(rollup_date__range=(start_date, end_date), **filters)
+            .values(*group_by)
+            .annotate(transitions=Sum('transition_count'), total_dwell_seconds=Sum('total_dwell_seconds'),
+                      max_dwell_seconds=Max('max_dwell_seconds'))
+            .order_by(*group_by)
+        )
@@ -0,0 +1,384 @@
+import copy
+from collections import defaultdict, namedtuple
+from datetime import datetime
+
+from auditlog.models import LogEntry
+from django.apps import apps
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.utils import timezone
+
+from util.audit import AuditUtilClass
+from util.util import UtilClass as GenericUtilClass
+
+# Values of every workflow step row; WorkflowStep rows are annotated to the TestWorkflowStep shape
+STEP_FIELDS = (
+    'test_workflow_step_id',
+    'sample_type_id',
+    'container_type_id',
+    'test_id',
+    'workflow_id',
+    'workflow_step_id__workflow_step_id',
+    'workflow_step_id__workflow_id',
+    'workflow_step_id__step_id',
+    'workflow_step_id__step_no',
+    'workflow_step_id__department',
+)
+
+ROUTE_OK = 'routed'
+ROUTE_NO_TEST_MAP = 'no_test_map'
+ROUTE_NO_STEPS = 'no_steps'
+ROUTE_NO_NEXT_STEP = 'no_next_step'
+
+# One planned move of a sample or report option; changes holds {attname: value} to write
+RoutingPlanEntry = namedtuple('RoutingPlanEntry', ['obj', 'status', 'step', 'changes'])
+
+# Everything the plan phase reads, loaded up front with a fixed number of queries
+RoutingState = namedtuple('RoutingState', [
+    'objects', 'workflow_map', 'test_maps', 'root_samples', 'workflow_steps', 'test_workflow_steps',
+    'workflow_step_actions', 'test_workflow_step_actions', 'departments', 'slide_counts',
+])
+
+
+class RoutingExecutorUtilClass:
+    """
+    Routes samples (wet lab) and report options (dry lab) to their next workflow step in two phases.
+    load_*() reads the samples, their workflow steps, first step actions, departments and slide counts with a
+    fixed number of queries; plan_*() works out every move from those maps without touching the database, so it
+    also serves as a dry run for validation screens (see filter_valid_routing); apply() writes the moves with one
+    bulk_update per field set, one bulk_create of RoutingInfo rows and bulk audit entries.
+    """
+
+    @staticmethod
+    def get_site(request):
+        return request.session.get('currentjobtype', '').split('-')[0]
+
+    @staticmethod
+    def get_step_rows(workflow_type, workflow_ids, sample_type_ids, container_type_ids, test_ids,
+                      test_workflow_ids):
+        """
+        Returns ({workflow_id: steps}, {(sample_type_id, container_type_id, test_id, workflow_id): steps});
+        the steps of each key are sorted by step number.
+        """
+        WorkflowStep = apps.get_model('workflows', 'WorkflowStep')
+        TestWorkflowStep = apps.get_model('tests', 'TestWorkflowStep')
+
+        workflow_steps = defaultdict(list)
+        workflow_ids = {workflow_id for workflow_id in workflow_ids if workflow_id}
+        if workflow_ids:
+            for row in WorkflowStep.objects.filter(
+                    workflow_id__in=workflow_ids,
+                    workflow_type=workflow_type,
+            ).annotate(
+                test_workflow_step_id=Value(None, output_field=IntegerField()),
+                sample_type_id=Value(None, output_field=IntegerField()),
+                container_type_id=Value(None, output_field=IntegerField()),
+                test_id=Value(None, output_field=IntegerField()),
+                workflow_step_id__workflow_step_id=F('workflow_step_id'),
+                workflow_step_id__workflow_id=F('workflow_id'),
+                workflow_step_id__step_id=F('step_id'),
+                workflow_step_id__step_no=F('step_no'),
+                workflow_step_id__department=F('department'),
+            ).values(*STEP_FIELDS):
+                workflow_steps[row['workflow_id']].append(row)
+
+        test_workflow_steps = defaultdict(list)
+        test_workflow_ids = {workflow_id for workflow_id in test_workflow_ids if workflow_id}
+        if test_workflow_ids:
+            for row in TestWorkflowStep.objects.filter(
+                    sample_type_id__in=sample_type_ids,
+                    container_type_id__in=container_type_ids,
+                    test_id__in=test_ids,
+                    workflow_id__in=test_workflow_ids,
+                    workflow_step_id__workflow_id__in=test_workflow_ids,
+                    workflow_step_id__workflow_type=workflow_type,
+            ).values(*STEP_FIELDS):
+                test_workflow_steps[(row['sample_type_id'], row['container_type_id'], row['test_id'],
+                                     row['workflow_id'])].append(row)
+
+        for steps in list(workflow_steps.values()) + list(test_workflow_steps.values()):
+            steps.sort(key=lambda step: step['workflow_step_id__step_no'])
+        return workflow_steps, test_workflow_steps
+
+    @staticmethod
+    def get_first_actions(workflow_steps, test_workflow_steps):
+        """First action by sequence of each step, keyed by workflow_step_id and by test_workflow_step_id."""
+        TestWorkflowStepActionMap = apps.get_model('tests', 'TestWorkflowStepActionMap')
+
+        workflow_step_ids = {step['workflow_step_id__workflow_step_id']
+                             for steps in workflow_steps.values() for step in steps}
+        test_workflow_step_ids = {step['test_workflow_step_id']
+                                  for steps in test_workflow_steps.values() for step in steps}
+        workflow_step_actions = {}
+        test_workflow_step_actions = {}
+        if workflow_step_ids or test_workflow_step_ids:
+            for workflow_step_id, test_workflow_step_id, action in TestWorkflowStepActionMap.objects.filter(
+                    Q(workflow_step_id__in=workflow_step_ids) | Q(testwflwstepmap_id__in=test_workflow_step_ids)
+            ).order_by('sequence', 'pk').values_list('workflow_step_id', 'testwflwstepmap_id', 'action'):
+                if workflow_step_id is not None:
+                    workflow_step_actions.setdefault(workflow_step_id, action)
+                if test_workflow_step_id is not None:
+                    test_workflow_step_actions.setdefault(test_workflow_step_id, action)
+        return workflow_step_actions, test_workflow_step_actions
+
+    @staticmethod
+    def get_departments(site, workflow_steps, test_workflow_steps):
+        """{'<site>-<department>': department id} for the departments of the loaded steps."""
+        Department = apps.get_model('security', 'Department')
+
+        names = {f"{site}-{step['workflow_step_id__department']}"
+                 for steps in list(workflow_steps.values()) + list(test_workflow_steps.values()) for step in steps}
+        if not names:
+            return {}
+        return dict(Department.objects.filter(name__in=names).values_list('name', 'id'))
+
+    @staticmethod
+    def load_wetlab(sample_ids, site, with_slide_counts=False):
+        Sample = apps.get_model('sample', 'Sample')
+        SampleTestMap = apps.get_model('sample', 'SampleTestMap')
+
+        samples = list(Sample.objects.filter(sample_id__in=sample_ids).select_related('container_type').annotate(
+            effective_workflow_id=Case(
+                When(accession_sample_id__isnull=True, then=F('workflow_id')),
+                When(accession_sample_id__isnull=False, then=F('accession_sample__workflow_id')),
+                default=Value(None),
+                output_field=IntegerField()
+            )
+        ))
+        workflow_map = {sample.sample_id: sample.effective_workflow_id for sample in samples}
+
+        # First test map of each sample, and its non cancelled test maps as (total, Thin Prep) slide counts
+        test_maps = {}
+        slide_counts = defaultdict(lambda: [0, 0])
+        for sample_id, test_id, workflow_id, test_status, smear_process in SampleTestMap.objects.filter(
+                sample_id_id__in=workflow_map.keys()).order_by('pk').values_list(
+                'sample_id_id', 'test_id_id', 'workflow_id_id', 'test_status', 'test_id__smear_process'):
+            test_maps.setdefault(sample_id, (test_id, workflow_id))
+            if with_slide_counts and test_status != 'Cancelled':
+                slide_counts[sample_id][0] += 1
+                if smear_process == 'Thin Prep':
+                    slide_counts[sample_id][1] += 1
+
+        workflow_steps, test_workflow_steps = RoutingExecutorUtilClass.get_step_rows(
+            'WetLab',
+            workflow_map.values(),
+            {sample.sample_type_id for sample in samples},
+            {sample.container_type_id for sample in samples},
+            {test_id for test_id, _ in test_maps.values()},
+            {workflow_id for _, workflow_id in test_maps.values()},
+        )
+        workflow_step_actions, test_workflow_step_actions = RoutingExecutorUtilClass.get_first_actions(
+            workflow_steps, test_workflow_steps)
+        return RoutingState(
+            objects=samples,
+            workflow_map=workflow_map,
+            test_maps=test_maps,
+            root_samples={},
+            workflow_steps=workflow_steps,
+            test_workflow_steps=test_workflow_steps,
+            workflow_step_actions=workflow_step_actions,
+            test_workflow_step_actions=test_workflow_step_actions,
+            departments=RoutingExecutorUtilClass.get_departments(site, workflow_steps, test_workflow_steps),
+            slide_counts=slide_counts,
+        )
+
+    @staticmethod
+    def load_drylab(report_options, report_option_ids, site):
+        ReportOption = apps.get_model('analysis', 'ReportOption')
+        Sample = apps.get_model('sample', 'Sample')
+        SampleTestMap = apps.get_model('sample', 'SampleTestMap')
+
+        workflow_map = dict(ReportOption.objects.filter(
+            report_option_id__in=report_option_ids).values_list('report_option_id', 'workflow_id'))
+        root_sample_ids = {report_option.root_sample_id_id for report_option in report_options}
+        test_ids = {report_option.test_id_id for report_option in report_options}
+        root_samples = {sample_id: (sample_type_id, container_type_id)
+                        for sample_id, sample_type_id, container_type_id in Sample.objects.filter(
+                            sample_id__in=root_sample_ids).values_list(
+                            'sample_id', 'sample_type_id', 'container_type_id')}
+
+        # First test map of each (root sample, test)
+        test_maps = {}
+        for sample_id, test_id, workflow_id in SampleTestMap.objects.filter(
+                sample_id_id__in=root_sample_ids, test_id_id__in=test_ids).order_by('pk').values_list(
+                'sample_id_id', 'test_id_id', 'workflow_id_id'):
+            test_maps.setdefault((sample_id, test_id), (test_id, workflow_id))
+
+        workflow_steps, test_workflow_steps = RoutingExecutorUtilClass.get_step_rows(
+            'DryLab',
+            workflow_map.values(),
+            {sample_type_id for sample_type_id, _ in root_samples.values()},
+            {container_type_id for _, container_type_id in root_samples.values()},
+            test_ids,
+            {workflow_id for _, workflow_id in test_maps.values()},
+        )
+        workflow_step_actions, test_workflow_step_actions = RoutingExecutorUtilClass.get_first_actions(
+            workflow_steps, test_workflow_steps)
+        return RoutingState(
+            objects=report_options,
+            workflow_map=workflow_map,
+            test_maps=test_maps,
+            root_samples=root_samples,
+            workflow_steps=workflow_steps,
+            test_workflow_steps=test_workflow_steps,
+            workflow_step_actions=workflow_step_actions,
+            test_workflow_step_actions=test_workflow_step_actions,
+            departments=RoutingExecutorUtilClass.get_departments(site, workflow_steps, test_workflow_steps),
+            slide_counts={},
+        )
+
+    @staticmethod
+    def find_steps(state, workflow_id, test_map_key, sample_type_id, container_type_id):
+        """Returns (ROUTE_OK, sorted steps) or (reason, None) for the object being planned."""
+        if workflow_id:
+            steps = state.workflow_steps.get(workflow_id)
+        else:
+            test_map = state.test_maps.get(test_map_key)
+            if test_map is None:
+                return ROUTE_NO_TEST_MAP, None
+            test_id, test_workflow_id = test_map
+            steps = state.test_workflow_steps.get((sample_type_id, container_type_id, test_id, test_workflow_id))
+        if not steps:
+            return ROUTE_NO_STEPS, None
+        return ROUTE_OK, steps
+
+    @staticmethod
+    def next_steps(sorted_steps, current_step):
+        """Returns (previous_step, step to move to, following step), or None when there is no step to move to."""
+        if not current_step:
+            return None, sorted_steps[0], sorted_steps[1] if len(sorted_steps) > 1 else None
+        index = next((i for i, step in enumerate(sorted_steps) if step['workflow_step_id__step_id'] == current_step),
+                     None)
+        if index is None or index == len(sorted_steps) - 1:
+            return None
+        return (current_step, sorted_steps[index + 1],
+                sorted_steps[index + 2] if index + 2 < len(sorted_steps) else None)
+
+    @staticmethod
+    def plan_move(state, obj, workflow_id, steps, site):
+        """Common step, action and department changes of one object; returns (step, action, changes) or None."""
+        moves = RoutingExecutorUtilClass.next_steps(steps, obj.current_step)
+        if moves is None:
+            return None
+        previous_step, step, next_step = moves
+        if workflow_id:
+            action = state.workflow_step_actions.get(step['workflow_step_id__workflow_step_id'])
+        else:
+            action = state.test_workflow_step_actions.get(step['test_workflow_step_id'])
+        changes = {
+            'pending_action': action,
+            'previous_step': previous_step,
+            'current_step': step['workflow_step_id__step_id'],
+            'next_step': next_step['workflow_step_id__step_id'] if next_step else None,
+            'custodial_department_id': state.departments.get(f"{site}-{step['workflow_step_id__department']}"),
+            'avail_at': datetime.now(),
+        }
+        return step, action, changes
+
+    @staticmethod
+    def plan_wetlab(state, site, user_id, accession_flag):
+        """Plans the move of every loaded sample; does not touch the database."""
+        plan = []
+        for sample in state.objects:
+            workflow_id = state.workflow_map.get(sample.sample_id)
+            status, steps = RoutingExecutorUtilClass.find_steps(
+                state, workflow_id, sample.sample_id, sample.sample_type_id, sample.container_type_id)
+            if steps is None:
+                plan.append(RoutingPlanEntry(sample, status, None, {}))
+                continue
+            move = RoutingExecutorUtilClass.plan_move(state, sample, workflow_id, steps, site)
+            if move is None:
+                plan.append(RoutingPlanEntry(sample, ROUTE_NO_NEXT_STEP, None, {}))
+                continue
+            step, action, changes = move
+            changes['custodial_user_id'] = user_id
+            if accession_flag == 'Y':
+                changes['accession_generated'] = True
+                changes['sample_status'] = 'In-progress'
+                # Default population of num_of_blocks and num_of_slides for samples being routed to Grossing
+                if step['workflow_step_id__step_id'] == 'Grossing' and sample.container_type:
+                    total, thin_prep = state.slide_counts.get(sample.sample_id, (0, 0))
+                    changes['num_of_blocks'] = 1
+                    if sample.container_type.is_liquid == 'Y':
+                        changes['num_of_manualsmear_slides'] = total - thin_prep
+                        changes['num_of_thinprep_slides'] = thin_prep
+                    else:
+                        changes['num_of_slides'] = total
+            if action == 'MoveToStorage':
+                changes['previous_step'] = step['workflow_step_id__step_id']
+                changes['current_step'] = 'Storage'
+                changes['next_step'] = None
+            plan.append(RoutingPlanEntry(sample, ROUTE_OK, step, changes))
+        return plan
+
+    @staticmethod
+    def plan_drylab(state, site):
+        """Plans the move of every loaded report option; does not touch the database."""
+        plan = []
+        for report_option in state.objects:
+            workflow_id = state.workflow_map.get(report_option.report_option_id)
+            sample_type_id, container_type_id = state.root_samples.get(report_option.root_sample_id_id,
+                                                                       (None, None))
+            status, steps = RoutingExecutorUtilClass.find_steps(
+                state, workflow_id, (report_option.root_sample_id_id, report_option.test_id_id), sample_type_id,
+                container_type_id)
+            if steps is None:
+                plan.append(RoutingPlanEntry(report_option, status, None, {}))
+                continue
+            move = RoutingExecutorUtilClass.plan_move(state, report_option, workflow_id, steps, site)
+            if move is None:
+                plan.append(RoutingPlanEntry(report_option, ROUTE_NO_NEXT_STEP, None, {}))
+                continue
+            step, _, changes = move
+            plan.append(RoutingPlanEntry(report_option, ROUTE_OK, step, changes))
+        return plan
+
+    @staticmethod
+    def describe(plan):
+        """Dry run output: one dict per planned object."""
+        return [{
+            'id': entry.obj.pk,
+            'status': entry.status,
+            'from_step': entry.obj.current_step,
+            'to_step': entry.changes.get('current_step'),
+            'next_step': entry.changes.get('next_step'),
+            'pending_action': entry.changes.get('pending_action'),
+            'custodial_department_id': entry.changes.get('custodial_department_id'),
+        } for entry in plan]
+
+    @staticmethod
+    def apply(plan, actor=None):
+        """
+        Writes the routed entries of a plan and returns them. Must run inside the caller's transaction.
+        Like Sample.save(), raises ValueError when a sample holds an invalid reference value.
+        """
+        entries = [entry for entry in plan if entry.status == ROUTE_OK]
+        if not entries:
+            return []
+        model = entries[0].obj._meta.model
+        is_sample = model._meta.model_name == 'sample'
+
+        originals = {}
+        changed_rows = []
+        groups = defaultdict(list)
+        now = timezone.now()
+        for entry in entries:
+            obj = entry.obj
+            originals[obj.pk] = copy.copy(obj)
+            for attname, value in entry.changes.items():
+                setattr(obj, attname, value)
+            obj.mod_dt = now
+            if is_sample:
+                obj.validate_reference_fields()
+            fields = [model._meta.get_field(attname).name for attname in entry.changes] + ['mod_dt']
+            groups[tuple(fields)].append(obj)
+            changed_rows.append((originals[obj.pk], obj, fields))
+
+        for fields, objs in groups.items():
+            model.objects.bulk_update(objs, list(fields))
+        AuditUtilClass.bulk_log(LogEntry.Action.UPDATE, changed_rows, actor)
+        routed = [entry.obj for entry in entries]
+        if is_sample:
+            GenericUtilClass.createRoutingInfoForSample(routed, old_samples=originals)
+        else:
+            GenericUtilClass.createRoutingInfoForReportOption(routed, old_reportoption=originals)
+        return entries
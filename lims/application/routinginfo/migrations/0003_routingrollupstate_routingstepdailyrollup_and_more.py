@@ -0,0 +1,69 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('security', '0019_alter_userprinterinfo_options'),
+        ('tests', '0023_testworkflowstepactionmap_workflow_step_id_and_more'),
+        ('routinginfo', '0002_routinginfo_report_option_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoutingRollupState',
+            fields=[
+                ('rollup_name', models.CharField(max_length=40, primary_key=True, serialize=False, verbose_name='Rollup Name')),
+                ('last_routing_info_id', models.IntegerField(default=0, verbose_name='Last Routing Info Id')),
+                ('refreshed_dt', models.DateTimeField(blank=True, null=True, verbose_name='Refreshed DateTime')),
+            ],
+            options={
+                'verbose_name': 'Routing Rollup State',
+                'verbose_name_plural': 'Routing Rollup State',
+            },
+        ),
+        migrations.CreateModel(
+            name='RoutingStepDailyRollup',
+            fields=[
+                ('rollup_id', models.AutoField(primary_key=True, serialize=False, verbose_name='Rollup Id')),
+                ('rollup_date', models.DateField(verbose_name='Date')),
+                ('step', models.CharField(blank=True, max_length=40, null=True, verbose_name='Step')),
+                ('transition_count', models.IntegerField(default=0, verbose_name='Transitions')),
+                ('total_dwell_seconds', models.FloatField(default=0, verbose_name='Total Dwell (sec)')),
+                ('max_dwell_seconds', models.FloatField(default=0, verbose_name='Max Dwell (sec)')),
+            ],
+            options={
+                'verbose_name': 'Routing Step Daily Rollup',
+                'verbose_name_plural': 'Routing Step Daily Rollups',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='routinginfo',
+            index=models.Index(fields=['sample_id', 'created_dt'], name='routinginfo_sample_dt_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='routinginfo',
+            index=models.Index(fields=['report_option_id', 'created_dt'], name='routinginfo_ro_dt_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='routinginfo',
+            index=models.Index(fields=['created_dt'], name='routinginfo_created_dt_idx'),
+        ),
+        migrations.AddField(
+            model_name='routingstepdailyrollup',
+            name='department',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.RESTRICT, to='security.department', verbose_name='Department'),
+        ),
+        migrations.AddField(
+            model_name='routingstepdailyrollup',
+            name='test_id',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.RESTRICT, to='tests.test', verbose_name='Test'),
+        ),
+        migrations.AddIndex(
+            model_name='routingstepdailyrollup',
+            index=models.Index(fields=['rollup_date', 'department', 'step'], name='routingrollup_date_dept_idx'),
+        ),
+    ]
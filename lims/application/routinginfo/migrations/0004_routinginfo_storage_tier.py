@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routinginfo', '0003_routingrollupstate_routingstepdailyrollup_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='routinginfo',
+            name='storage_tier',
+            field=models.CharField(choices=[('hot', 'Hot'), ('cold', 'Cold')], default='hot', editable=False, max_length=10, verbose_name='Storage Tier'),
+        ),
+    ]
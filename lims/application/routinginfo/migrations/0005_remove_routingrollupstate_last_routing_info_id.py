@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:29
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routinginfo', '0004_routinginfo_storage_tier'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='routingrollupstate',
+            name='last_routing_info_id',
+        ),
+    ]
@@ -3,6 +3,8 @@ from django.db import models
 from analysis.models import ReportOption
 from security.models import Department, User
 from sample.models import Sample
+from tests.models import Test
+from util.storagetier import STORAGE_TIER_CHOICES, STORAGE_TIER_HOT
 from auditlog.models import AuditlogHistoryField
 from auditlog.registry import auditlog
 from django.utils.translation import gettext_lazy as _
@@ -29,6 +31,8 @@ class RoutingInfo(models.Model):
     from_storage = models.CharField(max_length=40, null=True, blank=True, verbose_name="From Storage")
     to_storage = models.CharField(max_length=40, null=True, blank=True,
                                   verbose_name="To Storage")
+    storage_tier = models.CharField(max_length=10, choices=STORAGE_TIER_CHOICES, default=STORAGE_TIER_HOT,
+                                    editable=False, verbose_name="Storage Tier")
     created_dt = models.DateTimeField(
         auto_now_add=True,
         verbose_name=_('Created DateTime'), null=False, blank=False)
@@ -46,9 +50,52 @@ class RoutingInfo(models.Model):
     class Meta:
         verbose_name = _("Routing Info")
         verbose_name_plural = _("Routing Info")
+        indexes = [
+            models.Index(fields=['sample_id', 'created_dt'], name='routinginfo_sample_dt_idx'),
+            models.Index(fields=['report_option_id', 'created_dt'], name='routinginfo_ro_dt_idx'),
+            models.Index(fields=['created_dt'], name='routinginfo_created_dt_idx'),
+        ]
 
     def __str__(self):
         return str(self.routing_info_id)
 
 
+class RoutingStepDailyRollup(models.Model):
+    rollup_id = models.AutoField(primary_key=True, verbose_name="Rollup Id")
+    rollup_date = models.DateField(verbose_name="Date")
+    department = models.ForeignKey(Department, on_delete=models.RESTRICT, null=True, blank=True,
+                                   verbose_name="Department")
+    step = models.CharField(max_length=40, null=True, blank=True, verbose_name="Step")
+    test_id = models.ForeignKey(Test, on_delete=models.RESTRICT, null=True, blank=True, verbose_name="Test")
+    transition_count = models.IntegerField(default=0, verbose_name="Transitions")
+    total_dwell_seconds = models.FloatField(default=0, verbose_name="Total Dwell (sec)")
+    max_dwell_seconds = models.FloatField(default=0, verbose_name="Max Dwell (sec)")
+
+    class Meta:
+        verbose_name = _("Routing Step Daily Rollup")
+        verbose_name_plural = _("Routing Step Daily Rollups")
+        indexes = [
+            models.Index(fields=['rollup_date', 'department', 'step'], name='routingrollup_date_dept_idx'),
+        ]
+
+    @property
+    def avg_dwell_seconds(self):
+        return self.total_dwell_seconds / self.transition_count if self.transition_count else 0
+
+    def __str__(self):
+        return f"{self.rollup_date} {self.step}"
+
+
+class RoutingRollupState(models.Model):
+    rollup_name = models.CharField(max_length=40, primary_key=True, verbose_name="Rollup Name")
+    refreshed_dt = models.DateTimeField(null=True, blank=True, verbose_name="Refreshed DateTime")
+
+    class Meta:
+        verbose_name = _("Routing Rollup State")
+        verbose_name_plural = _("Routing Rollup State")
+
+    def __str__(self):
+        return self.rollup_name
+
+
 auditlog.register(RoutingInfo)
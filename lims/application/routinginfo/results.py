@@ -0,0 +1,50 @@
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import format_html
+
+
+class RoutingResultUtilClass:
+    """
+    Outcome of a routing run ({id, step} per routed sample or report option), kept in the shared cache for
+    ROUTING_RESULT_CACHE_TIMEOUT under the user and a run id. The routing message only carries the counts and a
+    link to the paged results view, so the session payload stays small whatever the size of the run.
+    """
+
+    @staticmethod
+    def get_cache_key(user_id, run_id):
+        return f"routing_result_{user_id}_{run_id}"
+
+    @staticmethod
+    def store(user_id, results, id_key, title, id_label):
+        """Stores the (id, step) rows of a run and returns the run id."""
+        run_id = uuid.uuid4().hex
+        cache.set(RoutingResultUtilClass.get_cache_key(user_id, run_id), {
+            'title': title,
+            'id_label': id_label,
+            'created_at': timezone.now(),
+            'rows': [(result[id_key], result['current_step']) for result in results],
+        }, timeout=settings.ROUTING_RESULT_CACHE_TIMEOUT)
+        return run_id
+
+    @staticmethod
+    def get(user_id, run_id):
+        """The stored run, or None once it has expired or when it belongs to another user."""
+        return cache.get(RoutingResultUtilClass.get_cache_key(user_id, run_id))
+
+    @staticmethod
+    def record(request, results, id_key='sample_id', title="Routed samples", id_label="Sample ID"):
+        """Stores a routing run and returns the message to show for it: counts per step and a results link."""
+        run_id = RoutingResultUtilClass.store(request.user.id, results, id_key, title, id_label)
+        step_counts = Counter(result['current_step'] for result in results)
+        return format_html(
+            '<strong>{}:</strong> {} routed ({}). <a href="{}">View routing results</a>',
+            title,
+            len(results),
+            ", ".join(f"{step}: {count}" for step, count in step_counts.most_common()),
+            reverse("controllerapp:routing_results", args=[run_id]),
+        )
@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from routinginfo.analytics import RoutingAnalyticsUtilClass
+
+
+@shared_task
+def refresh_routing_rollups():
+    # Scheduled from django_celery_beat periodic tasks
+    return RoutingAnalyticsUtilClass.refresh_step_dwell_rollups()
@@ -1,3 +1,46 @@
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
 from django.shortcuts import render
+from django.utils.decorators import method_decorator
+from django.utils.translation import gettext as _
+from django.views import View
 
-# Create your views here.
+from routinginfo.results import RoutingResultUtilClass
+
+
+class RoutingResultView(View):
+    """Paged view of one routing run of the current user, filterable by id and by step."""
+    template_name = "admin/routing_results.html"
+    title = _("Routing Results")
+    extra_context = None
+
+    @method_decorator(login_required)
+    def dispatch(self, *args, **kwargs):
+        return super().dispatch(*args, **kwargs)
+
+    def get(self, request, run_id):
+        result = RoutingResultUtilClass.get(request.user.id, run_id)
+        context = {
+            "title": self.title,
+            "subtitle": None,
+            **(self.extra_context or {}),
+            "result": result,
+        }
+        if result is not None:
+            query = request.GET.get('q', '').strip()
+            step = request.GET.get('step', '')
+            rows = result['rows']
+            if query:
+                rows = [row for row in rows if query.lower() in str(row[0]).lower()]
+            if step:
+                rows = [row for row in rows if row[1] == step]
+            context.update({
+                "page_obj": Paginator(rows, settings.ROUTING_RESULT_PAGE_SIZE).get_page(request.GET.get('page')),
+                "total": len(result['rows']),
+                "matched": len(rows),
+                "steps": sorted({str(row[1]) for row in result['rows']}),
+                "q": query,
+                "step": step,
+            })
+        return render(request, self.template_name, context)
@@ -17,6 +17,7 @@ from import_export.formats import base_formats
 
 from controllerapp.views import controller
 from reporting.models import ContainerTypeLabelMethodMap, ContainerTypePharmaLabelMethodMap
+from routinginfo.results import RoutingResultUtilClass
 from routinginfo.util import UtilClass as RoutingUtilClass
 from sample.forms import SampleForm
 from sample.models import Sample, SampleTestMap, HistoricalSample, StoredSample
@@ -24,6 +25,7 @@ from security.models import User, JobType
 from tests.models import WorkflowStepConfigField
 from util.actions import GenericAction
 from util.admin import TZIndependentAdmin, GulfModelAdmin
+from util.storagetier import STORAGE_TIER_HOT, StorageTierUtilClass
 from util.util import GenerateLabel, UtilClass as CommonUtilClass, \
     get_user_printer_selection_data
 from workflows.models import WorkflowStep
@@ -62,36 +64,8 @@ def execute_routing(self, request, queryset):
     if sample_ids:
         success_samples = RoutingUtilClass.process_workflow_steps_wetlab(self, request, sample_ids, accession_flag='N')
         if success_samples:
-            table_rows = "".join(
-                [f"<tr><td>{sample['sample_id']}</td><td>{sample['current_step']}</td></tr>" for sample in
-                 success_samples]
-            )
-
-            message = f"""
-               <p><strong>Routed samples to below step:</strong></p>
-                        <button onclick="toggleTable()" style="margin-bottom: 10px; padding: 5px 10px; background-color: #007bff; color: white; border: none; cursor: pointer; border-radius: 5px;">
-                            Expand/Collapse
-                        </button>
-                        <div id="sampleTable" style="display: none;">
-                            <table border="1" cellpadding="2" cellspacing="0" style="border-collapse: collapse; width: 50%;">
-                                <tr><th>Sample ID</th><th>Next Step</th></tr>
-                                {table_rows}
-                            </table>
-                        </div>
-
-
-                    <script>
-                        function toggleTable() {{
-                            var table = document.getElementById("sampleTable");
-                            if (table.style.display === "none") {{
-                                table.style.display = "block";
-                            }} else {{
-                                table.style.display = "none";
-                            }}
-                        }}
-                    </script>
-                """
-            self.message_user(request, mark_safe(message), level="INFO")
+            message = RoutingResultUtilClass.record(request, success_samples, title="Routed samples")
+            self.message_user(request, message, level="INFO")
 
     else:
         self.message_user(request, "No sample(s) found")
@@ -276,10 +250,10 @@ class SampleAdmin(TZIndependentAdmin, GulfModelAdmin):
             return queryset
 
         """Override to filter samples based on user's department."""
-        qs = super().get_queryset(request).exclude(isvisible=False)
+        qs = super().get_queryset(request).exclude(isvisible=False).filter(storage_tier=STORAGE_TIER_HOT)
         qs = qs.exclude(pending_action='MoveToStorage') \
             .filter(custodial_storage_id__isnull=True) \
-            .exclude(sample_status__in=['Completed', 'Cancelled']).prefetch_related('sampletestmap_set__test_id')
+            .exclude(sample_status__in=['Completed', 'Cancelled']).prefetch_related(StorageTierUtilClass.hot_test_maps())
         if request.user.is_superuser:
             return qs.order_by(
                 'accession_id',
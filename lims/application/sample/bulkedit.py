@@ -0,0 +1,67 @@
+import copy
+from collections import defaultdict
+
+from auditlog.models import LogEntry
+from django.db import transaction
+from django.utils import timezone
+
+from util.audit import AuditUtilClass
+from util.util import UtilClass
+
+
+class SampleBulkEditUtilClass:
+    """
+    Persistence for the Sample and IHC bulk edit formsets. Instead of Sample.save() per row (re-SELECT,
+    reference validation, full UPDATE, routing insert), the rows are diffed against the instances loaded for
+    the formset and only changed columns are written with one bulk_update per changed field set.
+    Audit log and routing entries are written with bulk_create. Reference validation is unchanged.
+    """
+
+    @staticmethod
+    def snapshot(formset):
+        # Must be taken before is_valid(): cleaning writes the submitted values into the loaded instances
+        return {obj.pk: copy.copy(obj) for obj in formset.get_queryset()}
+
+    @staticmethod
+    def get_changed_fields(old, new):
+        return [field.name for field in new._meta.concrete_fields
+                if not field.primary_key and not (field.remote_field and field.remote_field.parent_link)
+                and getattr(old, field.attname) != getattr(new, field.attname)]
+
+    @staticmethod
+    def save_formset(formset, originals, actor=None):
+        """
+        Saves a valid bulk edit formset. originals is the snapshot() taken before validation.
+        Raises ValueError, as Sample.save() does, when a reference field holds an invalid value;
+        nothing is written in that case. Returns the number of changed rows.
+        """
+        model = formset.model
+        instances = [form.save(commit=False) for form in formset.forms if form.instance.pk is not None]
+
+        for instance in instances:
+            instance.validate_reference_fields()
+
+        changed_rows = []
+        groups = defaultdict(list)
+        now = timezone.now()
+        for instance in instances:
+            old = originals.get(instance.pk)
+            if old is None:
+                continue
+            changed_fields = SampleBulkEditUtilClass.get_changed_fields(old, instance)
+            if changed_fields:
+                # bulk_update skips pre_save, so auto_now is set here as formset.save() would
+                instance.mod_dt = now
+                changed_rows.append((old, instance, changed_fields))
+                groups[tuple(changed_fields)].append(instance)
+
+        if not changed_rows:
+            return 0
+
+        with transaction.atomic():
+            for changed_fields, group in groups.items():
+                model.objects.bulk_update(group, [field for field in changed_fields if field != 'mod_dt'] + ['mod_dt'])
+            AuditUtilClass.bulk_log(LogEntry.Action.UPDATE, changed_rows, actor)
+            UtilClass.createRoutingInfoForSample([new for _, new, _ in changed_rows], old_samples=originals)
+
+        return len(changed_rows)
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:06
+
+from django.db import migrations, models
+
+
+def backfill_sample_kind(apps, schema_editor):
+    # Samples that already have a child row take the kind of that child model
+    Sample = apps.get_model('sample', 'Sample')
+    for app_label, model_name in (('ihcworkflow', 'IhcWorkflow'), ('cytoworkflow', 'CytoWorkflow')):
+        child_model = apps.get_model(app_label, model_name)
+        Sample.objects.filter(
+            sample_id__in=child_model.objects.values('sample_ptr_id')
+        ).update(sample_kind=child_model._meta.model_name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ihcworkflow', '0004_ihcworkflow_staining_status_and_more'),
+        ('cytoworkflow', '0002_alter_cytoworkflow_options'),
+        ('sample', '0012_sample_workflow_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sample',
+            name='sample_kind',
+            field=models.CharField(db_index=True, default='sample', editable=False, max_length=40, verbose_name='Sample Kind'),
+        ),
+        migrations.RunPython(backfill_sample_kind, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sample', '0013_sample_kind'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sample',
+            name='storage_tier',
+            field=models.CharField(choices=[('hot', 'Hot'), ('cold', 'Cold')], default='hot', editable=False, max_length=10, verbose_name='Storage Tier'),
+        ),
+        migrations.AddField(
+            model_name='sampletestmap',
+            name='storage_tier',
+            field=models.CharField(choices=[('hot', 'Hot'), ('cold', 'Cold')], default='hot', editable=False, max_length=10, verbose_name='Storage Tier'),
+        ),
+        migrations.AddIndex(
+            model_name='sample',
+            index=models.Index(condition=models.Q(('storage_tier', 'hot')), fields=['custodial_department', 'accession_id'], name='sample_hot_worklist_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sampletestmap',
+            index=models.Index(condition=models.Q(('storage_tier', 'hot')), fields=['sample_id'], name='sampletestmap_hot_sample_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:33
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sample', '0014_sample_storage_tier_sampletestmap_storage_tier_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='sampletestmap',
+            name='sampletestmap_hot_sample_idx',
+        ),
+    ]
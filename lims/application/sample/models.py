@@ -8,6 +8,8 @@ from auditlog.registry import auditlog
 
 from controllerapp import settings
 from util.util import UtilClass
+from util.storagetier import STORAGE_TIER_CHOICES, STORAGE_TIER_COLD, STORAGE_TIER_HOT, TERMINAL_SAMPLE_STATUSES, \
+    StorageTierQuerySet, StorageTierUtilClass
 from datetime import datetime
 from django.apps import apps
 import workflows
@@ -18,6 +20,55 @@ from django.db import connection
 
 from workflows.models import Workflow
 
+# Sample.sample_kind of rows that have no multi-table child (IhcWorkflow, CytoWorkflow ...)
+SAMPLE_KIND_BASE = 'sample'
+
+
+class SampleQuerySet(StorageTierQuerySet):
+    """
+    Kind lookups on the indexed sample_kind discriminator: one query against sample_sample answers what kind of
+    sample an ID is, instead of probing each child table.
+    """
+    status_field = 'sample_status'
+    rewarm = staticmethod(StorageTierUtilClass.rewarm_samples)
+
+    @staticmethod
+    def get_kind_models():
+        # sample_kind -> concrete model; proxies (HistoricalSample, StoredSample) share the kind of their base
+        return {model._meta.model_name: model for model in apps.get_models()
+                if issubclass(model, Sample) and not model._meta.proxy}
+
+    def of_kind(self, *kinds):
+        return self.filter(sample_kind__in=kinds)
+
+    def resolve_kinds(self, sample_ids):
+        """Returns {sample_id: sample_kind} for the given IDs; unknown IDs are left out."""
+        return dict(Sample._base_manager.filter(sample_id__in=list(sample_ids)).values_list('sample_id', 'sample_kind'))
+
+    def group_by_model(self, sample_ids):
+        """Returns {model class: [sample_id, ...]} for the given IDs, using the most specific model of each."""
+        kind_models = self.get_kind_models()
+        model_map = {}
+        for sample_id, kind in self.resolve_kinds(sample_ids).items():
+            model_map.setdefault(kind_models.get(kind, Sample), []).append(sample_id)
+        return model_map
+
+    def attach_kind(self, model, sample_ids):
+        """
+        Turns existing samples into `model` samples: inserts the child table rows and records the new kind.
+        Already attached samples are left as they are.
+        """
+        sample_ids = list(dict.fromkeys(sample_ids))
+        if not sample_ids:
+            return
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f"INSERT INTO {model._meta.db_table} ({model._meta.pk.column}) VALUES (%s) "
+                    f"ON CONFLICT DO NOTHING",
+                    [(sample_id,) for sample_id in sample_ids])
+            Sample._base_manager.filter(sample_id__in=sample_ids).update(sample_kind=model._meta.model_name)
+
 
 class Sample(models.Model):
     sample_id = models.CharField(primary_key=True, max_length=40,
@@ -93,12 +144,23 @@ class Sample(models.Model):
     isvisible = models.BooleanField(null=True, verbose_name="Is visible")
     smearing_process = models.CharField(max_length=20, null=True, blank=True, verbose_name="Smearing Process")
     label_count = models.IntegerField(verbose_name="Label Events", default=0)
+    sample_kind = models.CharField(max_length=40, default=SAMPLE_KIND_BASE, editable=False, db_index=True,
+                                   verbose_name="Sample Kind")
+    storage_tier = models.CharField(max_length=10, choices=STORAGE_TIER_CHOICES, default=STORAGE_TIER_HOT,
+                                    editable=False, verbose_name="Storage Tier")
 
     history = AuditlogHistoryField()
 
+    objects = SampleQuerySet.as_manager()
+
     class Meta:
         verbose_name = _("Sample")
         verbose_name_plural = _("Samples")
+        indexes = [
+            # Active worklists: department filter and accession ordering over hot rows only
+            models.Index(fields=['custodial_department', 'accession_id'], name='sample_hot_worklist_idx',
+                         condition=models.Q(storage_tier=STORAGE_TIER_HOT)),
+        ]
 
     def __str__(self):
         return str(self.sample_id)
@@ -106,6 +168,29 @@ class Sample(models.Model):
     def natural_key(self):
         return self.sample_id
 
+    @staticmethod
+    def validate_reference_value(field_value, setting_name, field_name):
+        # Only perform validation if a value is provided
+        if field_value:
+            required_reftype = getattr(settings, setting_name, None)
+            if required_reftype is None:
+                raise ValueError(f"Setting {setting_name} is not defined.")
+
+            ref_values = UtilClass.get_refvalues_for_field(required_reftype)
+            if not ref_values:
+                raise ValueError(f"No reference values found for {setting_name}.")
+
+            valid_choices = {choice[0] for choice in ref_values}
+            if field_value and field_value not in valid_choices:
+                valid_display_choices = [choice[1] for choice in ref_values]
+                raise ValueError(
+                    f"Entered value for {field_name} is invalid. Valid options are {valid_display_choices}.")
+
+    def validate_reference_fields(self):
+        # Shared by save() and SampleBulkEditUtilClass
+        # Sample.validate_reference_value(self.gross_code, 'APPLICATION_GROSS_CODE_REFERENCE', 'Gross Code')
+        Sample.validate_reference_value(self.descriptive, 'APPLICATION_DESCRIPTIVE_REFERENCE', 'Descriptive')
+
     def save(self, *args, **kwargs):
         is_macro_creation = kwargs.pop('is_macro_creation', False)
         Sample = apps.get_model('sample', 'Sample')
@@ -130,27 +215,20 @@ class Sample(models.Model):
                 seq_no = UtilClass.get_next_sequence(prefix, model_name, self.created_by.id)
                 self.sample_id = f"{prefix}-{seq_no:05}"
 
+        concrete_model = self._meta.concrete_model
+        if concrete_model is not Sample:
+            self.sample_kind = concrete_model._meta.model_name
+
         with transaction.atomic():
-            def validate_field(field_value, setting_name, field_name):
-                # Only perform validation if a value is provided
-                if field_value:
-                    required_reftype = getattr(settings, setting_name, None)
-                    if required_reftype is None:
-                        raise ValueError(f"Setting {setting_name} is not defined.")
-
-                    ref_values = UtilClass.get_refvalues_for_field(required_reftype)
-                    if not ref_values:
-                        raise ValueError(f"No reference values found for {setting_name}.")
-
-                    valid_choices = {choice[0] for choice in ref_values}
-                    if field_value and field_value not in valid_choices:
-                        valid_display_choices = [choice[1] for choice in ref_values]
-                        raise ValueError(
-                            f"Entered value for {field_name} is invalid. Valid options are {valid_display_choices}.")
-
-            # validate_field(self.gross_code, 'APPLICATION_GROSS_CODE_REFERENCE', 'Gross Code')
-            validate_field(self.descriptive, 'APPLICATION_DESCRIPTIVE_REFERENCE', 'Descriptive')
+            self.validate_reference_fields()
+            if is_update:
+                # The tier is taken from the row, so a stale in-memory 'hot' cannot overwrite a cold row
+                self.storage_tier = Sample._base_manager.filter(pk=self.pk).values_list(
+                    'storage_tier', flat=True).first() or self.storage_tier
             super().save(*args, **kwargs)
+            if self.storage_tier == STORAGE_TIER_COLD and self.sample_status not in TERMINAL_SAMPLE_STATUSES:
+                StorageTierUtilClass.rewarm_samples([self.pk])
+                self.storage_tier = STORAGE_TIER_HOT
 
         if is_update:
             UtilClass.createRoutingInfoForSample(
@@ -208,6 +286,8 @@ class SampleTestMap(models.Model):
                                     on_delete=models.RESTRICT,
                                     verbose_name="Workflow ID")
     microtomy_completed = models.BooleanField(null=True, verbose_name="Is Microtomy Completed")
+    storage_tier = models.CharField(max_length=10, choices=STORAGE_TIER_CHOICES, default=STORAGE_TIER_HOT,
+                                    editable=False, verbose_name="Storage Tier")
     history = AuditlogHistoryField()
 
     class Meta:
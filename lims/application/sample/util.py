@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from django.apps import apps
 from django.db.models import Case, When, Value, IntegerField, F
 
@@ -9,8 +11,10 @@ from datetime import datetime
 from process.models import SampleType, ContainerType
 from security.models import User, Department, JobType
 from accessioning.models import Accession
-from tests.models import Test, TestWorkflowStep
+from tests.models import Test
+from tests.util import TestWorkflowResolutionUtilClass
 from sample.models import SampleTestMap
+from logutil.log import log
 
 
 class SampleUtilClass:
@@ -18,16 +22,16 @@ class SampleUtilClass:
     @staticmethod
     def create_sample(accession_id, sample_type_id, container_type_id, count, test_id, request, part_no,
                       is_child_sample_creation, is_generate_parent_seq, selected_block_or_cassette_seq, workflow_id=None):
-        print(
-            f" accession_id: {accession_id}, sample_type_id: {sample_type_id}, container_type_id: {container_type_id}, count: {count}, test_id: {test_id}")
+        log.debug("accession_id: %s, sample_type_id: %s, container_type_id: %s, count: %s, test_id: %s",
+                  accession_id, sample_type_id, container_type_id, count, test_id)
         if accession_id is not None and sample_type_id is not None and container_type_id is not None and count is not None and request is not None:
-            print("All required parameters are present")
+            log.debug("All required parameters are present")
             if request.user.is_authenticated:
-                print("User is authenticated")
+                log.debug("User is authenticated")
                 accession_id_instance = Accession.objects.get(accession_id=accession_id)
-                print(f"Accession ID found: {accession_id_instance}")
+                log.debug("Accession ID found: %s", accession_id_instance)
                 sample_type_instance = SampleType.objects.get(sample_type_id=sample_type_id)
-                print(f"SampleType found: {sample_type_instance}")
+                log.debug("SampleType found: %s", sample_type_instance)
                 if sample_type_instance is None:
                     raise ValidationError("Sample Type is blank")
 
@@ -46,7 +50,7 @@ class SampleUtilClass:
                 if workflow_id:
                     try:
                         workflow_instance = Workflow.objects.get(pk=workflow_id)
-                        print(f"Workflow found: {workflow_instance}")
+                        log.debug("Workflow found: %s", workflow_instance)
                     except Workflow.DoesNotExist:
                         # This prevents creating samples if an invalid workflow is passed
                         raise ValidationError(f"Invalid Workflow ID provided: {workflow_id}")
@@ -134,7 +138,14 @@ class SampleUtilClass:
                     if len(test_list) > 1 and child_sample_creation is False:
                         raise ValidationError("Multiple tests cannot be assigned to this Container Type")
 
-                    test_list_objects = Test.objects.filter(test_id__in=test_list)
+                    test_list_objects = list(Test.objects.filter(test_id__in=test_list))
+                    workflow_keys = {
+                        test.test_id: (test.test_id, sample_type_instance.sample_type_id,
+                                       container_type_instance.container_type_id,
+                                       accession_type_instance.accession_type_id)
+                        for test in test_list_objects
+                    }
+                    resolved_workflows = TestWorkflowResolutionUtilClass.resolve_workflows(workflow_keys.values())
                     list_sampletestmap = []
                     for sample in list_sample:
                         for test in test_list_objects:
@@ -142,22 +153,36 @@ class SampleUtilClass:
                             sampletestmap_instance.sample_id = sample
                             sampletestmap_instance.test_id = test
                             sampletestmap_instance.test_status = "Initial"
-                            test_workflowstep_instance = TestWorkflowStep.objects.select_related(
-                                'workflow_id'
-                            ).filter(test_id=test,
-                                     sample_type_id=sample_type_instance,
-                                     container_type=container_type_instance,
-                                     workflow_id__accession_type=accession_type_instance).first()
-                            if test_workflowstep_instance is not None:
-                                sampletestmap_instance.workflow_id = test_workflowstep_instance.workflow_id
+                            sampletestmap_instance.workflow_id_id = resolved_workflows.get(workflow_keys[test.test_id])
                             list_sampletestmap.append(sampletestmap_instance)
 
                     if list_sampletestmap is not None:
                         SampleTestMap.objects.bulk_create(list_sampletestmap)
 
+    # Parses "app-Model:col1,col2|app-Model:col3" into [(ModelClass, [columns])]
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def parse_copy_down_cols(copy_down_cols):
+        copy_down_specs = []
+        for items in copy_down_cols.split("|"):
+            items_set = items.split(":")
+            app_model_name = items_set[0]
+            try:
+                app_name, model_name = app_model_name.split("-")[:2]
+                ModelClass = apps.get_model(app_name, model_name)
+            except (ValueError, LookupError):
+                raise ValidationError(f"Invalid copy down model : {app_model_name}")
+            copy_down_specs.append((ModelClass, items_set[1].split(",")))
+        return copy_down_specs
+
     # This is for creating child samples
     @staticmethod
     def create_child_sample(list_sample_info, user_id, copy_down_cols=None):
+        """
+        Creates the requested copies of every parent sample in bulk: parents and copy-down source rows are
+        loaded up front, sample/block/slide numbers are reserved per prefix in blocks, and children,
+        ChildSample links, copy-down rows, test maps and routing info are written with bulk_create.
+        """
         if list_sample_info is not None and user_id is not None:
             list_sample_types = []
             list_container_types = []
@@ -166,122 +191,128 @@ class SampleUtilClass:
             dict_sample_test_info = {}
             child_sample_list = []
             list_records_to_save_in_child_sample = []
+
+            parent_sample_ids = []
             for sample_info in list_sample_info:
-                try:
-                    parent_sample_id = sample_info['parent_sample_id']
-                    parent_sample_instance = Sample.objects.get(sample_id=parent_sample_id)
-                    sample_type_instance = sample_info['sample_type']
-                    if sample_type_instance is None:
-                        raise ValidationError("Sample Type is blank")
-                    list_sample_types.append(sample_type_instance)
-                    container_type_instance = sample_info['container_type']
-                    if container_type_instance is None:
-                        raise ValidationError("Container Type is Blank")
-                    list_container_types.append(container_type_instance)
-                    copies = sample_info['copies']
-                    test_id = sample_info['test_id']
-                    previous_step = sample_info['previous_step']
-                    current_step = sample_info['current_step']
-                    next_step = sample_info['next_step']
-                    pending_action = sample_info['pending_action']
-                    sample_status = sample_info['sample_status']
-                    smearing_process = sample_info.get('smearing_process')
-                    list_tests.append(test_id)
-                    accession_type_instance = parent_sample_instance.accession_id.accession_type
-                    list_accession_types.append(accession_type_instance)
-                    if parent_sample_instance is not None:
-                        for i in range(int(copies)):
-                            sample_instance = Sample()
-                            current_date = datetime.now()
-                            prefix = f"S-{current_date.strftime('%m%d%Y')}"
-                            seq_no = UtilClass.get_next_sequence(prefix, "Sample", user_id.id)
-                            sample_instance.sample_id = f"{prefix}-{seq_no:05}"
-                            sample_instance.accession_id = parent_sample_instance.accession_id
-                            sample_instance.sample_type = sample_type_instance
-                            sample_instance.container_type = container_type_instance
-                            if smearing_process is not None:
-                                sample_instance.smearing_process = smearing_process
-                            sample_instance.custodial_department = parent_sample_instance.custodial_department
-                            sample_instance.custodial_user = parent_sample_instance.custodial_user
-                            sample_instance.custodial_storage_id = parent_sample_instance.custodial_storage_id
-                            sample_instance.previous_step = previous_step
-                            sample_instance.current_step = current_step
-                            sample_instance.next_step = next_step
-                            sample_instance.pending_action = pending_action
-                            sample_instance.sample_status = sample_status
-                            sample_instance.avail_at = current_date
-                            sample_instance.body_site = parent_sample_instance.body_site
-                            sample_instance.sub_site = parent_sample_instance.sub_site
-                            sample_instance.collection_method = parent_sample_instance.collection_method
-                            sample_instance.receive_dt = parent_sample_instance.receive_dt
-                            sample_instance.receive_dt_timezone = parent_sample_instance.receive_dt_timezone
-                            sample_instance.collection_dt = parent_sample_instance.collection_dt
-                            sample_instance.collection_dt_timezone = parent_sample_instance.collection_dt_timezone
-                            if parent_sample_instance.accession_sample is not None:
-                                sample_instance.accession_sample = parent_sample_instance.accession_sample
-                            else:
-                                sample_instance.accession_sample = parent_sample_instance
-                            sample_instance.created_by = user_id
-                            sample_instance.mod_by = user_id
-                            sample_instance.part_no = parent_sample_instance.part_no
-                            if 'Clinical' != parent_sample_instance.accession_id.accession_category:
-                                if container_type_instance.gen_slide_seq:
-                                    sample_instance.block_or_cassette_seq = parent_sample_instance.block_or_cassette_seq
-                                    slide_seq_prefix = parent_sample_instance.accession_id.accession_id + "-" + parent_sample_instance.part_no + "-" + str(
-                                        parent_sample_instance.block_or_cassette_seq)
-                                    slide_seq = UtilClass.get_next_sequence(slide_seq_prefix, "Sample",
-                                                                            user_id.id)
-                                    sample_instance.slide_seq = str(slide_seq)
-                                elif container_type_instance.gen_block_or_cassette_seq:
-                                    block_or_cassette_seq_prefix = parent_sample_instance.accession_id.accession_id + "-" + parent_sample_instance.part_no
-                                    block_cassette_seq = UtilClass.get_next_sequence(block_or_cassette_seq_prefix,
-                                                                                     "Sample", user_id.id)
-                                    sample_instance.block_or_cassette_seq = str(block_cassette_seq)
-                            child_sample_list.append(sample_instance)
+                if sample_info['sample_type'] is None:
+                    raise ValidationError("Sample Type is blank")
+                if sample_info['container_type'] is None:
+                    raise ValidationError("Container Type is Blank")
+                parent_sample_ids.append(getattr(sample_info['parent_sample_id'], 'pk', sample_info['parent_sample_id']))
+            parent_samples = Sample.objects.select_related('accession_id').in_bulk(parent_sample_ids)
+            missing_parent_ids = [sample_id for sample_id in parent_sample_ids if sample_id not in parent_samples]
+            if missing_parent_ids:
+                raise ValidationError(f"Following parent_sample_ids does not exists: {', '.join(missing_parent_ids)}")
+
+            copy_down_specs = SampleUtilClass.parse_copy_down_cols(copy_down_cols) if copy_down_cols else []
+            copy_down_sources = {}
+            for ModelClass, col_name_list in copy_down_specs:
+                copy_down_sources[ModelClass] = {
+                    getattr(row, 'sample_id_id', None) or row.sample_id: row
+                    for row in ModelClass.objects.filter(sample_id__in=parent_sample_ids)
+                }
+
+            # Reserve every sequence number the children need, one block per prefix
+            current_date = datetime.now()
+            prefix = f"S-{current_date.strftime('%m%d%Y')}"
+            prefix_counts = {prefix: 0}
+            planned_children = []
+            for sample_info, parent_sample_id in zip(list_sample_info, parent_sample_ids):
+                parent_sample_instance = parent_samples[parent_sample_id]
+                container_type_instance = sample_info['container_type']
+                copies = int(sample_info['copies'])
+                prefix_counts[prefix] += copies
+                seq_prefix, seq_type = None, None
+                if 'Clinical' != parent_sample_instance.accession_id.accession_category:
+                    if container_type_instance.gen_slide_seq:
+                        seq_prefix = parent_sample_instance.accession_id.accession_id + "-" + parent_sample_instance.part_no + "-" + str(
+                            parent_sample_instance.block_or_cassette_seq)
+                        seq_type = "slide"
+                    elif container_type_instance.gen_block_or_cassette_seq:
+                        seq_prefix = parent_sample_instance.accession_id.accession_id + "-" + parent_sample_instance.part_no
+                        seq_type = "block"
+                if seq_prefix:
+                    prefix_counts[seq_prefix] = prefix_counts.get(seq_prefix, 0) + copies
+                planned_children.append((sample_info, parent_sample_instance, copies, seq_prefix, seq_type))
+            next_numbers = UtilClass.reserve_sequence_blocks(prefix_counts, "Sample", user_id.id)
 
-                            dict_sample_test_info[sample_instance] = test_id
-                            instance_child_sample_model = ChildSample()
-                            instance_child_sample_model.destination_sample = sample_instance
-                            instance_child_sample_model.source_sample = parent_sample_instance
-                            list_records_to_save_in_child_sample.append(instance_child_sample_model)
-                            if copy_down_cols is not None:
-                                copy_down_cols_sets = copy_down_cols.split("|")
-                                if copy_down_cols_sets is not None:
-                                    for items in copy_down_cols_sets:
-                                        items_set = items.split(":")
-                                        if items_set is not None:
-                                            app_model_name = items_set[0]
-                                            column_name_set = items_set[1]
-                                            col_name_list = column_name_set.split(",")
-                                            if app_model_name is not None:
-                                                try:
-                                                    app_name = app_model_name.split("-")[0]
-                                                    model_name = app_model_name.split("-")[1]
-                                                    ModelClass = apps.get_model(app_name, model_name)
-                                                    if ModelClass:
-                                                        parent_model_instance = ModelClass.objects.get(
-                                                            sample_id=parent_sample_id)
-                                                        if parent_model_instance is not None and col_name_list is not None:
-                                                            model_instance = ModelClass()
-                                                            for col_name in col_name_list:
-                                                                col_val = getattr(parent_model_instance,
-                                                                                  col_name,
-                                                                                  "")
-                                                                if col_val is not None:
-                                                                    setattr(model_instance, col_name, col_val)
-                                                            setattr(model_instance, "sample_id", sample_instance)
-                                                            model_instance.save()
-                                                except Exception as e:
-                                                    raise ValidationError(
-                                                        f"Parent Sample Record not found for this Model : {model_name.__class__.__name__}")
-                except Sample.DoesNotExist:
-                    raise ValidationError(f"Following parent_sample_ids does not exists: {parent_sample_id}")
+            list_copy_down_instances = {ModelClass: [] for ModelClass, col_name_list in copy_down_specs}
+            for sample_info, parent_sample_instance, copies, seq_prefix, seq_type in planned_children:
+                sample_type_instance = sample_info['sample_type']
+                container_type_instance = sample_info['container_type']
+                test_id = sample_info['test_id']
+                smearing_process = sample_info.get('smearing_process')
+                list_sample_types.append(sample_type_instance)
+                list_container_types.append(container_type_instance)
+                list_tests.append(test_id)
+                list_accession_types.append(parent_sample_instance.accession_id.accession_type_id)
+                for i in range(copies):
+                    sample_instance = Sample()
+                    seq_no = next_numbers[prefix]
+                    next_numbers[prefix] += 1
+                    sample_instance.sample_id = f"{prefix}-{seq_no:05}"
+                    sample_instance.accession_id = parent_sample_instance.accession_id
+                    sample_instance.sample_type = sample_type_instance
+                    sample_instance.container_type = container_type_instance
+                    if smearing_process is not None:
+                        sample_instance.smearing_process = smearing_process
+                    sample_instance.custodial_department_id = parent_sample_instance.custodial_department_id
+                    sample_instance.custodial_user_id = parent_sample_instance.custodial_user_id
+                    sample_instance.custodial_storage_id = parent_sample_instance.custodial_storage_id
+                    sample_instance.previous_step = sample_info['previous_step']
+                    sample_instance.current_step = sample_info['current_step']
+                    sample_instance.next_step = sample_info['next_step']
+                    sample_instance.pending_action = sample_info['pending_action']
+                    sample_instance.sample_status = sample_info['sample_status']
+                    sample_instance.avail_at = current_date
+                    sample_instance.body_site = parent_sample_instance.body_site
+                    sample_instance.sub_site = parent_sample_instance.sub_site
+                    sample_instance.collection_method = parent_sample_instance.collection_method
+                    sample_instance.receive_dt = parent_sample_instance.receive_dt
+                    sample_instance.receive_dt_timezone = parent_sample_instance.receive_dt_timezone
+                    sample_instance.collection_dt = parent_sample_instance.collection_dt
+                    sample_instance.collection_dt_timezone = parent_sample_instance.collection_dt_timezone
+                    sample_instance.accession_sample_id = parent_sample_instance.accession_sample_id or parent_sample_instance.sample_id
+                    sample_instance.created_by = user_id
+                    sample_instance.mod_by = user_id
+                    sample_instance.part_no = parent_sample_instance.part_no
+                    if seq_type:
+                        seq_no = next_numbers[seq_prefix]
+                        next_numbers[seq_prefix] += 1
+                        if seq_type == "slide":
+                            sample_instance.block_or_cassette_seq = parent_sample_instance.block_or_cassette_seq
+                            sample_instance.slide_seq = str(seq_no)
+                        else:
+                            sample_instance.block_or_cassette_seq = str(seq_no)
+                    child_sample_list.append(sample_instance)
+
+                    dict_sample_test_info[sample_instance] = test_id
+                    instance_child_sample_model = ChildSample()
+                    instance_child_sample_model.destination_sample = sample_instance
+                    instance_child_sample_model.source_sample = parent_sample_instance
+                    list_records_to_save_in_child_sample.append(instance_child_sample_model)
+
+                    for ModelClass, col_name_list in copy_down_specs:
+                        parent_model_instance = copy_down_sources[ModelClass].get(parent_sample_instance.sample_id)
+                        if parent_model_instance is None:
+                            raise ValidationError(
+                                f"Parent Sample Record not found for this Model : {ModelClass.__name__}")
+                        model_instance = ModelClass()
+                        for col_name in col_name_list:
+                            col_val = getattr(parent_model_instance, col_name, "")
+                            if col_val is not None:
+                                setattr(model_instance, col_name, col_val)
+                        setattr(model_instance, "sample_id", sample_instance)
+                        list_copy_down_instances[ModelClass].append(model_instance)
 
             if child_sample_list is not None and len(child_sample_list) > 0:
                 Sample.objects.bulk_create(child_sample_list)
                 UtilClass.createRoutingInfoForSample(child_sample_list)
             if list_records_to_save_in_child_sample is not None and len(list_records_to_save_in_child_sample) > 0:
                 ChildSample.objects.bulk_create(list_records_to_save_in_child_sample)
+            for ModelClass, list_model_instances in list_copy_down_instances.items():
+                if list_model_instances:
+                    ModelClass.objects.bulk_create(list_model_instances)
             SampleUtilClass.associateTestWithCreatedChildSamples(list_sample_types, list_container_types,
                                                                  list_tests, dict_sample_test_info,
                                                                  list_accession_types)
@@ -295,7 +326,7 @@ class SampleUtilClass:
             all_tests = ','.join(list_tests)
             list_all_tests = all_tests.split(',')
             if len(list_all_tests) > 0:
-                test_list_objects = Test.objects.filter(test_id__in=list_all_tests)
+                test_list_objects = {str(test.test_id): test for test in Test.objects.filter(test_id__in=list_all_tests)}
 
                 Sample = apps.get_model('sample', 'Sample')
                 sample_ids = [s.sample_id for s in dict_sample_test_info.keys()]
@@ -309,13 +340,17 @@ class SampleUtilClass:
                 )
                 workflow_map = dict(samples_with_workflow.values_list('sample_id', 'effective_workflow_id'))
 
-                list_test_workflowsteps = TestWorkflowStep.objects.select_related(
-                    'workflow_id'
-                ).filter(test_id__in=test_list_objects,
-                         sample_type_id__in=list_sample_types,
-                         container_type__in=list_container_types,
-                         workflow_id__accession_type__in=list_accession_types,
-                         workflow_step_id__workflow_type='WetLab')
+                # Resolve the workflow of every sample/test pair that has no effective workflow in one pass
+                workflow_keys = {}
+                for sample, tests in dict_sample_test_info.items():
+                    if not workflow_map.get(sample.sample_id):
+                        for test in tests.split(","):
+                            test_instance = test_list_objects.get(test.strip())
+                            workflow_keys[(sample.sample_id, test)] = (
+                                test_instance.test_id if test_instance else None, sample.sample_type_id,
+                                sample.container_type_id, sample.accession_id.accession_type_id)
+                resolved_workflows = TestWorkflowResolutionUtilClass.resolve_workflows(workflow_keys.values(),
+                                                                                       wetlab_only=True)
             list_sample_test_instance = []
             for sample, tests in dict_sample_test_info.items():
                 child_sample_creation = sample.container_type.child_sample_creation
@@ -324,134 +359,15 @@ class SampleUtilClass:
                     raise ValidationError("Multiple tests cannot be assigned to this Container Type")
                 effective_workflow_id = workflow_map.get(sample.sample_id)
                 for test in test_list:
-                    test_instance = test_list_objects.filter(test_id=test).first()
+                    test_instance = test_list_objects.get(test.strip())
 
                     sample_test_map_instance = SampleTestMap()
                     sample_test_map_instance.sample_id = sample
                     sample_test_map_instance.test_id = test_instance
                     sample_test_map_instance.test_status = "Pending"
                     if not effective_workflow_id:
-                        test_workflowstep_instance = list_test_workflowsteps.filter(test_id=test_instance,
-                                                                                    sample_type_id=sample.sample_type,
-                                                                                    container_type=sample.container_type,
-                                                                                    workflow_id__accession_type=sample.accession_id.accession_type).first()
-
-                        sample_test_map_instance.workflow_id = test_workflowstep_instance.workflow_id
+                        sample_test_map_instance.workflow_id_id = resolved_workflows.get(
+                            workflow_keys[(sample.sample_id, test)])
 
                     list_sample_test_instance.append(sample_test_map_instance)
             SampleTestMap.objects.bulk_create(list_sample_test_instance)
-
-    @staticmethod
-    def create_samples_from_existing_list_of_samples(list_template_samples, request, obj):
-        if request and list_template_samples and obj:
-            list_samples_to_be_created = []
-            list_sample_test_map = []
-            user_map_obj = request.user
-            qs_sample_test_info = SampleTestMap.objects.filter(sample_id__in=list_template_samples)
-            for sample in list_template_samples:
-                sample_instance = Sample()
-                current_date = datetime.now()
-                prefix = f"S-{current_date.strftime('%m%d%Y')}"
-                seq_no = UtilClass.get_next_sequence(prefix, "Sample", user_map_obj.id)
-                sample_instance.sample_id = f"{prefix}-{seq_no:05}"
-                if sample.part_no:
-                    sample_instance.part_no = sample.part_no
-                if sample.slide_seq:
-                    sample_instance.block_or_cassette_seq = sample.block_or_cassette_seq
-                    slide_seq_prefix = obj.accession_id + "-" + sample_instance.part_no + "-" + str(
-                        sample_instance.block_or_cassette_seq)
-                    slide_seq = UtilClass.get_next_sequence(slide_seq_prefix, "Sample",
-                                                            user_map_obj.id)
-                    sample_instance.slide_seq = str(slide_seq)
-                else:
-                    if sample.block_or_cassette_seq:
-                        block_or_cassette_seq_prefix = obj.accession_id + "-" + sample_instance.part_no
-                        block_cassette_seq = UtilClass.get_next_sequence(block_or_cassette_seq_prefix,
-                                                                         "Sample", user_map_obj.id)
-                        sample_instance.block_or_cassette_seq = str(block_cassette_seq)
-
-                if sample.sample_type:
-                    sample_instance.sample_type = sample.sample_type
-                if sample.container_type:
-                    sample_instance.container_type = sample.container_type
-
-                current_jobtype = request.session.get('currentjobtype', '')
-                if current_jobtype:
-                    department_id = JobType.objects.filter(name=current_jobtype).values_list('departmentid',
-                                                                                             flat=True).first()
-                    if department_id:
-                        department_instance = Department.objects.get(id=department_id)
-                        if department_instance is not None:
-                            sample_instance.custodial_department = department_instance
-                if user_map_obj:
-                    sample_instance.custodial_user = user_map_obj
-                sample_instance.current_step = "Accessioning"
-                sample_instance.avail_at = datetime.now()
-                sample_instance.accession_generated = False
-                sample_instance.accession_id = obj
-                sample_instance.created_by = user_map_obj
-                sample_instance.mod_by = user_map_obj
-                sample_instance.sample_status = "Initial"
-                if sample.previous_step:
-                    sample_instance.previous_step = sample.previous_step
-                if sample.current_step:
-                    sample_instance.current_step = sample.current_step
-                if sample.next_step:
-                    sample_instance.next_step = sample.next_step
-                if sample.accession_sample:
-                    sample_instance.accession_sample = sample.accession_sample
-                if sample.accession_generated:
-                    sample_instance.accession_generated = sample.accession_generated
-                if sample.pending_action:
-                    sample_instance.pending_action = sample.pending_action
-                if sample.body_site:
-                    sample_instance.body_site = sample.body_site
-                if sample.sub_site:
-                    sample_instance.sub_site = sample.sub_site
-                if sample.collection_method:
-                    sample_instance.collection_method = sample.collection_method
-                if sample.workflow_id:
-                    sample_instance.workflow_id = sample.workflow_id
-                if sample.size:
-                    sample_instance.size = sample.size
-                if sample.pieces:
-                    sample_instance.pieces = sample.pieces
-                if sample.num_of_blocks:
-                    sample_instance.num_of_blocks = sample.num_of_blocks
-                if sample.num_of_slides:
-                    sample_instance.num_of_slides = sample.num_of_slides
-                if sample.num_of_manualsmear_slides:
-                    sample_instance.num_of_manualsmear_slides = sample.num_of_manualsmear_slides
-                if sample.num_of_thinprep_slides:
-                    sample_instance.num_of_thinprep_slides = sample.num_of_thinprep_slides
-                if sample.grossing_comments:
-                    sample_instance.grossing_comments = sample.grossing_comments
-                if sample.gross_code:
-                    sample_instance.gross_code = sample.gross_code
-                if sample.gross_description:
-                    sample_instance.gross_description = sample.gross_description
-                if sample.descriptive:
-                    sample_instance.descriptive = sample.descriptive
-                if sample.isvisible:
-                    sample_instance.isvisible = sample.isvisible
-                if sample.smearing_process:
-                    sample_instance.isvisible = sample.smearing_process
-                if sample.label_count:
-                    sample_instance.label_count = sample.label_count
-
-                list_samples_to_be_created.append(sample_instance)
-                if qs_sample_test_info:
-                    filter_qs_sample_test_info = qs_sample_test_info.filter(sample_id=sample)
-                    for sample_test_instance in filter_qs_sample_test_info:
-                        new_sample_test_instance = SampleTestMap()
-                        new_sample_test_instance.sample_id = sample_instance
-                        new_sample_test_instance.test_id = sample_test_instance.test_id
-                        new_sample_test_instance.test_status = "Initial"
-                        new_sample_test_instance.workflow_id = sample_test_instance.workflow_id
-                        list_sample_test_map.append(new_sample_test_instance)
-            if list_samples_to_be_created:
-                Sample.objects.bulk_create(list_samples_to_be_created)
-                UtilClass.createRoutingInfoForSample(list_samples_to_be_created)
-
-            if list_sample_test_map:
-                SampleTestMap.objects.bulk_create(list_sample_test_map)
\ No newline at end of file
@@ -1,9 +1,7 @@
 import json
 
-from django.apps import apps
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.core.exceptions import ObjectDoesNotExist
 from django.db.models import Case, When, Value, IntegerField, F, Q, Prefetch
 from django.forms import modelformset_factory
 from django.http import JsonResponse, HttpResponseBadRequest, HttpResponseForbidden
@@ -19,7 +17,9 @@ from django.views.decorators.http import require_POST
 
 from ihcworkflow.models import IhcWorkflow
 from logutil.log import log
+from routinginfo.executor import RoutingExecutorUtilClass, ROUTE_OK
 from routinginfo.util import UtilClass
+from sample.bulkedit import SampleBulkEditUtilClass
 from sample.forms import SampleBulkEditForm
 from sample.models import Sample, SampleTestMap
 from security.views import JobTypeContextMixin
@@ -73,8 +73,13 @@ class SampleBulkEditView(JobTypeContextMixin, View):
         queryset = self.get_queryset(ids)
         SampleFormSet = modelformset_factory(Sample, form=SampleBulkEditForm, extra=0)
         formset = SampleFormSet(request.POST, queryset=queryset, auto_id='id_%s')
+        originals = SampleBulkEditUtilClass.snapshot(formset)
         if formset.is_valid():
-            formset.save()
+            try:
+                SampleBulkEditUtilClass.save_formset(formset, originals, actor=request.user)
+            except ValueError as e:
+                messages.error(request, str(e))
+                return render(request, self.template_name, self.get_context_data(formset=formset))
 
             q = request.GET.get('q', '')
 
@@ -171,39 +176,12 @@ def admin_scan_validate(request):
     if not sid:
         return JsonResponse({"valid": False, "error": "Missing sample id"})
 
-    # Determine model type first
-    model_type = "sample"  # default
-    try:
-        # Check if this sample exists in IhcWorkflow
-        ihc_exists = IhcWorkflow.objects.filter(sample_id=sid).exists()
-        if ihc_exists:
-            model_type = "ihc"
-
-        # Get the sample regardless (both models should have these fields)
-        s = Sample.objects.select_related('accession_id').only(
-            'sample_id', 'part_no', 'current_step', 'next_step', 'pending_action', 'accession_id'
-        ).get(sample_id=sid)
-
-    except ObjectDoesNotExist:
+    scanned, not_found = get_scan_samples_data([sid])
+    if not_found:
         log.error(f"Sample '{sid}' not found")
         return JsonResponse({"valid": False, "error": f"Sample '{sid}' not found"})
 
-    # Retrieve associated tests (names). Use values_list to keep query lightweight.
-    tests_qs = SampleTestMap.objects.filter(sample_id=s).select_related('test_id').values_list('test_id__test_name',
-                                                                                               flat=True)
-    tests_list = [str(t) for t in tests_qs if t]  # ensure strings, filter out None
-
-    # Compose the response with safe string values
-    sample_data = {
-        "sample_id": s.sample_id,
-        "part_no": s.part_no or "",
-        "tests": tests_list,
-        "current_step": s.current_step or "",
-        "next_step": s.next_step or "",
-        "pending_action": s.pending_action or "",
-        "accession_id": str(s.accession_id) if s.accession_id else "",
-        "model_type": model_type  # NEW: "sample" or "ihc"
-    }
+    sample_data = scanned[sid]
 
     log.info(f"admin_scan_validate sample_data : {sample_data}")
     return JsonResponse({"valid": True, "sample": sample_data})
@@ -295,6 +273,7 @@ def admin_scan_submit(request):
 
     # 5) Group by (model, action, method)
     groups, automatic, not_found = {}, [], []
+    sample_models = {sid: model_cls for model_cls, sids in get_model_for_sample_ids(valid_ids).items() for sid in sids}
     for sid in valid_ids:
         try:
             sample = Sample.objects.get(sample_id=sid)
@@ -307,7 +286,7 @@ def admin_scan_submit(request):
             continue
         action = sample.pending_action
         method = behavior["action_method"]
-        model_cls = next(iter(get_model_for_sample_ids([sid]).keys()))
+        model_cls = sample_models[sid]
         groups.setdefault((model_cls, action, method), []).append(sid)
 
     # 6) Single-form early return
@@ -445,6 +424,44 @@ def admin_scan_submit(request):
     })
 
 
+def get_scan_samples_data(sample_ids):
+    """
+    Build the scanner row data for a batch of sample ids in a fixed number of queries.
+    Returns (dict of sample_id -> sample_data, list of ids not found).
+    Shared by admin_scan_validate and the websocket scan session.
+    """
+    sample_ids = [sid for sid in dict.fromkeys(sample_ids) if sid]
+    if not sample_ids:
+        return {}, []
+
+    samples = Sample.objects.only(
+        'sample_id', 'part_no', 'current_step', 'next_step', 'pending_action', 'accession_id', 'sample_kind'
+    ).filter(sample_id__in=sample_ids)
+
+    # Retrieve associated tests (names). Use values_list to keep query lightweight.
+    tests_map = {}
+    for sample_id, test_name in SampleTestMap.objects.filter(sample_id__in=sample_ids).values_list(
+            'sample_id_id', 'test_id__test_name'):
+        if test_name:
+            tests_map.setdefault(sample_id, []).append(str(test_name))
+
+    scanned = {}
+    for s in samples:
+        # Compose the response with safe string values
+        scanned[s.sample_id] = {
+            "sample_id": s.sample_id,
+            "part_no": s.part_no or "",
+            "tests": tests_map.get(s.sample_id, []),
+            "current_step": s.current_step or "",
+            "next_step": s.next_step or "",
+            "pending_action": s.pending_action or "",
+            "accession_id": str(s.accession_id_id) if s.accession_id_id else "",
+            "model_type": "ihc" if s.sample_kind == IhcWorkflow._meta.model_name else "sample"
+        }
+    not_found = [sid for sid in sample_ids if sid not in scanned]
+    return scanned, not_found
+
+
 def get_action_behavior(sample, request):
     """
     Determine if a sample's pending action can be processed automatically
@@ -583,11 +600,6 @@ def filter_valid_routing(request, sample_ids):
     Returns (valid_ids, invalid_metadata)
     where invalid_metadata is a list of {"sample_id":…, "reason":…}.
     """
-    Sample = apps.get_model('sample', 'Sample')
-    SampleTestMap = apps.get_model('sample', 'SampleTestMap')
-    TestWorkflowStep = apps.get_model('tests', 'TestWorkflowStep')
-    WorkflowStep = apps.get_model('workflows', 'WorkflowStep')
-
     valid = []
     invalid = []
     try:
@@ -604,120 +616,13 @@ def filter_valid_routing(request, sample_ids):
         if not candidates:
             return [], invalid
 
-        # 2) Gather sample and test mappings
-        sample_maps = Sample.objects.filter(sample_id__in=candidates)
-        sample_type_ids = sample_maps.values_list('sample_type_id', flat=True).distinct()
-        container_type_ids = sample_maps.values_list('container_type_id', flat=True).distinct()
-        test_maps = SampleTestMap.objects.filter(sample_id_id__in=candidates)
-        test_ids = test_maps.values_list('test_id_id', flat=True).distinct()
-        workflow_ids_tests = test_maps.values_list('workflow_id_id', flat=True).distinct()
-
-        # 3) Annotate effective workflows
-        samples_with_wf = (
-            Sample.objects.filter(sample_id__in=candidates)
-            .annotate(
-                effective_workflow_id=Case(
-                    When(accession_sample_id__isnull=True, then=F('workflow_id')),
-                    When(accession_sample_id__isnull=False, then=F('accession_sample__workflow_id')),
-                    default=Value(None),
-                    output_field=IntegerField(),
-                )
-            )
-        )
-        wf_map = dict(samples_with_wf.values_list('sample_id', 'effective_workflow_id'))
-        wf_ids_samples = samples_with_wf.values_list('effective_workflow_id', flat=True).distinct()
-
-        # 4) Load workflow steps
-        workflow_steps = (
-            WorkflowStep.objects
-            .filter(workflow_id__in=wf_ids_samples, workflow_type='WetLab')
-            .annotate(
-                test_workflow_step_id=Value(None, output_field=IntegerField()),
-                sample_type_id=Value(None, output_field=IntegerField()),
-                container_type_id=Value(None, output_field=IntegerField()),
-                test_id=Value(None, output_field=IntegerField()),
-                workflow_step_id__workflow_step_id=F('workflow_step_id'),
-                workflow_step_id__workflow_id=F('workflow_id'),
-                workflow_step_id__step_id=F('step_id'),
-                workflow_step_id__step_no=F('step_no'),
-                workflow_step_id__department=F('department'),
-            )
-            .values(
-                'test_workflow_step_id',
-                'sample_type_id',
-                'container_type_id',
-                'test_id',
-                'workflow_id',
-                'workflow_step_id__workflow_step_id',
-                'workflow_step_id__workflow_id',
-                'workflow_step_id__step_id',
-                'workflow_step_id__step_no',
-                'workflow_step_id__department',
-            )
-        )
-
-        test_wf_steps = (
-            TestWorkflowStep.objects.select_related('workflow_step_id')
-            .filter(
-                sample_type_id__in=sample_type_ids,
-                container_type_id__in=container_type_ids,
-                test_id__in=test_ids,
-                workflow_id__in=workflow_ids_tests,
-                workflow_step_id__workflow_id__in=workflow_ids_tests,
-                workflow_step_id__workflow_type='WetLab',
-            )
-            .values(
-                'test_workflow_step_id',
-                'sample_type_id',
-                'container_type_id',
-                'test_id',
-                'workflow_id',
-                'workflow_step_id__workflow_step_id',
-                'workflow_step_id__workflow_id',
-                'workflow_step_id__step_id',
-                'workflow_step_id__step_no',
-                'workflow_step_id__department',
-            )
-        )
-
-        # 5) Validate each sample WITHOUT modifying it
-        for sm in sample_maps:
-            sid = sm.sample_id
-            wf_id = wf_map.get(sid)
-            try:
-                if wf_id:
-                    rows = workflow_steps.filter(workflow_id=wf_id)
-                else:
-                    tm = test_maps.filter(sample_id_id=sid).first()
-                    if not tm:
-                        # Silently skip samples without test mapping
-                        continue
-                    rows = test_wf_steps.filter(
-                        sample_type_id=sm.sample_type_id,
-                        container_type_id=sm.container_type_id,
-                        test_id=tm.test_id_id,
-                        workflow_id=tm.workflow_id_id,
-                    )
-
-                if not rows.exists():
-                    # Silently skip samples without workflow steps
-                    continue
-
-                # CHANGED: Use validation-only method instead of get_current_and_next_step
-                has_next_step = UtilClass.validate_next_step_exists(
-                    filtered_steps=rows,
-                    sample=sm,
-                    workflow_map=wf_map
-                )
-
-                if has_next_step:
-                    valid.append(sid)
-                # else: silently skip - no next step available
-
-            except Exception as e:
-                log.error(f"Validation error for sample {sid}: {e}")
-                # Silently skip samples with validation errors
-                continue
+        # 2) Dry run of the routing plan: samples with a step to move to are valid;
+        # samples without test mapping, workflow steps or next step are silently skipped
+        site = RoutingExecutorUtilClass.get_site(request)
+        state = RoutingExecutorUtilClass.load_wetlab(candidates, site)
+        plan = RoutingExecutorUtilClass.plan_wetlab(state, site, request.user.id, accession_flag='N')
+        routable = {entry.obj.sample_id for entry in plan if entry.status == ROUTE_OK}
+        valid = [sid for sid in dict.fromkeys(candidates) if sid in routable]
 
     except Exception as e:
         log.error(f"Routing validation failed: {e}")
@@ -729,15 +634,12 @@ def filter_valid_routing(request, sample_ids):
 def get_model_for_sample_ids(sample_ids):
     """
     Return mapping of model class -> list of sample_ids.
+    Kinds are read from the sample_kind discriminator in one query; everything that is not IHC maps to Sample.
     """
-    ihc_ids = set(
-        IhcWorkflow.objects.filter(sample_id__in=sample_ids)
-        .values_list("sample_id", flat=True)
-    )
-    base_ids = set(sample_ids) - ihc_ids
+    kinds = Sample.objects.resolve_kinds(sample_ids)
+    ihc_kind = IhcWorkflow._meta.model_name
     model_map = {}
-    if ihc_ids:
-        model_map[IhcWorkflow] = list(ihc_ids)
-    if base_ids:
-        model_map[Sample] = list(base_ids)
+    for sample_id in dict.fromkeys(sample_ids):
+        model_cls = IhcWorkflow if kinds.get(sample_id) == ihc_kind else Sample
+        model_map.setdefault(model_cls, []).append(sample_id)
     return model_map
@@ -1,7 +1,13 @@
+import asyncio
 import json
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.layers import get_channel_layer
 
+from logutil.log import log
+from scanner.util import ScanJobStoreUtilClass, ScanSessionUtilClass
+
 
 class AgentConsumer(AsyncWebsocketConsumer):
 
@@ -36,26 +42,39 @@ class AgentConsumer(AsyncWebsocketConsumer):
         except Exception:
             return
 
+        if data.get("type") not in ("scan_complete", "scan_error"):
+            return
+
+        request_id = data.get("request_id")
+        job = await sync_to_async(ScanJobStoreUtilClass.get_job)(request_id)
+        if job is None:
+            log.error(f"Scan result received for unknown or expired request '{request_id}'")
+            return
+
         channel_layer = get_channel_layer()
 
         # Agent -> Server : Scan Completed
         if data.get("type") == "scan_complete":
+            await sync_to_async(ScanJobStoreUtilClass.update_job)(request_id, status="done",
+                                                                  file_url=data["file_url"])
             await channel_layer.group_send(
-                "notify_admin",           # FIXED
+                job["notify_group"],
                 {
-                    "type": "scan_completed",   # FIXED
-                    "request_id": data["request_id"],
+                    "type": "scan_completed",
+                    "request_id": request_id,
                     "file_url": data["file_url"],
                 }
             )
 
         # Agent -> Server : Scan Error
-        elif data.get("type") == "scan_error":
+        else:
+            await sync_to_async(ScanJobStoreUtilClass.update_job)(request_id, status="error",
+                                                                  error=data.get("error"))
             await channel_layer.group_send(
-                "notify_admin",
+                job["notify_group"],
                 {
                     "type": "scan_completed",
-                    "request_id": data["request_id"],
+                    "request_id": request_id,
                     "file_url": None,
                     "error": data.get("error"),
                 }
@@ -66,13 +85,34 @@ class NotifyConsumer(AsyncWebsocketConsumer):
 
     async def connect(self):
         self.client_id = self.scope["url_route"]["kwargs"]["client_id"]
-        self.group_name = "notify_admin"   # FIXED — single admin group
+        self.group_names = set()
 
-        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        # Each browser only joins its own user's group, scans of other users are not broadcast to it
+        user = self.scope.get("user")
+        if user is not None and user.is_authenticated:
+            await self.join_group(ScanJobStoreUtilClass.get_notify_group(None, user))
         await self.accept()
 
     async def disconnect(self, close_code):
-        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        for group_name in self.group_names:
+            await self.channel_layer.group_discard(group_name, self.channel_name)
+
+    async def join_group(self, group_name):
+        await self.channel_layer.group_add(group_name, self.channel_name)
+        self.group_names.add(group_name)
+
+    # Admin browser client -> Server : follow a specific scan request
+    async def receive(self, text_data=None, bytes_data=None):
+        if not text_data:
+            return
+
+        try:
+            data = json.loads(text_data)
+        except Exception:
+            return
+
+        if data.get("type") == "subscribe" and data.get("request_id"):
+            await self.join_group(ScanJobStoreUtilClass.get_notify_group(data["request_id"]))
 
     # Django -> Admin browser client
     async def scan_completed(self, event):   # FIXED: matches event type above
@@ -82,3 +122,142 @@ class NotifyConsumer(AsyncWebsocketConsumer):
             "file_url": event["file_url"],
             "error": event.get("error")
         }))
+
+
+class ScanSessionConsumer(AsyncWebsocketConsumer):
+    """
+    Live scan session for the sample scanner.
+    Each scan is validated as it arrives and added to the session; on submit the
+    session is processed in micro-batches and per-sample results are streamed back,
+    so large scan batches no longer wait on one request/response round trip.
+    """
+    batch_size = 25
+
+    async def connect(self):
+        user = self.scope.get("user")
+        if not user or not user.is_authenticated or not user.is_staff:
+            await self.close(code=4403)
+            return
+
+        self.scanned = {}
+        self.submit_task = None
+        await self.accept()
+
+        await self.send(json.dumps({
+            "type": "connected",
+            "batch_size": self.batch_size
+        }))
+
+    async def disconnect(self, close_code):
+        if getattr(self, "submit_task", None) and not self.submit_task.done():
+            self.submit_task.cancel()
+
+    async def receive(self, text_data=None, bytes_data=None):
+        if not text_data:
+            return
+
+        try:
+            data = json.loads(text_data)
+        except Exception:
+            return
+
+        msg_type = data.get("type")
+        ids = data.get("ids") or ([data["id"]] if data.get("id") else [])
+        ids = [str(sid).strip() for sid in ids if str(sid).strip()]
+
+        # Client -> Server : Scanned sample id(s)
+        if msg_type == "scan":
+            await self.handle_scan(ids)
+
+        # Client -> Server : Remove scanned sample id(s) from the session
+        elif msg_type == "remove":
+            for sid in ids:
+                self.scanned.pop(sid, None)
+            await self.send_groups()
+
+        elif msg_type == "clear":
+            self.scanned = {}
+            await self.send_groups()
+
+        # Client -> Server : Process the session
+        elif msg_type == "submit":
+            if self.submit_task and not self.submit_task.done():
+                await self.send(json.dumps({"type": "error", "error": "A submission is already running"}))
+                return
+            sample_ids = ids or list(self.scanned)
+            if not sample_ids:
+                await self.send(json.dumps({"type": "error", "error": "No samples scanned"}))
+                return
+            batch_size = data.get("batch_size") or self.batch_size
+            self.submit_task = asyncio.ensure_future(self.run_submission(sample_ids, int(batch_size)))
+
+        elif msg_type == "cancel":
+            if self.submit_task and not self.submit_task.done():
+                self.submit_task.cancel()
+
+    async def handle_scan(self, ids):
+        new_ids = [sid for sid in dict.fromkeys(ids) if sid not in self.scanned]
+        if not new_ids:
+            return
+
+        scanned, not_found = await database_sync_to_async(ScanSessionUtilClass.validate_scans)(new_ids)
+        for sid in not_found:
+            await self.send(json.dumps({
+                "type": "scan_result",
+                "valid": False,
+                "sample_id": sid,
+                "error": f"Sample '{sid}' not found"
+            }))
+        for sid, sample_data in scanned.items():
+            self.scanned[sid] = sample_data
+            await self.send(json.dumps({
+                "type": "scan_result",
+                "valid": True,
+                "data": sample_data
+            }))
+        await self.send_groups()
+
+    async def send_groups(self):
+        groups = {}
+        for sample_data in self.scanned.values():
+            groups[sample_data["group"]] = groups.get(sample_data["group"], 0) + 1
+        await self.send(json.dumps({
+            "type": "groups",
+            "count": len(self.scanned),
+            "groups": groups
+        }))
+
+    async def run_submission(self, sample_ids, batch_size):
+        summary = {}
+        processed = 0
+        try:
+            for start in range(0, len(sample_ids), batch_size):
+                batch = sample_ids[start:start + batch_size]
+                results = await database_sync_to_async(ScanSessionUtilClass.process_scan_batch)(self.scope, batch)
+                for result in results:
+                    summary[result["status"]] = summary.get(result["status"], 0) + 1
+                    if result["status"] != "form_required":
+                        self.scanned.pop(result["sample_id"], None)
+                    await self.send(json.dumps({"type": "sample_result", **result}))
+                processed += len(batch)
+                await self.send(json.dumps({
+                    "type": "batch_complete",
+                    "processed": processed,
+                    "total": len(sample_ids)
+                }))
+        except asyncio.CancelledError:
+            summary["cancelled"] = len(sample_ids) - processed
+            raise
+        except Exception as e:
+            log.error(f"Scan session submission failed: {e}")
+            await self.send(json.dumps({"type": "error", "error": str(e)}))
+        finally:
+            try:
+                await self.send(json.dumps({
+                    "type": "session_complete",
+                    "processed": processed,
+                    "total": len(sample_ids),
+                    "summary": summary
+                }))
+            except Exception:
+                pass
@@ -17,4 +17,12 @@ websocket_urlpatterns = [
         r"^(?:.*/)?ws/notify/(?P<client_id>[^/]+)/?$",
         consumers.NotifyConsumer.as_asgi()
     ),
+
+    # Matches:
+    #   /ws/scan-session/
+    #   /anything/ws/scan-session/
+    re_path(
+        r"^(?:.*/)?ws/scan-session/?$",
+        consumers.ScanSessionConsumer.as_asgi()
+    ),
 ]
@@ -0,0 +1,188 @@
+from django.conf import settings
+from django.contrib.messages import constants as message_constants
+from django.contrib.messages.storage.base import BaseStorage
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import HttpRequest, QueryDict
+
+from logutil.log import log
+from routinginfo.util import UtilClass
+from sample.models import Sample
+from sample.views import get_action_behavior, filter_valid_routing, get_scan_samples_data
+from util.actions import GenericAction
+
+
+class ScanJobStoreUtilClass:
+    """
+    Scanner job state kept in the shared cache (redis) with a TTL,
+    so start, agent callbacks and uploads can land on different workers.
+    """
+    key_prefix = "scanner_job_"
+
+    @staticmethod
+    def get_key(request_id):
+        return f"{ScanJobStoreUtilClass.key_prefix}{request_id}"
+
+    @staticmethod
+    def get_notify_group(request_id, user=None):
+        # Completions go to the requesting user's browsers, or to the request group when there is no user
+        if user is not None and user.is_authenticated:
+            return f"scan_user_{user.pk}"
+        return f"scan_request_{request_id}"
+
+    @staticmethod
+    def create_job(request_id, agent_id, user=None):
+        job = {
+            "request_id": request_id,
+            "agent_id": agent_id,
+            "status": "pending",
+            "notify_group": ScanJobStoreUtilClass.get_notify_group(request_id, user),
+        }
+        cache.set(ScanJobStoreUtilClass.get_key(request_id), job, timeout=settings.SCANNER_JOB_TIMEOUT)
+        return job
+
+    @staticmethod
+    def get_job(request_id):
+        return cache.get(ScanJobStoreUtilClass.get_key(request_id))
+
+    @staticmethod
+    def update_job(request_id, **values):
+        job = ScanJobStoreUtilClass.get_job(request_id)
+        if job is None:
+            return None
+        job.update(values)
+        cache.set(ScanJobStoreUtilClass.get_key(request_id), job, timeout=settings.SCANNER_JOB_TIMEOUT)
+        return job
+
+
+class ScanSessionMessageStorage(BaseStorage):
+    """
+    In-memory message storage for websocket scan sessions.
+    GenericAction and the routing utilities report through django messages,
+    so the session collects them here and streams them back with the sample results.
+    """
+
+    def _get(self, *args, **kwargs):
+        return [], True
+
+    def _store(self, messages, response, *args, **kwargs):
+        return []
+
+    def drain(self):
+        drained = [(m.level, str(m.message)) for m in self._queued_messages]
+        self._queued_messages = []
+        return drained
+
+
+class ScanSessionUtilClass:
+
+    @staticmethod
+    def build_request(scope):
+        """
+        Build an HttpRequest equivalent of the websocket scope so the existing
+        action/routing code (which reads user, session and POST) can be reused as is.
+        """
+        request = HttpRequest()
+        request.method = "POST"
+        request.path = "/sample/admin/scan-submit/"
+        request.user = scope.get("user")
+        request.session = scope.get("session")
+        request.POST = QueryDict(mutable=True)
+        request._messages = ScanSessionMessageStorage(request)
+        return request
+
+    @staticmethod
+    def validate_scans(sample_ids):
+        """
+        Validate scanned ids and attach the group each sample falls into:
+        its pending action, or 'routing' when there is nothing pending.
+        """
+        scanned, not_found = get_scan_samples_data(sample_ids)
+        for sample_data in scanned.values():
+            sample_data["group"] = sample_data["pending_action"] or "routing"
+        return scanned, not_found
+
+    @staticmethod
+    def process_scan_batch(scope, sample_ids):
+        """
+        Apply pending actions and route one micro-batch of scanned samples.
+        Automatic actions are applied once per (pending action, action method) group
+        through GenericAction, then every sample left without a pending action is routed.
+        Returns a list of per-sample result dicts.
+        """
+        request = ScanSessionUtilClass.build_request(scope)
+        storage = request._messages
+        results = {}
+
+        samples = {s.sample_id: s for s in Sample.objects.filter(sample_id__in=sample_ids)}
+        routing_candidates = []
+        action_groups = {}
+        for sid in sample_ids:
+            sample = samples.get(sid)
+            if sample is None:
+                results[sid] = {"sample_id": sid, "stage": "validate", "status": "not_found",
+                                "message": f"Sample '{sid}' not found"}
+                continue
+            if not sample.pending_action:
+                routing_candidates.append(sid)
+                continue
+            behavior = get_action_behavior(sample, request)
+            if behavior["type"] == "automatic":
+                action_groups.setdefault((sample.pending_action, behavior["action_method"]), []).append(sid)
+            elif behavior["type"] == "form":
+                results[sid] = {"sample_id": sid, "stage": "action", "status": "form_required",
+                                "action_method": behavior["action_method"],
+                                "message": f"'{sample.pending_action}' needs form input, submit it from the scanner form."}
+            else:
+                results[sid] = {"sample_id": sid, "stage": "action", "status": "error",
+                                "message": behavior.get("message", "")}
+
+        # Apply automatic actions, one GenericAction call per group
+        ga = GenericAction()
+        for (action, action_method), group_ids in action_groups.items():
+            try:
+                res = ga.generic_action_call(request, Sample.objects.filter(sample_id__in=group_ids),
+                                             desired_action=action, action_desc=action)
+                # generic_action_call returns ('', '') when the action was not applied, (form_type, msg) when it
+                # still needs a form and nothing (or 'render_submit') once applied; the group only succeeds on "Y"
+                flag = "Y" if res is None or res[0] == "render_submit" else "N"
+                drained = storage.drain()
+                failed = flag != "Y" or any(level >= message_constants.ERROR for level, _ in drained)
+                message = " ".join(text for _, text in drained)
+            except Exception as e:
+                log.error(f"Scan session action '{action}' failed: {e}")
+                failed, message = True, str(e)
+            for sid in group_ids:
+                results[sid] = {"sample_id": sid, "stage": "action", "action_method": action_method,
+                                "status": "failed" if failed else "success", "message": message}
+
+        # Samples whose action left nothing pending are routed together with the blank ones
+        applied_ids = [sid for ids in action_groups.values() for sid in ids
+                       if results[sid]["status"] == "success"]
+        if applied_ids:
+            routing_candidates.extend(
+                Sample.objects.filter(sample_id__in=applied_ids)
+                .filter(Q(pending_action__isnull=True) | Q(pending_action=""))
+                .values_list("sample_id", flat=True)
+            )
+
+        if routing_candidates:
+            valid_ids, invalid_meta = filter_valid_routing(request, routing_candidates)
+            routed = []
+            if valid_ids:
+                routed = UtilClass.process_workflow_steps_wetlab(None, request, valid_ids, accession_flag="N") or []
+            message = " ".join(text for _, text in storage.drain())
+            routed_ids = set()
+            for r in routed:
+                routed_ids.add(r["sample_id"])
+                results[r["sample_id"]] = {"sample_id": r["sample_id"], "stage": "routing", "status": "routed",
+                                           "current_step": r.get("current_step")}
+            for meta in invalid_meta:
+                results.setdefault(meta["sample_id"], {"sample_id": meta["sample_id"], "stage": "routing",
+                                                       "status": "not_routed", "message": meta["reason"]})
+            for sid in routing_candidates:
+                if sid not in routed_ids:
+                    results.setdefault(sid, {"sample_id": sid, "stage": "routing", "status": "not_routed",
+                                             "message": message or "No next step available for routing."})
+
+        return [results[sid] for sid in sample_ids if sid in results]
@@ -1,13 +1,15 @@
 import json
+import os
 import uuid
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
-from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 
-PENDING = {}
+from scanner.util import ScanJobStoreUtilClass
+
+SCAN_FILE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tif", ".tiff", ".pdf")
 
 @csrf_exempt
 def start_scan(request):
@@ -22,7 +24,7 @@ def start_scan(request):
 
     # Unique tracking ID
     request_id = str(uuid.uuid4())
-    PENDING[request_id] = {"status": "pending"}
+    ScanJobStoreUtilClass.create_job(request_id, agent_id, request.user)
 
     # Send WebSocket event to agent group
     channel_layer = get_channel_layer()
@@ -40,7 +42,7 @@ def start_scan(request):
 @csrf_exempt
 def upload_scan(request):
     """
-    Agent → upload scanned PNG → notify admin via WS
+    Agent → upload scanned image → notify the requesting user via WS
     """
     if request.method != "POST":
         return JsonResponse({"error": "POST only"}, status=400)
@@ -49,24 +51,28 @@ def upload_scan(request):
     if not request_id:
         return JsonResponse({"error": "request_id missing"}, status=400)
 
+    job = ScanJobStoreUtilClass.get_job(request_id)
+    if job is None:
+        return JsonResponse({"error": "unknown or expired request_id"}, status=404)
+
     if "file" not in request.FILES:
         return JsonResponse({"error": "no file uploaded"}, status=400)
 
     file = request.FILES["file"]
+    extension = os.path.splitext(file.name or "")[1].lower()
+    if extension not in SCAN_FILE_EXTENSIONS:
+        extension = ".png"
 
-    # Save to /media/scans/{uuid}.png
-    save_path = default_storage.save(
-        f"scans/{request_id}.png",
-        ContentFile(file.read())
-    )
+    # Save to /media/scans/{uuid}.{ext}; the uploaded file is written chunk by chunk, not read into memory
+    save_path = default_storage.save(f"scans/{request_id}{extension}", file)
     file_url = default_storage.url(save_path)
 
-    PENDING[request_id] = {"status": "done", "file_url": file_url}
+    ScanJobStoreUtilClass.update_job(request_id, status="done", file_url=file_url)
 
-    # Notify admin browser group
+    # Notify the browser group that requested the scan
     channel_layer = get_channel_layer()
     async_to_sync(channel_layer.group_send)(
-        "notify_admin",                                # FIXED
+        job["notify_group"],
         {
             "type": "scan_completed",                  # FIXED
             "request_id": request_id,
@@ -1,8 +1,12 @@
+import importlib
+
 from auditlog.models import AuditlogHistoryField
 from auditlog.registry import auditlog
 from django.apps import apps
 from django.contrib.auth.models import AbstractUser, Group
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 
 
@@ -156,3 +160,32 @@ auditlog.register(User)
 auditlog.register(JobType)
 auditlog.register(DepartmentPrinter)
 auditlog.register(UserPrinterInfo)
+
+
+@receiver(post_save, sender=User, dispatch_uid='user_save_shell_context_signal')
+def invalidate_user_shell_context(sender, instance, **kwargs):
+    # is_superuser / is_staff / is_active are part of the permission fingerprint
+    module = importlib.import_module("controllerapp.shellcontext")
+    transaction.on_commit(lambda: module.ShellContextUtilClass.invalidate_users([instance.pk]))
+
+
+@receiver(m2m_changed, sender=User.groups.through, dispatch_uid='user_groups_shell_context_signal')
+@receiver(m2m_changed, sender=User.user_permissions.through, dispatch_uid='user_permissions_shell_context_signal')
+@receiver(m2m_changed, sender=User.jobtypes.through, dispatch_uid='user_jobtypes_shell_context_signal')
+@receiver(m2m_changed, sender=Group.permissions.through, dispatch_uid='group_permissions_shell_context_signal')
+def invalidate_shell_context_permissions(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    shell_context = importlib.import_module("controllerapp.shellcontext").ShellContextUtilClass
+    if isinstance(instance, User) and not reverse:
+        transaction.on_commit(lambda: shell_context.invalidate_users([instance.pk]))
+    else:
+        # A group's permissions or members changed (or a clear without pk_set): drop every role entry
+        transaction.on_commit(shell_context.invalidate_all)
+
+
+@receiver(post_save, sender=SiteTimezone, dispatch_uid='sitetimezone_save_static_choices_signal')
+@receiver(post_delete, sender=SiteTimezone, dispatch_uid='sitetimezone_delete_static_choices_signal')
+def invalidate_site_timezone_choices(sender, instance, **kwargs):
+    module = importlib.import_module("util.choices")
+    transaction.on_commit(lambda: module.ChoiceUtilClass.invalidate_static_choices('site_timezone'))
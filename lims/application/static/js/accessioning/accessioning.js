@@ -1791,6 +1791,11 @@ async function startScan() {
         const data = await response.json();
         console.log("Scan request sent:", data);
 
+        // Follow this scan request in case the socket is not tied to a logged in user
+        if (notifySocket && notifySocket.readyState === WebSocket.OPEN) {
+            notifySocket.send(JSON.stringify({type: "subscribe", request_id: data.request_id}));
+        }
+
         alert("Scan started. Waiting for scanner...");
     }
     catch (err) {
@@ -0,0 +1,22 @@
+// Selects rendered by util.choices.RemoteSelect only carry their current option;
+// the remaining options are searched page by page from the lookup endpoint.
+$(document).ready(function () {
+    $('select.remote-choice').each(function () {
+        var select = $(this);
+        if (select.hasClass('select2-hidden-accessible')) {
+            select.select2('destroy');
+        }
+        select.select2({
+            width: 'element',
+            minimumInputLength: 0,
+            ajax: {
+                url: select.data('lookup-url'),
+                dataType: 'json',
+                delay: 250,
+                data: function (params) {
+                    return { 'term': params.term || '', 'page': params.page || 1 };
+                }
+            }
+        });
+    });
+});
@@ -4,13 +4,14 @@ from security.models import SiteTimezone
 from util.models import SequenceGen
 from workflows.models import Workflow
 from .models import AccessionTemplate, PathologyTemplate, BioPharmaAccessionTemplate, Macros
+from util.choices import ChoiceUtilClass
 from util.util import UtilClass
 from controllerapp import settings
-from process.models import SampleType, ContainerType
+from process.models import ContainerType
 from sample.models import Sample, SampleTestMap
-from masterdata.models import Client, BodySite, BodySubSiteMap, BioProject, Sponsor, BioSite, ProjectVisitMap, \
-    AccessionPrefix
+from masterdata.models import BodySite, BodySubSiteMap, BioProject, Sponsor, BioSite, ProjectVisitMap
 from tests.models import ICDCode
+from accessioning.lookups import remote_select
 from accessioning.models import Accession
 from django.db import models, transaction
 from .widgets import LookupWidget, NextLinkWidget, FinishLinkWidget, PrevLinkNextLinkWidget, \
@@ -175,8 +176,7 @@ class AccessionTemplateForm(forms.ModelForm):
         )
         required_reftype = getattr(settings, 'APPLICATION_ACCESSION_PREFIX_REFERENCE', '')
         self.fields["accession_prefix"] = forms.ChoiceField(
-            choices=[(None, "Select an Option")] + [(obj.accession_prefix, obj.accession_prefix) for
-                                                    obj in AccessionPrefix.objects.all()],
+            choices=[(None, "Select an Option")] + ChoiceUtilClass.get_static_choices('accession_prefix'),
             required=False, label="Accession Prefix"
         )
 
@@ -185,11 +185,8 @@ class AccessionTemplateForm(forms.ModelForm):
             choices=[(None, "Select an Option")] + UtilClass.get_refvalues_for_field(required_reftype),
             required=False, label="Payment Type", widget=forms.Select(attrs={'onchange': 'populatePaymentDetails()'}),
         )
-        self.fields['sample_type'].choices = [(None, "Select an Option")] + [(obj.sample_type_id, obj.sample_type) for
-                                                                             obj in SampleType.objects.all()]
-        if 'client_id' in self.fields:
-            self.fields['client_id'].choices = [(None, "Select an Option")] + [(obj.client_id, obj.name) for
-                                                                           obj in Client.objects.all()]
+        self.fields['sample_type'].choices = [(None, "Select an Option")] + ChoiceUtilClass.get_static_choices(
+            'sample_type')
         if self.instance.accession_id is not None:
             self.fields['case_id'].initial = self.instance.accession_id
             self.fields["accession_id"].initial = self.instance.accession_id
@@ -204,9 +201,11 @@ class AccessionTemplateForm(forms.ModelForm):
                   'status', 'insurance_group', 'payment_type', 'move_next_to_client_info_tab', 'hidden_auto_gen_pk',
                   'hidden_accession_prefix', 'receive_dt_timezone', 'accession_type']
         widgets = {
-            'patient_id': forms.Select(attrs={'class': 'form-control', 'onchange': 'populateInsuranceDetails()'}),
+            'patient_id': remote_select('patient',
+                                        attrs={'class': 'form-control', 'onchange': 'populateInsuranceDetails()'}),
             'insurance_id': forms.Select(attrs={'class': 'form-control', 'onchange': 'populateInsuranceGroup()'}),
-            'client_id': forms.Select(attrs={'class': 'form-control', 'onchange': 'populateDoctorsBasedOnClient()'}),
+            'client_id': remote_select('client',
+                                       attrs={'class': 'form-control', 'onchange': 'populateDoctorsBasedOnClient()'}),
             'accession_type': forms.Select(attrs={'class': 'form-control', 'onchange': 'populateAccessionTypeInfo()'}),
         }
 
@@ -283,6 +282,8 @@ class BioPharmaAccessionTemplateForm(AccessionTemplateForm):
         fields = AccessionTemplateForm.Meta.fields + ['project', 'sponsor', 'investigator', 'visit']
 
         widgets = {
+            'patient_id': remote_select('patient'),
+            'client_id': remote_select('client'),
             'sponsor': forms.Select(attrs={
                 'onchange': 'sponsorChanged(this)',  # Trigger for sponsor change
                 'class': 'admin-autocomplete form-control select2',
@@ -1,7 +1,10 @@
+import importlib
 from _decimal import InvalidOperation, Decimal
 from auditlog.models import AuditlogHistoryField
 from auditlog.registry import auditlog
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.utils.html import strip_tags
 from django.utils.translation import gettext_lazy as _
 
@@ -495,3 +498,22 @@ auditlog.register(TestWorkflowStep)
 auditlog.register(TestWFSTPInstrumentMap)
 auditlog.register(TestWFSTPConsumableMap)
 auditlog.register(TestWorkflowStepActionMap)
+
+
+@receiver(post_save, sender=TestWorkflowStep, dispatch_uid='testworkflowstep_save_matrix_signal')
+@receiver(post_delete, sender=TestWorkflowStep, dispatch_uid='testworkflowstep_delete_matrix_signal')
+@receiver(post_save, sender=Workflow, dispatch_uid='workflow_save_matrix_signal')
+@receiver(post_delete, sender=Workflow, dispatch_uid='workflow_delete_matrix_signal')
+@receiver(post_save, sender=WorkflowStep, dispatch_uid='workflowstep_save_matrix_signal')
+@receiver(post_delete, sender=WorkflowStep, dispatch_uid='workflowstep_delete_matrix_signal')
+def invalidate_test_workflow_matrix(sender, instance, **kwargs):
+    # Dropped once the change is committed, so other workers cannot rebuild it from the old rows
+    module = importlib.import_module("tests.util")
+    transaction.on_commit(module.TestWorkflowResolutionUtilClass.invalidate)
+
+
+@receiver(post_save, sender=TestAnalyte, dispatch_uid='testanalyte_save_field_spec_signal')
+@receiver(post_delete, sender=TestAnalyte, dispatch_uid='testanalyte_delete_field_spec_signal')
+def invalidate_analyte_field_specs(sender, instance, **kwargs):
+    module = importlib.import_module("analysis.fieldspec")
+    transaction.on_commit(module.AnalyteFieldSpecUtilClass.invalidate)
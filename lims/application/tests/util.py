@@ -0,0 +1,55 @@
+from django.core.cache import cache
+
+from tests.models import TestWorkflowStep
+
+TEST_WORKFLOW_MATRIX_CACHE_KEY = "test_workflow_resolution_matrix"
+
+
+class TestWorkflowResolutionUtilClass:
+    """
+    Test -> workflow resolution matrix keyed by (test_id, sample_type_id, container_type_id, accession_type_id).
+    Built from TestWorkflowStep in one query, kept in the shared cache and dropped whenever a
+    TestWorkflowStep, Workflow or WorkflowStep is saved or deleted (see the receivers in tests/models.py).
+    Like the per-sample lookups it replaces, the lowest TestWorkflowStep id wins for a key.
+    """
+
+    @staticmethod
+    def build_matrix():
+        matrix = {"all": {}, "wetlab": {}}
+        rows = TestWorkflowStep.objects.filter(
+            workflow_id__isnull=False
+        ).order_by('test_workflow_step_id').values_list(
+            'test_id_id', 'sample_type_id_id', 'container_type_id', 'workflow_id__accession_type_id',
+            'workflow_id_id', 'workflow_step_id__workflow_type'
+        )
+        for test_id, sample_type_id, container_type_id, accession_type_id, workflow_id, workflow_type in rows:
+            key = (test_id, sample_type_id, container_type_id, accession_type_id)
+            matrix["all"].setdefault(key, workflow_id)
+            if workflow_type == 'WetLab':
+                matrix["wetlab"].setdefault(key, workflow_id)
+        return matrix
+
+    @staticmethod
+    def get_matrix():
+        matrix = cache.get(TEST_WORKFLOW_MATRIX_CACHE_KEY)
+        if matrix is None:
+            matrix = TestWorkflowResolutionUtilClass.build_matrix()
+            cache.set(TEST_WORKFLOW_MATRIX_CACHE_KEY, matrix, timeout=None)
+        return matrix
+
+    @staticmethod
+    def invalidate():
+        cache.delete(TEST_WORKFLOW_MATRIX_CACHE_KEY)
+
+    @staticmethod
+    def resolve_workflows(keys, wetlab_only=False):
+        """
+        Resolves workflow ids for (test_id, sample_type_id, container_type_id, accession_type_id) keys.
+        Returns {key: workflow_id}, with None for keys that have no TestWorkflowStep.
+        """
+        matrix = TestWorkflowResolutionUtilClass.get_matrix()["wetlab" if wetlab_only else "all"]
+        resolved = {}
+        for key in keys:
+            normalized = tuple(int(v) if v not in (None, '') else None for v in key)
+            resolved[key] = matrix.get(normalized)
+        return resolved
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:39
+
+from django.db import migrations
+from django.db.models import Min
+
+
+def remove_duplicate_components(apps, schema_editor):
+    # Keep the first row of every (accession, site, component type) before the constraint is added
+    TechnicalProfessionalComponentMap = apps.get_model('tpcm', 'TechnicalProfessionalComponentMap')
+    keep_ids = TechnicalProfessionalComponentMap.objects.values(
+        'accession_id', 'compontent_site_id', 'component_type'
+    ).annotate(keep_id=Min('technical_professional_component_map_id')).values('keep_id')
+    TechnicalProfessionalComponentMap.objects.exclude(technical_professional_component_map_id__in=keep_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('security', '0019_alter_userprinterinfo_options'),
+        ('accessioning', '0011_alter_accession_reporting_doctor'),
+        ('tpcm', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_components, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='technicalprofessionalcomponentmap',
+            unique_together={('accession_id', 'compontent_site_id', 'component_type')},
+        ),
+    ]
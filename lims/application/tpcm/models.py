@@ -53,11 +53,9 @@ class TechnicalProfessionalComponentMap(models.Model):
         verbose_name = _("TechnicalProfessionalComponentMap")
         verbose_name_plural = _("TechnicalProfessionalComponentMaps")
         unique_together = (
-            'technical_professional_component_map_id',
             'accession_id',
             'compontent_site_id',
             'component_type'
-
         )
 
     def __str__(self):
@@ -4,55 +4,59 @@ from django.contrib import messages
 
 class TechnicalProfessionalComponentUtilClass:
     @staticmethod
-    def populate_pc(request, merge_reporting_id):
-        # This is to populate PC post report signout
-        if not merge_reporting_id:
-            raise Exception("Merge Reporting Id is blank")
-
-        user_obj = request.user
+    def get_component_site(request):
+        # Site of the current job type's department, resolved in one query
         JobType = apps.get_model('security', 'JobType')
-        TechnicalProfessionalComponentMap = apps.get_model('tpcm', 'TechnicalProfessionalComponentMap')
-
-        # Step 1: Get jobtype name from session
         jobtype_name = request.session.get('currentjobtype', None)
         if not jobtype_name:
             raise Exception("Job Type doesn't exists")
 
-        # Step 2: Get JobType instance
-        try:
-            jobtype_obj = JobType.objects.get(name=jobtype_name)
-        except JobType.DoesNotExist:
+        jobtype_obj = JobType.objects.select_related('departmentid__siteid').filter(name=jobtype_name).first()
+        if not jobtype_obj:
             raise Exception("Job Type doesn't exists")
 
-        # Step 3: Get Department and Site
         department = jobtype_obj.departmentid
-        if not department or not department.siteid:
-            if not department:
-                raise Exception("Department doesn't exists")
-            if not department.siteid:
-                raise Exception("Site doesn't exists")
-            return  # or log error
+        if not department:
+            raise Exception("Department doesn't exists")
+        if not department.siteid:
+            raise Exception("Site doesn't exists")
+        return department.siteid
+
+    @staticmethod
+    def populate_components(accession_ids, site, component_types, user_obj):
+        """
+        Creates the missing (accession, site, component type) rows in one idempotent insert;
+        rows that already exist are skipped by the unique constraint.
+        """
+        TechnicalProfessionalComponentMap = apps.get_model('tpcm', 'TechnicalProfessionalComponentMap')
+        tpcm_objects = [
+            TechnicalProfessionalComponentMap(
+                accession_id_id=accession_id,
+                compontent_site_id=site,
+                component_type=component_type,
+                created_by=user_obj,
+                mod_by=user_obj
+            )
+            for accession_id in accession_ids for component_type in component_types
+        ]
+        if tpcm_objects:
+            TechnicalProfessionalComponentMap.objects.bulk_create(tpcm_objects, ignore_conflicts=True)
+
+    @staticmethod
+    def populate_pc(request, merge_reporting_id):
+        # This is to populate PC post report signout
+        if not merge_reporting_id:
+            raise Exception("Merge Reporting Id is blank")
 
-        site = department.siteid
+        site = TechnicalProfessionalComponentUtilClass.get_component_site(request)
 
         MergeReporting = apps.get_model('analysis', 'MergeReporting')
-        merge_reporting_obj = MergeReporting.objects.get(merge_reporting_id=merge_reporting_id)
-        accession_id = merge_reporting_obj.accession_id
+        accession_id = MergeReporting.objects.filter(merge_reporting_id=merge_reporting_id).values_list(
+            'accession_id', flat=True).first()
         if not accession_id:
             raise Exception("Accession Id is blank")
 
-        qs_existing_tpcm_records = TechnicalProfessionalComponentMap.objects.filter(accession_id=accession_id,
-                                                                            compontent_site_id=site,
-                                                                            component_type="PC")
-        if not qs_existing_tpcm_records:
-            tpcm_obj = TechnicalProfessionalComponentMap(
-                accession_id=accession_id,
-                compontent_site_id=site,
-                component_type="PC",
-                created_by=user_obj,
-                mod_by=user_obj
-            )
-            tpcm_obj.save()
+        TechnicalProfessionalComponentUtilClass.populate_components([accession_id], site, ['PC'], request.user)
 
     @staticmethod
     def populate_tc_tca(accession_list, request, user_obj):
@@ -60,66 +64,12 @@ class TechnicalProfessionalComponentUtilClass:
         if not accession_list:
             messages.error(request, "Accession Id is blank.")
             return
-        accession_list = set(accession_list)
-
-        JobType = apps.get_model('security', 'JobType')
-        Accession = apps.get_model('accessioning', 'Accession')
-        TechnicalProfessionalComponentMap = apps.get_model('tpcm', 'TechnicalProfessionalComponentMap')
+        accession_ids = sorted({getattr(accession, 'pk', accession) for accession in accession_list})
 
-        # Step 1: Get jobtype name from session
-        jobtype_name = request.session.get('currentjobtype', None)
-        if not jobtype_name:
-            messages.error(request, "Job Type doesn't exists")
-            return  # or log error
-
-        # Step 2: Get JobType instance
         try:
-            jobtype_obj = JobType.objects.get(name=jobtype_name)
-        except JobType.DoesNotExist:
-            messages.error(request, "Job Type doesn't exists")
-            return  # or log error
-
-        # Step 3: Get Department and Site
-        department = jobtype_obj.departmentid
-        if not department or not department.siteid:
-            if not department:
-                messages.error(request, "Department doesn't exists")
-            if not department.siteid:
-                messages.error(request, "Site doesn't exists")
-            return  # or log error
-
-        site = department.siteid
-
-        # Step 4: Prepare TPCM records for all accessions
-        tpcm_objects = []
-        accessions = Accession.objects.filter(accession_id__in=accession_list)
-        qs_existing_tpcm_records = TechnicalProfessionalComponentMap.objects.filter(accession_id__in=accession_list,
-                                                                                    component_type__in=['TC', 'TCA'])
-        for accession in accessions:
-            for component_type in ['TC', 'TCA']:
-                if qs_existing_tpcm_records:
-                    filter_qs_tpcm_records = qs_existing_tpcm_records.filter(accession_id=accession,
-                                                                             compontent_site_id=site,
-                                                                             component_type=component_type)
-                    if not filter_qs_tpcm_records:
-                        tpcm_obj = TechnicalProfessionalComponentMap(
-                            accession_id=accession,
-                            compontent_site_id=site,
-                            component_type=component_type,
-                            created_by=user_obj,
-                            mod_by=user_obj
-                        )
-                        tpcm_objects.append(tpcm_obj)
-                else:
-                    tpcm_obj = TechnicalProfessionalComponentMap(
-                        accession_id=accession,
-                        compontent_site_id=site,
-                        component_type=component_type,
-                        created_by=user_obj,
-                        mod_by=user_obj
-                    )
-                    tpcm_objects.append(tpcm_obj)
+            site = TechnicalProfessionalComponentUtilClass.get_component_site(request)
+        except Exception as e:
+            messages.error(request, str(e))
+            return
 
-        # Step 5: Bulk create (with conflict ignore for safety)
-        if tpcm_objects:
-            TechnicalProfessionalComponentMap.objects.bulk_create(tpcm_objects, ignore_conflicts=True)
+        TechnicalProfessionalComponentUtilClass.populate_components(accession_ids, site, ['TC', 'TCA'], user_obj)
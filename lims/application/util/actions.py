@@ -5,7 +5,6 @@ from collections import defaultdict
 
 from django.apps import apps
 from django.conf import settings
-from django.db import connection
 from django.db import models
 from django.db import transaction
 from django.db.models import Q, When, Value, Case, IntegerField, F
@@ -13,7 +12,8 @@ from django_auto_logout.utils import now
 
 import util.util
 from accessioning.models import Accession, BioPharmaAccession
-from analysis.models import ReportOptionDtl, ReportSignOut, Attachment, ReportOption, MergeReporting, MergeReportingDtl
+from analysis.models import Attachment, ReportOption, MergeReporting, MergeReportingDtl
+from analysis.reportbuilder import MergeReportBuilderUtilClass
 from controllerapp.settings import *
 from ihcworkflow.forms import QCStatusForm
 from ihcworkflow.models import IhcWorkflow
@@ -462,14 +462,18 @@ class GenericAction:
         user_map_obj = User.objects.get(username=request.user.username)
         sampletestmap_ids_to_update = []
         container_type = ContainerType.objects.get(container_type=CONTAINER_TYPE_SLIDE_UNSTAINED)
+        # Pending test maps of all parents in one query
+        sample_test_maps_by_parent = {}
+        for test_map in SampleTestMap.objects.filter(sample_id__in=sample_maps).exclude(
+                microtomy_completed=True).order_by("sample_id", "sample_test_map_id"):
+            sample_test_maps_by_parent.setdefault(test_map.sample_id_id, []).append(test_map)
         for parent_sample in sample_maps:
-            sample_test_maps = SampleTestMap.objects.filter(sample_id=parent_sample).exclude(
-                microtomy_completed=True).order_by("sample_id")
+            sample_test_maps = sample_test_maps_by_parent.get(parent_sample.sample_id)
 
-            if not sample_test_maps.exists():
+            if not sample_test_maps:
                 continue  # Skip if no test is mapped to the sample
             for test_map in sample_test_maps:
-                test_id = str(test_map.test_id.test_id)
+                test_id = str(test_map.test_id_id)
                 list_sample_info_for_microtomy.append(
                     {'parent_sample_id': parent_sample, 'sample_type': parent_sample.sample_type,
                      'container_type': container_type, 'copies': '1',
@@ -553,13 +557,10 @@ class GenericAction:
 
                         bulk_insert_map[(app_name, model)].append(sample.sample_id)
 
-            with connection.cursor() as cursor:
-                for (app_name, model), sample_ids in bulk_insert_map.items():
-                    table_name = f"{app_name}_{model}"
-                    query = f"INSERT INTO {table_name} (sample_ptr_id) VALUES (%s) ON CONFLICT DO NOTHING;"
-                    values = [(sample_id,) for sample_id in sample_ids]  # Convert to tuple list
-                    cursor.executemany(query, values)  # Bulk insert
-                    successfully_inserted_samples.update(sample_ids)
+            for (app_name, model), sample_ids in bulk_insert_map.items():
+                # Child table rows plus the sample_kind discriminator
+                Sample.objects.attach_kind(apps.get_model(app_name, model), sample_ids)
+                successfully_inserted_samples.update(sample_ids)
 
             if successfully_inserted_samples:
                 Sample.objects.filter(sample_id__in=successfully_inserted_samples).update(isvisible=False)
@@ -804,7 +805,7 @@ class GenericAction:
         try:
             with transaction.atomic():
                 for sample_test_map in smearing_queryset:
-                    parent_sample = Sample.objects.filter(sample_id=sample_test_map.sample_id).first()
+                    parent_sample = sample_test_map.sample_id
                     sample_id = parent_sample.sample_id
                     test_id = str(sample_test_map.test_id_id)
                     list_sample_info_for_staining.append(
@@ -952,22 +953,11 @@ class GenericAction:
                 if dtl_rows.exists():
                     reporting_version_id = GenericUtilClass.get_next_sequence(merge_reporting_id,
                                                                               "ReportSignOut", user_map_obj.id)
-                    signout_entries = []
-                    for dtl in dtl_rows:
-                        report_signout_instance = ReportSignOut()
-                        report_signout_instance.merge_reporting_id = merge_report
-                        report_signout_instance.report_option_id = dtl.report_option_id
-                        report_signout_instance.version_id = reporting_version_id
-                        report_signout_instance.analyte_id = dtl.analyte_id
-                        report_signout_instance.analyte_value = dtl.analyte_value
-                        report_signout_instance.created_by = user_map_obj
-                        report_signout_instance.mod_by = user_map_obj
-                        signout_entries.append(report_signout_instance)
-
-                    if not signout_entries:
-                        raise Exception("No Records to create in Report Signout Table")
+                    signout_count = MergeReportBuilderUtilClass.snapshot_signout(
+                        merge_report.merge_reporting_id, max_version, reporting_version_id, user_map_obj.id)
 
-                    ReportSignOut.objects.bulk_create(signout_entries)
+                    if not signout_count:
+                        raise Exception("No Records to create in Report Signout Table")
 
                     # ----------- BEGIN DYNAMIC JASPER REPORT SELECTION ------------
                     accession = merge_report.accession_id  # adjust field name if different
@@ -1137,29 +1127,9 @@ class GenericAction:
                             merge_reporting_id=merge_reporting_instance
                         ).values_list('version_id', flat=True).first()
 
-                        missing_details = ReportOptionDtl.objects.filter(report_option_id__in=missing_report_option_ids)
-
-                        list_merge_reporting_dtl = []
-
-                        for report_option_id in missing_report_option_ids:
-                            current_details = missing_details.filter(report_option_id=report_option_id)
-                            for detail in current_details:
-                                dtl_seq_no = GenericUtilClass.get_next_sequence("MRD", "MergeReportingDtl",
-                                                                                user_map_obj.id)
-                                merge_reporting_dtl_id = f"MRD-{dtl_seq_no:08}"
-                                merge_reporting_dtl_instance = MergeReportingDtl()
-                                merge_reporting_dtl_instance.merge_reporting_dtl_id = merge_reporting_dtl_id
-                                merge_reporting_dtl_instance.version_id = existing_version_id
-                                merge_reporting_dtl_instance.merge_reporting_id = merge_reporting_instance
-                                merge_reporting_dtl_instance.report_option_id = detail.report_option_id
-                                merge_reporting_dtl_instance.analyte_id = detail.analyte_id
-                                merge_reporting_dtl_instance.analyte_value = detail.analyte_value
-                                merge_reporting_dtl_instance.created_by = user_map_obj
-                                merge_reporting_dtl_instance.mod_by = user_map_obj
-                                list_merge_reporting_dtl.append(merge_reporting_dtl_instance)
-
-                        if list_merge_reporting_dtl:
-                            MergeReportingDtl.objects.bulk_create(list_merge_reporting_dtl)
+                        MergeReportBuilderUtilClass.copy_report_option_details(
+                            merge_reporting_instance.merge_reporting_id, sorted(missing_report_option_ids),
+                            existing_version_id, user_map_obj.id)
 
                     dynamic_part_for_redirecting = (
                         f"/gulfcoastpathologists/"
@@ -1192,32 +1162,13 @@ class GenericAction:
                 merge_reporting_instance.assign_pathologist = user_map_obj
                 merge_reporting_instance.save()
 
-                queryset_report_option_details = ReportOptionDtl.objects.filter(
-                    report_option_id__in=queryset_report_option)
-
-                list_merge_reporting_dtl = []
                 merge_reporting_dtl_version_prefix = f"{merge_reporting_instance.merge_reporting_id}"
                 merge_reporting_dtl_version_id = GenericUtilClass.get_next_sequence(
                     merge_reporting_dtl_version_prefix, "MergeReportingDtl", user_map_obj.id)
 
-                for report_option_id in queryset_report_option:
-                    current_details = queryset_report_option_details.filter(report_option_id=report_option_id)
-                    for detail in current_details:
-                        dtl_seq_no = GenericUtilClass.get_next_sequence("MRD", "MergeReportingDtl", user_map_obj.id)
-                        merge_reporting_dtl_id = f"MRD-{dtl_seq_no:08}"
-                        merge_reporting_dtl_instance = MergeReportingDtl()
-                        merge_reporting_dtl_instance.merge_reporting_dtl_id = merge_reporting_dtl_id
-                        merge_reporting_dtl_instance.version_id = merge_reporting_dtl_version_id
-                        merge_reporting_dtl_instance.merge_reporting_id = merge_reporting_instance
-                        merge_reporting_dtl_instance.report_option_id = detail.report_option_id
-                        merge_reporting_dtl_instance.analyte_id = detail.analyte_id
-                        merge_reporting_dtl_instance.analyte_value = detail.analyte_value
-                        merge_reporting_dtl_instance.created_by = user_map_obj
-                        merge_reporting_dtl_instance.mod_by = user_map_obj
-                        list_merge_reporting_dtl.append(merge_reporting_dtl_instance)
-
-                if list_merge_reporting_dtl:
-                    MergeReportingDtl.objects.bulk_create(list_merge_reporting_dtl)
+                MergeReportBuilderUtilClass.copy_report_option_details(
+                    merge_reporting_instance.merge_reporting_id, list(queryset_report_option),
+                    merge_reporting_dtl_version_id, user_map_obj.id)
 
                 dynamic_part_for_redirecting = (
                     f"/gulfcoastpathologists/"
@@ -0,0 +1,54 @@
+import json
+
+from auditlog.context import threadlocal
+from auditlog.diff import model_instance_diff
+from auditlog.models import LogEntry
+from django.contrib.contenttypes.models import ContentType
+from django.utils.encoding import smart_str
+
+
+class AuditUtilClass:
+    """
+    Builds auditlog LogEntry rows for changes written with bulk_update, bulk_create or with auditlog disabled,
+    where the per-instance signal receivers do not run. The entries match what the receivers would write,
+    including the actor and the remote address recorded by AuditlogMiddleware.
+    """
+
+    @staticmethod
+    def get_remote_addr():
+        return getattr(threadlocal, "auditlog", {}).get("remote_addr")
+
+    @staticmethod
+    def build_log_entries(action, rows, actor=None):
+        """
+        rows holds (old, new, fields_to_check) tuples; old is None for CREATE and new is None for DELETE.
+        Rows without changes are skipped.
+        """
+        remote_addr = AuditUtilClass.get_remote_addr()
+        actor = actor if actor is not None and actor.is_authenticated else None
+        log_entries = []
+        for old, new, fields_to_check in rows:
+            instance = new if new is not None else old
+            changes = model_instance_diff(old, new, fields_to_check=fields_to_check)
+            if not changes:
+                continue
+            pk = instance.pk
+            log_entries.append(LogEntry(
+                content_type=ContentType.objects.get_for_model(instance),
+                object_pk=smart_str(pk),
+                object_id=pk if isinstance(pk, int) else None,
+                object_repr=smart_str(instance),
+                serialized_data=LogEntry.objects._get_serialized_data_or_none(instance),
+                action=action,
+                changes=json.dumps(changes),
+                actor=actor,
+                remote_addr=remote_addr,
+            ))
+        return log_entries
+
+    @staticmethod
+    def bulk_log(action, rows, actor=None):
+        log_entries = AuditUtilClass.build_log_entries(action, rows, actor)
+        if log_entries:
+            LogEntry.objects.bulk_create(log_entries)
+        return len(log_entries)
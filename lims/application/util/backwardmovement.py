@@ -0,0 +1,253 @@
+import hashlib
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery, Value, When, IntegerField, Case, F
+from django.db.models.functions import Coalesce
+
+BACKWARD_MOVEMENT_CHILD_CREATION_MISMATCH = ("All selected records must have the same 'Child Sample Creation' "
+                                             "status for their Container Type.")
+BACKWARD_MOVEMENT_CHILD_CREATION_SINGLE = ("For records where 'Child Sample Creation' is True, "
+                                           "only single selection is allowed.")
+BACKWARD_MOVEMENT_MIXED_MODE = ("Mixed mode not allowed. Please select records which are all either "
+                                "driven by workflow or by tests.")
+BACKWARD_MOVEMENT_WORKFLOW_MISMATCH = ("For multiple selections (where 'Child Sample Creation' is False), "
+                                       "all records must have the same Workflow and Current Step.")
+BACKWARD_MOVEMENT_TEST_MISMATCH = ("For multiple selections (where 'Child Sample Creation' is False), all records "
+                                   "must have the same Test, Sample Type, Container Type, Workflow and Current Step.")
+
+
+class BackwardMovementUtilClass:
+    """
+    Backward movement eligibility of a selection, computed in a fixed number of queries:
+    container child-creation flag, effective workflow, first test map and current step position of every record,
+    the validation result and the steps the first record may be moved back to.
+    The result is cached per session and selection so the popup validation, the prompt and the submit
+    all use the same computation.
+    """
+
+    @staticmethod
+    def get_cache_key(request, model, ids):
+        owner = request.session.session_key or f"user_{request.user.pk}"
+        selection = ",".join(sorted(str(pk) for pk in ids))
+        digest = hashlib.md5(f"{model._meta.label_lower}:{selection}".encode()).hexdigest()
+        return f"backward_movement_{owner}_{digest}"
+
+    @staticmethod
+    def get_eligibility(request, model, ids):
+        cache_key = BackwardMovementUtilClass.get_cache_key(request, model, ids)
+        eligibility = cache.get(cache_key)
+        if eligibility is None:
+            eligibility = BackwardMovementUtilClass.compute_eligibility(model, ids)
+            cache.set(cache_key, eligibility, timeout=settings.BACKWARD_MOVEMENT_CACHE_TIMEOUT)
+        return eligibility
+
+    @staticmethod
+    def invalidate(request, model, ids):
+        cache.delete(BackwardMovementUtilClass.get_cache_key(request, model, ids))
+
+    @staticmethod
+    def compute_eligibility(model, ids):
+        SampleTestMap = apps.get_model('sample', 'SampleTestMap')
+        WorkflowStep = apps.get_model('workflows', 'WorkflowStep')
+
+        rows = model.objects.filter(pk__in=ids).annotate(
+            effective_workflow_id=Case(
+                When(accession_sample_id__isnull=True, then=F('workflow_id')),
+                When(accession_sample_id__isnull=False, then=F('accession_sample__workflow_id')),
+                default=Value(None),
+                output_field=IntegerField()
+            )
+        ).order_by('pk').values('pk', 'container_type_id', 'container_type__child_sample_creation',
+                                'sample_type_id', 'current_step', 'effective_workflow_id')
+        records = {}
+        for row in rows:
+            records[str(row['pk'])] = {
+                'container_type_id': row['container_type_id'],
+                'child_sample_creation': row['container_type__child_sample_creation'],
+                'sample_type_id': row['sample_type_id'],
+                'current_step': row['current_step'],
+                'effective_workflow_id': row['effective_workflow_id'],
+                'test_id': None,
+                'test_workflow_id': None,
+                'has_test_map': False,
+                'current_step_no': None,
+            }
+
+        # First test map of every record
+        for sample_id, test_id, workflow_id in SampleTestMap.objects.filter(
+                sample_id_id__in=list(records)).order_by('sample_test_map_id').values_list(
+                'sample_id_id', 'test_id_id', 'workflow_id_id'):
+            record = records[str(sample_id)]
+            if not record['has_test_map']:
+                record.update(test_id=test_id, test_workflow_id=workflow_id, has_test_map=True)
+
+        # Position of every record's current step in its workflow
+        workflow_ids = {record['test_workflow_id'] or record['effective_workflow_id'] for record in records.values()}
+        step_positions = {
+            (workflow_id, step_id): step_no
+            for workflow_id, step_id, step_no in WorkflowStep.objects.filter(
+                workflow_id_id__in=[w for w in workflow_ids if w], workflow_type='WetLab'
+            ).values_list('workflow_id_id', 'step_id', 'step_no')
+        }
+        for record in records.values():
+            workflow_id = record['test_workflow_id'] or record['effective_workflow_id']
+            record['current_step_no'] = step_positions.get((workflow_id, record['current_step']))
+
+        eligibility = {
+            'ids': list(records),
+            'records': records,
+            'error': BackwardMovementUtilClass.validate_selection(records),
+            'current_step': None,
+            'prior_steps': [],
+            'prompt_error': None,
+        }
+        if records:
+            BackwardMovementUtilClass.add_prior_steps(eligibility, model, records[eligibility['ids'][0]],
+                                                      eligibility['ids'][0])
+        return eligibility
+
+    @staticmethod
+    def validate_selection(records):
+        if not records:
+            return "Please select at least one record."
+
+        first_child_creation = None
+        for record_id, record in records.items():
+            if record['container_type_id'] is None:
+                return f"Container Type with ID 'None' does not exist for record '{record_id}'."
+            if first_child_creation is None:
+                first_child_creation = record['child_sample_creation']
+            elif record['child_sample_creation'] != first_child_creation:
+                return BACKWARD_MOVEMENT_CHILD_CREATION_MISMATCH
+
+        if first_child_creation and len(records) > 1:
+            return BACKWARD_MOVEMENT_CHILD_CREATION_SINGLE
+
+        if not first_child_creation and len(records) > 1:
+            first_record_data = None
+            first_workflow_driven = None
+            for record_id, record in records.items():
+                if record['effective_workflow_id']:
+                    current_record_data = {
+                        'workflow_id': record['effective_workflow_id'],
+                        'current_step': record['current_step'],
+                    }
+                    current_workflow_driven = True
+                elif record['has_test_map']:
+                    current_record_data = {
+                        'test_id': record['test_id'],
+                        'sample_type_id': record['sample_type_id'],
+                        'container_type_id': record['container_type_id'],
+                        'workflow_id': record['test_workflow_id'],
+                        'current_step': record['current_step'],
+                    }
+                    current_workflow_driven = False
+                else:
+                    return f"Record '{record_id}' has no associated test map."
+
+                if first_workflow_driven is None:
+                    first_workflow_driven = current_workflow_driven
+                elif current_workflow_driven != first_workflow_driven:
+                    return BACKWARD_MOVEMENT_MIXED_MODE
+                if first_record_data is None:
+                    first_record_data = current_record_data
+                elif current_record_data != first_record_data:
+                    if current_workflow_driven:
+                        return BACKWARD_MOVEMENT_WORKFLOW_MISMATCH
+                    return BACKWARD_MOVEMENT_TEST_MISMATCH
+        return None
+
+    @staticmethod
+    def add_prior_steps(eligibility, model, record, record_id):
+        """
+        Steps the first record of the selection may be moved back to: the backward-movement enabled
+        test workflow steps before the current step, or the previous step of the sample workflow.
+        """
+        TestWorkflowStep = apps.get_model('tests', 'TestWorkflowStep')
+        TestWorkflowStepActionMap = apps.get_model('tests', 'TestWorkflowStepActionMap')
+        WorkflowStep = apps.get_model('workflows', 'WorkflowStep')
+
+        if not record['current_step']:
+            eligibility['prompt_error'] = "Selected record or its current step is missing."
+            return
+        eligibility['current_step'] = record['current_step']
+
+        if not record['has_test_map']:
+            eligibility['prompt_error'] = f"Record '{record_id}' has no associated test map."
+            return
+
+        workflow_id = record['test_workflow_id'] or record['effective_workflow_id']
+        if not (record['test_id'] and workflow_id):
+            return
+        if record['current_step_no'] is None:
+            eligibility['prompt_error'] = (f"Step '{record['current_step']}' not found in workflow '{workflow_id}' "
+                                           f"for the selected test.")
+            return
+
+        prior_steps = []
+        if record['test_workflow_id']:
+            prior_steps = TestWorkflowStep.objects.filter(
+                backward_movement='Y',
+                container_type_id=record['container_type_id'],
+                sample_type_id_id=record['sample_type_id'],
+                test_id_id=record['test_id'],
+                workflow_id_id=record['test_workflow_id'],
+                workflow_step_id__step_no__lt=record['current_step_no'],
+                workflow_step_id__workflow_type='WetLab'
+            ).annotate(
+                action=Subquery(
+                    TestWorkflowStepActionMap.objects.filter(
+                        testwflwstepmap_id=OuterRef('pk'),
+                        sequence=1
+                    ).values('action')[:1]
+                )
+            ).annotate(
+                action=Coalesce('action', Value(''))
+            ).values(
+                'pk',
+                'workflow_id_id',
+                'workflow_step_id__step_id',
+                'workflow_step_id__step_no',
+                'workflow_step_id__department',
+                'action',
+            ).order_by('workflow_step_id__step_no')
+
+        if record['effective_workflow_id']:
+            prior_steps = WorkflowStep.objects.filter(
+                backward_movement='Y',
+                workflow_id_id=record['effective_workflow_id'],
+                step_no=record['current_step_no'] - 1,
+                workflow_type='WetLab'
+            ).annotate(
+                action=Subquery(
+                    TestWorkflowStepActionMap.objects.filter(
+                        workflow_step_id_id=OuterRef('pk'),
+                        sequence=1
+                    ).values('action')[:1]
+                ),
+                test_workflow_step_id=Value('')  # static field
+            ).annotate(
+                action=Coalesce('action', Value('')),
+                workflow_step_id__step_id=F('step_id'),
+                workflow_step_id__step_no=F('step_no'),
+                workflow_step_id__department=F('department'),
+            ).values(
+                'test_workflow_step_id',
+                'workflow_id_id',
+                'workflow_step_id__step_id',
+                'workflow_step_id__step_no',
+                'workflow_step_id__department',
+                'action'
+            ).order_by('step_no')
+
+        eligibility['prior_steps'] = list(prior_steps)
+
+    @staticmethod
+    def is_allowed_target(eligibility, workflow_id, step_id, step_no):
+        return any(
+            str(step['workflow_id_id']) == str(workflow_id) and step['workflow_step_id__step_id'] == step_id
+            and step['workflow_step_id__step_no'] == step_no
+            for step in eligibility['prior_steps']
+        )
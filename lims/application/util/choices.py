@@ -0,0 +1,159 @@
+import hashlib
+
+from django import forms
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+REFVALUE_CHOICES_VERSION_CACHE_KEY = "refvalue_choices_version"
+
+# Small masters rendered in full on every accession page: name -> (app_label, model, value field, label field)
+STATIC_CHOICE_SETS = {
+    'sample_type': ('process', 'SampleType', 'sample_type_id', 'sample_type'),
+    'accession_prefix': ('masterdata', 'AccessionPrefix', 'accession_prefix', 'accession_prefix'),
+    'site_timezone': ('security', 'SiteTimezone', 'name', 'name'),
+}
+
+
+class ChoiceUtilClass:
+    """
+    Cached choice lists for small, rarely edited masters and reference values. Entries are dropped by the
+    receivers in configuration, process, masterdata and security models.py when the rows change.
+    Large masters (clients, patients, templates) are not listed here; they use a RemoteLookup instead.
+    """
+
+    @staticmethod
+    def get_static_cache_key(name):
+        return f"static_choices_{name}"
+
+    @staticmethod
+    def get_static_choices(name):
+        cache_key = ChoiceUtilClass.get_static_cache_key(name)
+        choices = cache.get(cache_key)
+        if choices is None:
+            app_label, model_name, value_field, label_field = STATIC_CHOICE_SETS[name]
+            model = apps.get_model(app_label, model_name)
+            choices = list(model.objects.values_list(value_field, label_field))
+            cache.set(cache_key, choices, timeout=settings.STATIC_CHOICES_CACHE_TIMEOUT)
+        return choices
+
+    @staticmethod
+    def invalidate_static_choices(name):
+        cache.delete(ChoiceUtilClass.get_static_cache_key(name))
+
+    @staticmethod
+    def get_refvalue_version():
+        version = cache.get(REFVALUE_CHOICES_VERSION_CACHE_KEY)
+        if version is None:
+            cache.add(REFVALUE_CHOICES_VERSION_CACHE_KEY, 1, timeout=None)
+            version = cache.get(REFVALUE_CHOICES_VERSION_CACHE_KEY, 1)
+        return version
+
+    @staticmethod
+    def invalidate_refvalue_choices():
+        # A value can move between reference types, so every reference type is dropped at once
+        try:
+            cache.incr(REFVALUE_CHOICES_VERSION_CACHE_KEY)
+        except ValueError:
+            cache.set(REFVALUE_CHOICES_VERSION_CACHE_KEY, 1, timeout=None)
+
+    @staticmethod
+    def get_refvalue_choices(ref_name):
+        version = ChoiceUtilClass.get_refvalue_version()
+        cache_key = f"refvalue_choices_{version}_{hashlib.md5(str(ref_name).encode()).hexdigest()}"
+        choices = cache.get(cache_key)
+        if choices is None:
+            RefValues = apps.get_model('configuration', 'RefValues')
+            choices = list(RefValues.objects.filter(reftype_id__name=ref_name).values_list("value", "display_value"))
+            cache.set(cache_key, choices, timeout=settings.STATIC_CHOICES_CACHE_TIMEOUT)
+        return choices
+
+
+class RemoteLookup:
+    """
+    A choice source that is too large to render into a <select>. The page only carries the selected option;
+    the rest is searched page by page through the remote lookup AJAX endpoint of the owning app.
+    Subclasses set the queryset, search lookups and ordering; ordering must be unique for stable paging.
+    """
+    value_field = 'pk'
+    search_fields = ()
+    ordering = ('pk',)
+    only_fields = None
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def get_value(self, obj):
+        return getattr(obj, self.value_field)
+
+    def get_label(self, obj):
+        return str(obj)
+
+    def get_search_filter(self, term):
+        search_filter = Q()
+        for lookup in self.search_fields:
+            search_filter |= Q(**{lookup: term})
+        return search_filter
+
+    def _get_base_queryset(self):
+        queryset = self.get_queryset()
+        if self.only_fields:
+            queryset = queryset.only(*self.only_fields)
+        return queryset
+
+    def search(self, term, page):
+        """Returns one page of (value, label) pairs matching term and whether a further page exists."""
+        page_size = settings.REMOTE_CHOICE_PAGE_SIZE
+        queryset = self._get_base_queryset()
+        if term:
+            queryset = queryset.filter(self.get_search_filter(term))
+        offset = (page - 1) * page_size
+        # One extra row tells whether there is a next page without a COUNT over the whole master
+        rows = list(queryset.order_by(*self.ordering)[offset:offset + page_size + 1])
+        return [(self.get_value(obj), self.get_label(obj)) for obj in rows[:page_size]], len(rows) > page_size
+
+    def get_choices(self, values):
+        values = [value for value in values if value not in (None, '')]
+        if not values:
+            return []
+        objects = self._get_base_queryset().filter(**{f"{self.value_field}__in": values})
+        return [(self.get_value(obj), self.get_label(obj)) for obj in objects]
+
+    def is_valid_value(self, value):
+        return self.get_queryset().filter(**{self.value_field: value}).exists()
+
+
+class RemoteSelect(forms.Select):
+    """
+    Select that renders only the empty option and the current value; js/util/remotechoice.js turns it into
+    a select2 box that pages through lookup_url. Works for ChoiceField and ModelChoiceField alike.
+    """
+
+    class Media:
+        js = ('js/util/remotechoice.js',)
+
+    def __init__(self, lookup, lookup_url, attrs=None):
+        attrs = dict(attrs or {})
+        attrs['class'] = f"{attrs.get('class', '')} remote-choice".strip()
+        attrs['data-lookup-url'] = lookup_url
+        super().__init__(attrs)
+        self.lookup = lookup
+
+    def optgroups(self, name, value, attrs=None):
+        # The field's choices (a queryset iterator for model fields) are never iterated
+        self.choices = [("", "Select an Option")] + [(str(option_value), label) for option_value, label in
+                                                     self.lookup.get_choices(value)]
+        return super().optgroups(name, value, attrs)
+
+
+class RemoteChoiceField(forms.ChoiceField):
+    """ChoiceField over a RemoteLookup: a submitted value is checked with one indexed query, not a choice list."""
+
+    def __init__(self, lookup, lookup_url, widget_attrs=None, **kwargs):
+        kwargs.setdefault('widget', RemoteSelect(lookup, lookup_url, attrs=widget_attrs))
+        super().__init__(choices=(), **kwargs)
+        self.lookup = lookup
+
+    def valid_value(self, value):
+        return self.lookup.is_valid_value(value)
@@ -0,0 +1,137 @@
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from logutil.log import log
+
+STORAGE_TIER_HOT = 'hot'
+STORAGE_TIER_COLD = 'cold'
+STORAGE_TIER_CHOICES = (
+    (STORAGE_TIER_HOT, 'Hot'),
+    (STORAGE_TIER_COLD, 'Cold'),
+)
+
+# Only rows in one of these statuses are moved to the cold tier
+TERMINAL_SAMPLE_STATUSES = ('Completed', 'Cancelled')
+TERMINAL_REPORTING_STATUSES = ('Completed', 'Cancelled')
+
+
+class StorageTierQuerySet(models.QuerySet):
+    """
+    Rewarms the cold rows an update() touches when it writes status_field. bulk_update() goes through update(),
+    so bulk edits and routing are covered as well.
+    """
+    status_field = None
+
+    @staticmethod
+    def rewarm(pks):
+        raise NotImplementedError
+
+    def update(self, **kwargs):
+        if self.status_field not in kwargs:
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            cold_pks = list(self.filter(storage_tier=STORAGE_TIER_COLD).values_list('pk', flat=True))
+            rows = super().update(**kwargs)
+            if cold_pks:
+                self.rewarm(cold_pks)
+        return rows
+
+
+class StorageTierUtilClass:
+    """
+    Hot/cold tiering of Sample, SampleTestMap, ReportOption and RoutingInfo.
+    Completed and cancelled rows that have not been modified for STORAGE_TIER_COLD_AFTER_DAYS are moved to the
+    cold tier by a scheduled task; test maps and routing rows follow their sample or report option.
+    Active worklists filter on the hot tier, which is served by partial indexes that only hold hot rows.
+    Historical changelists do not filter on the tier and read both.
+    A cold row that is reopened (its status leaves the terminal set) is moved back to the hot tier by save() and
+    by any queryset update() or bulk_update() that writes its status; save() never writes the tier it holds in memory.
+    """
+
+    @staticmethod
+    def hot_test_maps():
+        # Prefetch for worklist rows; the test maps of hot samples are hot as well
+        SampleTestMap = apps.get_model('sample', 'SampleTestMap')
+        return Prefetch('sampletestmap_set',
+                        queryset=SampleTestMap.objects.filter(storage_tier=STORAGE_TIER_HOT).select_related('test_id'))
+
+    @staticmethod
+    def move_to_cold_tier(cold_after_days=None, batch_size=None):
+        """Moves aged terminal rows to the cold tier in batches. Returns the number of rows moved per model."""
+        Sample = apps.get_model('sample', 'Sample')
+        SampleTestMap = apps.get_model('sample', 'SampleTestMap')
+        ReportOption = apps.get_model('analysis', 'ReportOption')
+        RoutingInfo = apps.get_model('routinginfo', 'RoutingInfo')
+
+        if cold_after_days is None:
+            cold_after_days = getattr(settings, 'STORAGE_TIER_COLD_AFTER_DAYS', 90)
+        if batch_size is None:
+            batch_size = getattr(settings, 'STORAGE_TIER_BATCH_SIZE', 1000)
+        cutoff = timezone.now() - timedelta(days=cold_after_days)
+
+        moved = {'sample': 0, 'sampletestmap': 0, 'reportoption': 0, 'routinginfo': 0}
+        samples = Sample._base_manager.filter(storage_tier=STORAGE_TIER_HOT,
+                                              sample_status__in=TERMINAL_SAMPLE_STATUSES, mod_dt__lt=cutoff)
+        while True:
+            sample_ids = list(samples.values_list('pk', flat=True)[:batch_size])
+            if not sample_ids:
+                break
+            with transaction.atomic():
+                moved['sampletestmap'] += SampleTestMap.objects.filter(
+                    sample_id__in=sample_ids).update(storage_tier=STORAGE_TIER_COLD)
+                moved['routinginfo'] += RoutingInfo.objects.filter(
+                    sample_id__in=sample_ids).update(storage_tier=STORAGE_TIER_COLD)
+                moved['sample'] += Sample._base_manager.filter(
+                    pk__in=sample_ids).update(storage_tier=STORAGE_TIER_COLD)
+
+        report_options = ReportOption.objects.filter(storage_tier=STORAGE_TIER_HOT,
+                                                     reporting_status__in=TERMINAL_REPORTING_STATUSES,
+                                                     mod_dt__lt=cutoff)
+        while True:
+            report_option_ids = list(report_options.values_list('pk', flat=True)[:batch_size])
+            if not report_option_ids:
+                break
+            with transaction.atomic():
+                moved['routinginfo'] += RoutingInfo.objects.filter(
+                    report_option_id__in=report_option_ids).update(storage_tier=STORAGE_TIER_COLD)
+                moved['reportoption'] += ReportOption.objects.filter(
+                    pk__in=report_option_ids).update(storage_tier=STORAGE_TIER_COLD)
+
+        log.info("Storage tiering moved to cold tier: %s", moved)
+        return moved
+
+    @staticmethod
+    def rewarm_samples(sample_ids):
+        """Moves reopened cold samples, with their test maps and routing rows, back to the hot tier."""
+        Sample = apps.get_model('sample', 'Sample')
+        SampleTestMap = apps.get_model('sample', 'SampleTestMap')
+        RoutingInfo = apps.get_model('routinginfo', 'RoutingInfo')
+
+        reopened_ids = list(Sample._base_manager.filter(pk__in=sample_ids, storage_tier=STORAGE_TIER_COLD).exclude(
+            sample_status__in=TERMINAL_SAMPLE_STATUSES).values_list('pk', flat=True))
+        if reopened_ids:
+            with transaction.atomic():
+                SampleTestMap.objects.filter(sample_id__in=reopened_ids).update(storage_tier=STORAGE_TIER_HOT)
+                RoutingInfo.objects.filter(sample_id__in=reopened_ids).update(storage_tier=STORAGE_TIER_HOT)
+                Sample._base_manager.filter(pk__in=reopened_ids).update(storage_tier=STORAGE_TIER_HOT)
+        return len(reopened_ids)
+
+    @staticmethod
+    def rewarm_report_options(report_option_ids):
+        """Moves reopened cold report options, with their routing rows, back to the hot tier."""
+        ReportOption = apps.get_model('analysis', 'ReportOption')
+        RoutingInfo = apps.get_model('routinginfo', 'RoutingInfo')
+
+        reopened_ids = list(ReportOption.objects.filter(
+            pk__in=report_option_ids, storage_tier=STORAGE_TIER_COLD).exclude(
+            reporting_status__in=TERMINAL_REPORTING_STATUSES).values_list('pk', flat=True))
+        if reopened_ids:
+            with transaction.atomic():
+                RoutingInfo.objects.filter(report_option_id__in=reopened_ids).update(storage_tier=STORAGE_TIER_HOT)
+                ReportOption.objects.filter(pk__in=reopened_ids).update(storage_tier=STORAGE_TIER_HOT)
+        return len(reopened_ids)
@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from util.storagetier import StorageTierUtilClass
+
+
+@shared_task
+def move_to_cold_tier():
+    # Scheduled from django_celery_beat periodic tasks
+    return StorageTierUtilClass.move_to_cold_tier()
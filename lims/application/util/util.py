@@ -1,40 +1,48 @@
+import copy
 import datetime
 import importlib
 import io
 import json
-import logging
 import mimetypes
 import os
 import re
 import threading
 from collections import defaultdict
 
-import boto3
-import requests
-from botocore.exceptions import ClientError
+from auditlog.models import LogEntry
 from django.apps import apps
 from django.conf import settings
 from django.contrib import messages
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import connection, transaction
-from django.db.models import OuterRef, Subquery, Value, When, IntegerField, Case, F
-from django.db.models.functions import Coalesce
 from django.http import JsonResponse, HttpResponseRedirect, Http404
 from django.shortcuts import render
 from django.urls import reverse
-from pyreportjasper import PyReportJasper
 
-from configuration.models import ReferenceType, RefValues
 from controllerapp.settings import DEFAULT_REPORT_LOGO_PATH, REPORT_IMAGE_OUTPUT_PATH, ATTACHMENT_TYPE_LOGO, \
     ATTACHMENT_TYPE_SIGNATURE, REPORT_DIR_INPUT_FOLDER_PATH, TEST_ID_GULF
 from masterdata.models import AttachmentConfiguration, Client, Physician
-from process.models import ContainerType
 from reporting.models import LabelMethod, Printer, ContainerTypeLabelMethodMap, ContainerTypePharmaLabelMethodMap
 from security.models import UserPrinterInfo, JobType, User, Department, DepartmentPrinter
+from util.choices import ChoiceUtilClass
+from util.audit import AuditUtilClass
 from util.models import SequenceGen
 from django.core.mail import EmailMessage
+from logutil.log import log
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# boto3, requests and pyreportjasper only back the S3, BarTender and Jasper report paths; they are imported on
+# first use instead of at module load so the many views that import this module do not pay for them.
+def get_boto3():
+    return importlib.import_module("boto3")
+
+
+def get_requests():
+    return importlib.import_module("requests")
+
+
+def get_py_report_jasper():
+    return importlib.import_module("pyreportjasper").PyReportJasper
 
 
 def get_printer_by_category(request, printer_category):
@@ -151,7 +159,7 @@ def generate_automatic_sample_labels(request, samples_ids, printer_category=None
     samples = Sample.objects.filter(pk__in=samples_ids).select_related('container_type', 'accession_id')
 
     if not samples:
-        logging.info(request, "No samples found for the provided IDs.")
+        log.info("No samples found for the provided IDs.")
         return
 
     if printer_category is None:
@@ -160,34 +168,33 @@ def generate_automatic_sample_labels(request, samples_ids, printer_category=None
             if sample.current_step:
                 samples_by_current_step[sample.current_step].append(sample)
             else:
-                logging.info(request, f"Sample {sample.pk} has no current_step defined. Skipping label generation.")
+                log.info("Sample %s has no current_step defined. Skipping label generation.", sample.pk)
 
         if not samples_by_current_step:
-            logging.info(request, "No samples with a valid current_step for label generation.")
+            log.info("No samples with a valid current_step for label generation.")
             return
 
         for step_category, samples_in_step in samples_by_current_step.items():
-            print(
-                f"--- Processing samples for Printer Category (current_step): {step_category} ---")
+            log.debug("--- Processing samples for Printer Category (current_step): %s ---", step_category)
 
             printer_info, message_text = get_printer_by_category(request, step_category)
             if printer_info is None:
-                logging.info(request, f"Skipping printing for '{step_category}': {message_text}")
+                log.info("Skipping printing for '%s': %s", step_category, message_text)
                 continue
             else:
                 printer, communication_type = printer_info.printer_path, printer_info.communication_type
 
                 if not printer:
-                    logging.info(request, f"No printer path defined for category '{step_category}'. Skipping.")
+                    log.info("No printer path defined for category '%s'. Skipping.", step_category)
                     continue
                 if not communication_type:
-                    logging.info(request,
-                                 f"Please select a Communication Type for the Printer: {printer_info.printer_name} (Category: {step_category}). Skipping.")
+                    log.info("Please select a Communication Type for the Printer: %s (Category: %s). Skipping.",
+                             printer_info.printer_name, step_category)
                     continue
 
                 container_type_ids = [s.container_type_id for s in samples_in_step if s.container_type_id]
                 if not container_type_ids:
-                    logging.info(request, f"No container types found for samples in '{step_category}'. Skipping.")
+                    log.info("No container types found for samples in '%s'. Skipping.", step_category)
                     continue
 
                 clinical_label_maps = ContainerTypeLabelMethodMap.objects.filter(
@@ -222,16 +229,16 @@ def generate_automatic_sample_labels(request, samples_ids, printer_category=None
                             "sample_id": sample.pk,
                         })
                     else:
-                        logging.info(request,
-                                     f"Warning: ContainerType {sample.container_type.container_type} (ID: {sample.container_type.pk}) has no default label method for current_step '{step_category}'.")
+                        log.warning("ContainerType %s (ID: %s) has no default label method for current_step '%s'.",
+                                    sample.container_type.container_type, sample.container_type.pk, step_category)
                         continue
 
                 obj = GenerateLabel()
 
                 for label_method_id, entries in grouped_samples_by_label_method.items():
                     sample_ids_to_print = [e["sample_id"] for e in entries]
-                    print(
-                        f"  Printing {len(sample_ids_to_print)} labels for label_method_id {label_method_id} under category {step_category}")
+                    log.debug("Printing %s labels for label_method_id %s under category %s", len(sample_ids_to_print),
+                              label_method_id, step_category)
                     result = obj.print_label(
                         request,
                         sample_ids_to_print,
@@ -245,7 +252,7 @@ def generate_automatic_sample_labels(request, samples_ids, printer_category=None
     else:
         printer_info, message_text = get_printer_by_category(request, printer_category)
         if printer_info is None:
-            logging.info(request, message_text)
+            log.info(message_text)
             return
         else:
             printer, communication_type = printer_info.printer_path, printer_info.communication_type
@@ -253,8 +260,7 @@ def generate_automatic_sample_labels(request, samples_ids, printer_category=None
             if not printer:
                 return
             if not communication_type:
-                logging.info(request, "Please select a Communication Type for the Printer :",
-                             printer_info.printer_name)
+                log.info("Please select a Communication Type for the Printer : %s", printer_info.printer_name)
                 return
 
             container_type_ids = samples.values_list('container_type__pk', flat=True).distinct()
@@ -291,8 +297,8 @@ def generate_automatic_sample_labels(request, samples_ids, printer_category=None
                         "sample_id": sample.pk,
                     })
                 else:
-                    print(
-                        f"Warning: ContainerType {sample.container_type.container_type} (ID: {sample.container_type.pk}) has no default label method.")
+                    log.warning("ContainerType %s (ID: %s) has no default label method.",
+                                sample.container_type.container_type, sample.container_type.pk)
                     continue
 
             obj = GenerateLabel()
@@ -312,7 +318,7 @@ def generate_automatic_sample_labels(request, samples_ids, printer_category=None
 class GenerateLabel:
 
     def __init__(self):
-        self.s3_client = boto3.client(
+        self.s3_client = get_boto3().client(
             's3',
             aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
             aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
@@ -414,12 +420,14 @@ class GenerateLabel:
                                             instance = Model.objects.select_for_update().get(pk=pk_value)
                                             instance.label_count = next_sequence_value
                                             instance.save()
-                                            logging.info(
-                                                f"Updated label_count for {model_name} with PK {pk_value} to {next_sequence_value}")
+                                            log.info(
+                                                "Updated label_count for %s with PK %s to %s", model_name, pk_value,
+                                                next_sequence_value)
                                 return {'status': 'success'}
                             except Exception as seq_err:
-                                logging.error(
-                                    f"Failed to update sequence or label_count for model {model_name}, pk {pks_to_process}: {seq_err}")
+                                log.error(
+                                    "Failed to update sequence or label_count for model %s, pk %s: %s", model_name,
+                                    pks_to_process, seq_err)
                                 return {'status': 'warning',
                                         'message': f"Failed to Update Label Event. Labels may have bee Generated. Error: {seq_err}"}
                         return {
@@ -475,7 +483,7 @@ class GenerateLabel:
                                     'message': "Printer Communication Type is set to File Driven but Export Location "
                                                "is not set on Label Method."}
                     else:
-                        logging.info("Calling API Driven")
+                        log.info("Calling API Driven")
                         api_driven_result = self.generate_label_api_driven(request, label_query_data,
                                                                            label_query_columns, designer_format,
                                                                            printer, count, *query_args)
@@ -491,13 +499,13 @@ class GenerateLabel:
                 else:
                     return {'status': 'error', 'message': "No data returned from the query"}
         except Exception as e:
-            logging.exception("An unexpected error occurred during label printing process.")  # Log full traceback
+            log.exception("An unexpected error occurred during label printing process.")  # Log full traceback
             return {'status': 'error', 'message': f"Failed to Generate Label: {e}"}
 
     def generate_label(self, label_query_data, label_query_columns, file_path, btw_path, printer, delimiter,
                        show_header, show_fields, count):
         try:
-            print("generate_label called")
+            log.debug("generate_label called")
             with open(file_path, "w", encoding="utf-8") as file:
                 if show_header:
                     label_head = f'%BTW% /F="{btw_path}" /P /PRN="{printer}" {settings.LABEL_HEADER}'
@@ -512,13 +520,13 @@ class GenerateLabel:
                         file.write(row_data)
             return True
         except Exception as e:
-            logging.error(f"Error in generate_label: {e}")
+            log.error("Error in generate_label: %s", e)
             raise
 
     def generate_label_s3(self, label_query_data, label_query_columns, export_location, filename, btw_path, printer,
                           delimiter, show_header, show_fields, count):
         try:
-            print("generate_label_s3 called")
+            log.debug("generate_label_s3 called")
             output = io.StringIO()
             if show_header:
                 label_head = f'%BTW% /F="{btw_path}" /P /PRN="{printer}" {settings.LABEL_HEADER}'
@@ -552,7 +560,7 @@ class GenerateLabel:
             }
 
             if hasattr(settings, "AWS_S3_KMS_KEY_ARN") and settings.AWS_S3_KMS_KEY_ARN:
-                print("AWS KMS KEY FOUND")
+                log.debug("AWS KMS KEY FOUND")
                 s3_params.update({
                     "ServerSideEncryption": "aws:kms",
                     "SSEKMSKeyId": settings.AWS_S3_KMS_KEY_ARN
@@ -560,10 +568,10 @@ class GenerateLabel:
 
             self.s3_client.put_object(**s3_params)
 
-            print(f"Uploaded {filename} to S3: s3://{bucket_name}/{s3_key}")
+            log.info("Uploaded %s to S3: s3://%s/%s", filename, bucket_name, s3_key)
             return True
         except Exception as e:
-            logging.error(f"Error in generate_label_s3: {e}")
+            log.error("Error in generate_label_s3: %s", e)
             raise
 
     def generate_label_api_driven(self, request, label_query_data, label_query_columns, designer_format, printer, count,
@@ -592,7 +600,7 @@ class GenerateLabel:
                     successful_prints += 1
                     # messages.success(request, result['message'])
                     if 'file_path' in result:
-                        print(f"File path: {result['file_path']}")
+                        log.debug("File path: %s", result['file_path'])
                 else:
                     failed_prints += 1
                     error_details.append(
@@ -611,13 +619,14 @@ class GenerateLabel:
                 return {'status': 'error',
                         'message': f"Failed to print any labels via API. Details: {' '.join(error_details)}"}
         except Exception as e:
-            logging.error(f"An unexpected error occurred during API driven printing: {e}")
+            log.error("An unexpected error occurred during API driven printing: %s", e)
             return {'status': 'error', 'message': f"An unexpected error occurred during API driven printing: {e}"}
 
     def print_bartender_document(self, bartender_url, absolute_path, printer_name, copies, named_data_sources=None):
         """
         Prints a BarTender document using the Print Portal REST API.
         """
+        requests = get_requests()
         try:
             # Construct the JSON payload
             print_data = {
@@ -633,7 +642,7 @@ class GenerateLabel:
             print_url = f"{bartender_url}print"
             headers = {'Content-Type': 'application/json'}
 
-            logging.info(f"Sending print request to {print_url} with data: {print_data}")
+            log.info("Sending print request to %s with data: %s", print_url, print_data)
             print_response = requests.post(print_url, headers=headers, json=print_data)
 
             if print_response.status_code == 200:
@@ -657,7 +666,7 @@ class GenerateLabel:
                                 'message': 'Print job submitted successfully.'
                             }
                     except json.JSONDecodeError as e:
-                        logging.error(f"JSONDecodeError: {e}.  Response content: {print_response.text}")
+                        log.error("JSONDecodeError: %s.  Response content: %s", e, print_response.text)
                         return {
                             'success': False,
                             'message': 'Invalid JSON response received.',
@@ -666,8 +675,9 @@ class GenerateLabel:
                             'html_content': print_response.text  # Include the HTML for debugging
                         }
                 else:
-                    logging.warning(
-                        f"Received non-JSON response. Content-Type: {print_response.headers.get('Content-Type', '')}, Content: {print_response.text}")
+                    log.warning(
+                        "Received non-JSON response. Content-Type: %s, Content: %s",
+                        print_response.headers.get('Content-Type', ''), print_response.text)
                     return {
                         'success': False,
                         'message': 'Received non-JSON response from Print Portal.',
@@ -689,10 +699,10 @@ class GenerateLabel:
                 print_data["printRequestID"] = print_request_id
 
                 # Resend the request with the printRequestID and data entry controls
-                logging.info(f"Resending print request with printRequestID: {print_request_id} and data: {print_data}")
+                log.info("Resending print request with printRequestID: %s and data: %s", print_request_id, print_data)
                 print_response = requests.post(print_url, headers=headers, json=print_data)
-                logging.info(f"Resend print response status code: {print_response.status_code}")
-                logging.info(f"Resend print response content: {print_response.content}")
+                log.info("Resend print response status code: %s", print_response.status_code)
+                log.info("Resend print response content: %s", print_response.content)
 
                 if print_response.status_code == 200:
                     response_json = print_response.json()
@@ -754,7 +764,7 @@ class UtilClass:
 
     @staticmethod
     def get_s3_client():
-        return boto3.client(
+        return get_boto3().client(
             's3',
             aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
             aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
@@ -763,12 +773,8 @@ class UtilClass:
 
     @staticmethod
     def get_refvalues_for_field(ref_name):
-        try:
-            ref_type = ReferenceType.objects.get(name=ref_name)
-            choices = RefValues.objects.filter(reftype_id=ref_type).values_list("value", "display_value")
-            return list(choices)
-        except ReferenceType.DoesNotExist:
-            return []
+        # Cached per reference type; see ChoiceUtilClass
+        return ChoiceUtilClass.get_refvalue_choices(ref_name)
 
     @staticmethod
     def get_next_sequence(prefix, model_id, user_id):
@@ -783,6 +789,55 @@ class UtilClass:
             sequence_gen.save()
             return sequence_gen.seq_no
 
+    @staticmethod
+    def update_sequences(model_id, values, user_id, combine):
+        """
+        Sets seq_no to combine(current seq_no, value) for every prefix in {prefix: value} on the SequenceGen rows
+        of model_id, creating missing rows at 0. The rows are locked with select_for_update in prefix order,
+        written with one bulk_update and audit logged as save() would be. Returns {prefix: new seq_no}.
+        """
+        prefixes = sorted(values)
+        with transaction.atomic():
+            locked = SequenceGen.objects.select_for_update().filter(
+                model_id=model_id, prefix_id__in=prefixes).order_by('prefix_id')
+            rows = {row.prefix_id: row for row in locked}
+            created = {prefix for prefix in prefixes if prefix not in rows}
+            if created:
+                # A concurrent request may create the same prefix; the conflict is skipped and its row locked below
+                SequenceGen.objects.bulk_create(
+                    [SequenceGen(model_id=model_id, prefix_id=prefix, seq_no=0, created_by_id=user_id)
+                     for prefix in sorted(created)], ignore_conflicts=True)
+                rows = {row.prefix_id: row for row in locked.all()}
+
+            originals = {prefix: copy.copy(row) for prefix, row in rows.items()}
+            for prefix, row in rows.items():
+                row.seq_no = combine(row.seq_no, values[prefix])
+                if user_id:
+                    row.created_by_id = user_id
+            SequenceGen.objects.bulk_update(list(rows.values()), ['seq_no', 'created_by'])
+
+            actor = User(pk=user_id) if user_id else None
+            AuditUtilClass.bulk_log(LogEntry.Action.CREATE,
+                                    [(None, row, None) for prefix, row in rows.items() if prefix in created], actor)
+            AuditUtilClass.bulk_log(LogEntry.Action.UPDATE,
+                                    [(originals[prefix], row, ['seq_no', 'created_by'])
+                                     for prefix, row in rows.items() if prefix not in created], actor)
+        return {prefix: row.seq_no for prefix, row in rows.items()}
+
+    @staticmethod
+    def reserve_sequence_blocks(prefix_counts, model_id, user_id):
+        """
+        Reserves a block of `count` consecutive numbers for every prefix in {prefix: count} with one locked
+        update of SequenceGen, instead of one get_next_sequence call per number.
+        Returns {prefix: first reserved number}; the block is first .. first + count - 1.
+        """
+        prefix_counts = {prefix: count for prefix, count in prefix_counts.items() if count > 0}
+        if not prefix_counts:
+            return {}
+        last_numbers = UtilClass.update_sequences(model_id, prefix_counts, user_id,
+                                                  lambda seq_no, count: seq_no + count)
+        return {prefix: last_no - prefix_counts[prefix] + 1 for prefix, last_no in last_numbers.items()}
+
     @staticmethod
     def get_accession_types():
         AccessionType = apps.get_model('accessioning', 'AccessionType')
@@ -832,7 +887,8 @@ class UtilClass:
 
         list_accession_samples = list(set_accession_samples)
         Sample = apps.get_model('sample', 'Sample')
-        accession_sample_info = Sample.objects.filter(sample_id__in=list_accession_samples)
+        accession_sample_info = Sample.objects.filter(sample_id__in=list_accession_samples).select_related(
+            'accession_id', 'accession_id__accession_type')
         list_accession = []
         ReportOption = apps.get_model('analysis', 'ReportOption')
         if accession_sample_info is not None and len(accession_sample_info) > 0:
@@ -1246,7 +1302,7 @@ class UtilClass:
         os.makedirs(output_dir, exist_ok=True)
 
         # Setup Jasper report generator
-        jasper = PyReportJasper()
+        jasper = get_py_report_jasper()()
         parameters = {}
 
         parameters['subreport_dir'] = os.path.abspath(
@@ -1334,9 +1390,9 @@ class UtilClass:
                     file_path = os.path.join(folder, file)
                     if os.path.isfile(file_path):  # ensure it's a file, not a directory
                         os.remove(file_path)
-                        print(f"🗑️ Deleted file: {file_path}")
+                        log.debug("Deleted file: %s", file_path)
             except Exception as e:
-                print(f"⚠️ Could not delete files in {folder}: {e}")
+                log.warning("Could not delete files in %s: %s", folder, e)
 
     def get_logo_image_attachment_id(merge_reporting_id):
         from analysis.models import MergeReporting, Attachment
@@ -1423,102 +1479,14 @@ class UtilClass:
             return JsonResponse({'success': False, 'message': 'No records selected.'})
 
         id_list = [x.strip() for x in ids_param.split(',') if x.strip()]
-        queryset = admin_instance.model.objects.filter(pk__in=id_list)
-
-        SampleTestMap = apps.get_model('sample', 'SampleTestMap')
-        Sample = apps.get_model('sample', 'Sample')
-
-        if not queryset.exists():
-            return JsonResponse({'success': False, 'message': "Please select at least one record."})
-
-        first_child_creation = None
-
-        for obj in queryset:
-            try:
-                container_type = ContainerType.objects.get(pk=obj.container_type_id)
-                current_child_creation = container_type.child_sample_creation
-                if first_child_creation is None:
-                    first_child_creation = current_child_creation
-                elif current_child_creation != first_child_creation:
-                    return JsonResponse({
-                        'success': False,
-                        'message': "All selected records must have the same 'Child Sample Creation' status for their Container Type."
-                    })
-            except ContainerType.DoesNotExist:
-                return JsonResponse({
-                    'success': False,
-                    'message': f"Container Type with ID '{obj.container_type_id}' does not exist for record '{getattr(obj, 'sample_id', obj.pk)}'."
-                })
-
-        if first_child_creation and queryset.count() > 1:
-            return JsonResponse({
-                'success': False,
-                'message': "For records where 'Child Sample Creation' is True, only single selection is allowed."
-            })
-
-        if not first_child_creation and queryset.count() > 1:
-            first_record_data = None
-            first_workflow_driven = None
-            for obj in queryset:
-                try:
-                    samples_with_workflow = Sample.objects.filter(sample_id=obj).annotate(
-                        effective_workflow_id=Case(
-                            When(accession_sample_id__isnull=True, then=F('workflow_id')),
-                            When(accession_sample_id__isnull=False, then=F('accession_sample__workflow_id')),
-                            default=Value(None),
-                            output_field=IntegerField()
-                        )
-                    )
-
-                    workflow_id_from_samples = samples_with_workflow.values_list('effective_workflow_id',
-                                                                                 flat=True).first()
-
-                    if workflow_id_from_samples:
-                        current_record_data = {
-                            'workflow_id': workflow_id_from_samples,
-                            'current_step': obj.current_step,
-                        }
-                        current_workflow_driven = True
-
-                    else:
-                        sample_id_for_map = getattr(obj, 'sample_id', obj.pk)
-                        sample_test_map = SampleTestMap.objects.get(sample_id_id=sample_id_for_map)
-                        current_record_data = {
-                            'test_id': sample_test_map.test_id_id,
-                            'sample_type_id': obj.sample_type_id,
-                            'container_type_id': obj.container_type_id,
-                            'workflow_id': sample_test_map.workflow_id_id,
-                            'current_step': obj.current_step,
-                        }
-                        current_workflow_driven = False
-
-                    if first_workflow_driven is None:
-                        first_workflow_driven = current_workflow_driven
-                    elif current_workflow_driven != first_workflow_driven:
-                        return JsonResponse({
-                            'success': False,
-                            'message': "Mixed mode not allowed. Please select records which are all either driven by workflow or by tests."
-                        })
-                    elif current_workflow_driven == first_workflow_driven:
-                        if first_record_data is None:
-                            first_record_data = current_record_data
-                        elif current_record_data != first_record_data and current_workflow_driven:
-                            return JsonResponse({
-                                'success': False,
-                                'message': "For multiple selections (where 'Child Sample Creation' is False), all records must have the same Workflow and Current Step."
-                            })
-                        elif current_record_data != first_record_data and not current_workflow_driven:
-                            return JsonResponse({
-                                'success': False,
-                                'message': "For multiple selections (where 'Child Sample Creation' is False), all records must have the same Test, Sample Type, Container Type, Workflow and Current Step."
-                            })
-
-                except SampleTestMap.DoesNotExist:
-                    return JsonResponse({
-                        'success': False,
-                        'message': f"Record '{getattr(obj, 'sample_id', obj.pk)}' has no associated test map."
-                    })
-
+        module = importlib.import_module("util.backwardmovement")
+        BackwardMovementUtilClass = getattr(module, "BackwardMovementUtilClass")
+        # Recomputed on every popup so a new selection attempt never sees a stale result
+        BackwardMovementUtilClass.invalidate(request, admin_instance.model, id_list)
+        eligibility = BackwardMovementUtilClass.get_eligibility(request, admin_instance.model, id_list)
+
+        if eligibility['error']:
+            return JsonResponse({'success': False, 'message': eligibility['error']})
         return JsonResponse({'success': True})
 
     def backward_movement_prompt_view(admin_instance, request):
@@ -1526,125 +1494,16 @@ class UtilClass:
         Utility view function to render the backward movement prompt form.
         Takes the ModelAdmin instance to access model info.
         """
-        SampleTestMap = apps.get_model('sample', 'SampleTestMap')
-        TestWorkflowStep = apps.get_model('tests', 'TestWorkflowStep')
-        TestWorkflowStepActionMap = apps.get_model('tests', 'TestWorkflowStepActionMap')
-        WorkflowStep = apps.get_model('workflows', 'WorkflowStep')
-        Sample = apps.get_model('sample', 'Sample')
-
         model_ids = request.GET.get('ids', '').split(',')
         model_ids = [id for id in model_ids if id]
 
         selected_objects = admin_instance.model.objects.filter(pk__in=model_ids)
-        first_obj = selected_objects.first()
+        module = importlib.import_module("util.backwardmovement")
+        BackwardMovementUtilClass = getattr(module, "BackwardMovementUtilClass")
+        eligibility = BackwardMovementUtilClass.get_eligibility(request, admin_instance.model, model_ids)
 
-        prior_steps = []
-        error_message = None
-        current_step_value = None
-
-        if first_obj and hasattr(first_obj, 'current_step') and first_obj.current_step:
-            current_step_value = first_obj.current_step
-
-            try:
-                obj_sample_id = getattr(first_obj, 'sample_id', first_obj.pk)
-
-                first_sample_test_map = SampleTestMap.objects.filter(
-                    sample_id_id=obj_sample_id
-                ).order_by(
-                    'sample_test_map_id'
-                ).first()
-
-                samples_with_workflow = Sample.objects.filter(sample_id=obj_sample_id).annotate(
-                    effective_workflow_id=Case(
-                        When(accession_sample_id__isnull=True, then=F('workflow_id')),
-                        When(accession_sample_id__isnull=False, then=F('accession_sample__workflow_id')),
-                        default=Value(None),
-                        output_field=IntegerField()
-                    )
-                )
-
-                workflow_id_from_samples = samples_with_workflow.values_list('effective_workflow_id', flat=True).first()
-
-                if first_sample_test_map:
-                    test_id = first_sample_test_map.test_id_id
-                    workflow_id_from_test = first_sample_test_map.workflow_id_id
-                else:
-                    error_message = f"Record '{obj_sample_id}' has no associated test map."
-                    test_id = None
-                    workflow_id_from_test = None
-
-                workflow_id = workflow_id_from_test or workflow_id_from_samples
-                if test_id and workflow_id:
-                    try:
-                        current_step_obj = WorkflowStep.objects.get(
-                            step_id=first_obj.current_step,
-                            workflow_id=workflow_id,
-                            workflow_type='WetLab'
-                        )
-                    except WorkflowStep.DoesNotExist:
-                        error_message = f"Step '{first_obj.current_step}' not found in workflow '{workflow_id}' for the selected test."
-
-                    if not error_message:
-                        if workflow_id_from_test:
-                            prior_steps = TestWorkflowStep.objects.filter(
-                                backward_movement='Y',
-                                container_type_id=first_obj.container_type_id,
-                                sample_type_id_id=first_obj.sample_type_id,
-                                test_id_id=test_id,
-                                workflow_id_id=workflow_id_from_test,
-                                workflow_step_id__step_no__lt=current_step_obj.step_no,
-                                workflow_step_id__workflow_type='WetLab'
-                            ).select_related('workflow_step_id').annotate(
-                                action=Subquery(
-                                    TestWorkflowStepActionMap.objects.filter(
-                                        testwflwstepmap_id=OuterRef('pk'),
-                                        sequence=1
-                                    ).values('action')[:1]
-                                )
-                            ).annotate(
-                                action=Coalesce('action', Value(''))
-                            ).values(
-                                'pk',
-                                'workflow_id_id',
-                                'workflow_step_id__step_id',
-                                'workflow_step_id__step_no',
-                                'workflow_step_id__department',
-                                'action',
-                            ).order_by('workflow_step_id__step_no')
-
-                        if workflow_id_from_samples:
-                            desired_step_no = current_step_obj.step_no - 1
-                            prior_steps = WorkflowStep.objects.filter(
-                                backward_movement='Y',
-                                workflow_id_id=workflow_id_from_samples,
-                                step_no=desired_step_no,
-                                workflow_type='WetLab'
-                            ).annotate(
-                                action=Subquery(
-                                    TestWorkflowStepActionMap.objects.filter(
-                                        workflow_step_id_id=OuterRef('pk'),
-                                        sequence=1
-                                    ).values('action')[:1]
-                                ),
-                                test_workflow_step_id=Value('')  # static field
-                            ).annotate(
-                                action=Coalesce('action', Value('')),
-                                workflow_step_id__step_id=F('step_id'),
-                                workflow_step_id__step_no=F('step_no'),
-                                workflow_step_id__department=F('department'),
-                            ).values(
-                                'test_workflow_step_id',
-                                'workflow_id_id',
-                                'workflow_step_id__step_id',
-                                'workflow_step_id__step_no',
-                                'workflow_step_id__department',
-                                'action'
-                            ).order_by('step_no')
-
-            except Exception as e:
-                error_message = f"An unexpected error occurred while fetching test information: {e}"
-
-        else:
+        error_message = eligibility['prompt_error']
+        if not eligibility['ids']:
             error_message = "Selected record or its current step is missing."
 
         app_label = admin_instance.model._meta.app_label
@@ -1653,9 +1512,9 @@ class UtilClass:
 
         context = {
             'selected_objects': selected_objects,
-            'prior_steps': prior_steps,
+            'prior_steps': eligibility['prior_steps'],
             'error_message': error_message,
-            'current_step': current_step_value,
+            'current_step': eligibility['current_step'],
             'submit_url': reverse(submit_url_name),
             'model_name_plural_lower': admin_instance.model._meta.model_name + 's',
             'model_id_field_name': f'{admin_instance.model._meta.model_name}_id',
@@ -1670,6 +1529,8 @@ class UtilClass:
         WorkflowStep = apps.get_model('workflows', 'WorkflowStep')
         module = importlib.import_module("util.util")
         UtilClass = getattr(module, "UtilClass")
+        module = importlib.import_module("util.backwardmovement")
+        BackwardMovementUtilClass = getattr(module, "BackwardMovementUtilClass")
 
         if request.method == 'POST':
             try:
@@ -1684,13 +1545,6 @@ class UtilClass:
                 landing_step_action = data.get('landing_step_action')
                 landing_workflow_id = data.get('landing_workflow_id')
                 department_name = data.get('department')
-                current_step = data.get('current_step')
-
-                user_site_prefix = request.session.get('currentjobtype', '').split('-')[0]
-                full_department_name = f"{user_site_prefix}-{department_name}"
-
-                custodial_department_id = Department.objects.filter(name=full_department_name).values_list('id',
-                                                                                                           flat=True).first()
 
                 if not selected_ids or not landing_step_id or landing_step_no_str is None or landing_workflow_id is None or landing_step_action is None:
                     return JsonResponse({'status': 'error', 'message': 'Missing data.'}, status=400)
@@ -1701,30 +1555,46 @@ class UtilClass:
                 except (TypeError, ValueError):
                     return JsonResponse({'status': 'error', 'message': 'Invalid landing_step_no.'}, status=400)
 
-                next_step_queryset = WorkflowStep.objects.filter(
+                # The selection and landing step are checked against the result the prompt was built from
+                eligibility = BackwardMovementUtilClass.get_eligibility(request, admin_instance.model, selected_ids)
+                if eligibility['error'] or eligibility['prompt_error']:
+                    return JsonResponse({'status': 'error',
+                                         'message': eligibility['error'] or eligibility['prompt_error']}, status=400)
+                if not BackwardMovementUtilClass.is_allowed_target(eligibility, landing_workflow_id, landing_step_id,
+                                                                   landing_step_no):
+                    return JsonResponse({'status': 'error', 'message': 'Landing step is not allowed for the selection.'},
+                                        status=400)
+                current_step = eligibility['current_step']
+
+                user_site_prefix = request.session.get('currentjobtype', '').split('-')[0]
+                full_department_name = f"{user_site_prefix}-{department_name}"
+
+                custodial_department_id = Department.objects.filter(name=full_department_name).values_list('id',
+                                                                                                           flat=True).first()
+
+                next_step_id = WorkflowStep.objects.filter(
                     workflow_id_id=landing_workflow_id,
                     workflow_type='WetLab',
                     step_no=next_step_no,
-                ).values('step_id')
-
-                next_step_id = None
-                if next_step_queryset.exists():
-                    next_step_id = next_step_queryset.first()['step_id']
+                ).values_list('step_id', flat=True).first()
 
                 if landing_step_action == '':
                     landing_step_action = None
 
-                old_instances = {str(obj.pk): obj for obj in admin_instance.model.objects.filter(pk__in=selected_ids)}
+                # Only records still at the step the prompt was built for are moved
+                selected_queryset = admin_instance.model.objects.filter(pk__in=selected_ids, current_step=current_step)
+                old_instances = {str(obj.pk): obj for obj in selected_queryset}
 
-                updated_count = admin_instance.model.objects.filter(pk__in=selected_ids).update(
+                updated_count = selected_queryset.update(
                     current_step=landing_step_id,
                     pending_action=landing_step_action,
                     next_step=next_step_id,
                     custodial_department_id=custodial_department_id,
                     previous_step=current_step
                 )
+                BackwardMovementUtilClass.invalidate(request, admin_instance.model, selected_ids)
 
-                updated_instances = admin_instance.model.objects.filter(pk__in=selected_ids)
+                updated_instances = admin_instance.model.objects.filter(pk__in=list(old_instances))
 
                 if model_name == 'sample':
                     UtilClass.createRoutingInfoForSample(
@@ -1831,11 +1701,12 @@ class UtilClass:
             })
 
         s3_client.put_object(**s3_params)
-        print(f"✅ Uploaded {uploaded_file.name} to S3: {path}")
+        log.info("Uploaded %s to S3: %s", uploaded_file.name, path)
         return path
 
     def download_attachment(request, attachment_id):
         Attachment = apps.get_model('analysis', 'Attachment')
+        ClientError = importlib.import_module("botocore.exceptions").ClientError
         try:
             attachment = Attachment.objects.get(pk=attachment_id)
             if not attachment.file_path:
@@ -1890,7 +1761,7 @@ class UtilClass:
             })
 
         s3_client.put_object(**s3_params)
-        print(f"✅ Uploaded {uploaded_file.name} to S3: {path}")
+        log.info("Uploaded %s to S3: %s", uploaded_file.name, path)
         return path
 
     @staticmethod
@@ -1943,11 +1814,11 @@ class UtilClass:
             try:
                 if os.path.isfile(path):
                     os.remove(path)
-                    print(f"Deleted temporary image: {path}")
+                    log.debug("Deleted temporary image: %s", path)
                 else:
-                    print(f"No such file to delete: {path}")
+                    log.debug("No such file to delete: %s", path)
             except Exception as e:
-                print(f"Error deleting image {path}: {e}")
+                log.error("Error deleting image %s: %s", path, e)
 
     @staticmethod
     def createRoutingInfoForSample(new_samples, old_samples=None, single=False):
@@ -1973,10 +1844,10 @@ class UtilClass:
                         from_step=None,
                         to_step=sample_instance.current_step,
                         from_department=None,
-                        to_department=sample_instance.custodial_department,
+                        to_department_id=sample_instance.custodial_department_id,
                         from_user=None,
-                        to_user=sample_instance.custodial_user,
-                        created_by=sample_instance.created_by,
+                        to_user_id=sample_instance.custodial_user_id,
+                        created_by_id=sample_instance.created_by_id,
                     )
                 )
             else:
@@ -1987,11 +1858,11 @@ class UtilClass:
                             sample_id_id=sample_instance.sample_id,
                             from_step=old_instance.current_step,
                             to_step=sample_instance.current_step,
-                            from_department=old_instance.custodial_department,
-                            to_department=sample_instance.custodial_department,
-                            from_user=old_instance.custodial_user,
-                            to_user=sample_instance.custodial_user,
-                            created_by=sample_instance.mod_by,
+                            from_department_id=old_instance.custodial_department_id,
+                            to_department_id=sample_instance.custodial_department_id,
+                            from_user_id=old_instance.custodial_user_id,
+                            to_user_id=sample_instance.custodial_user_id,
+                            created_by_id=sample_instance.mod_by_id,
                         )
                     )
 
@@ -2022,10 +1893,10 @@ class UtilClass:
                         from_step=None,
                         to_step=reportop_instance.current_step,
                         from_department=None,
-                        to_department=reportop_instance.custodial_department,
+                        to_department_id=reportop_instance.custodial_department_id,
                         from_user=None,
                         to_user=None,
-                        created_by=reportop_instance.created_by,
+                        created_by_id=reportop_instance.created_by_id,
                     )
                 )
             else:
@@ -2036,11 +1907,11 @@ class UtilClass:
                             report_option_id_id=reportop_instance.report_option_id,
                             from_step=old_instance.current_step,
                             to_step=reportop_instance.current_step,
-                            from_department=old_instance.custodial_department,
-                            to_department=reportop_instance.custodial_department,
+                            from_department_id=old_instance.custodial_department_id,
+                            to_department_id=reportop_instance.custodial_department_id,
                             from_user=None,
                             to_user=None,
-                            created_by=reportop_instance.mod_by,
+                            created_by_id=reportop_instance.mod_by_id,
                         )
                     )
 
@@ -2104,7 +1975,7 @@ class UtilClass:
                 if file_path.startswith("http://") or file_path.startswith("https://"):
                     # Download the file
                     try:
-                        response = requests.get(file_path)
+                        response = get_requests().get(file_path)
                         response.raise_for_status()  # Raise if status != 200
                         filename = file_path.split("/")[-1].split("?")[0]  # Extract filename from URL
                         email.attach(filename, response.content)
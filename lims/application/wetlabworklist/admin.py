@@ -148,14 +148,10 @@ class AccessionIHCWrapperAdmin(TZIndependentAdmin):
         from ihcworkflow.admin import IhcWorkflowAdmin
 
         ihc_admin = IhcWorkflowAdmin(IhcWorkflow, self.admin_site)
-        ihc_qs = ihc_admin.get_queryset(request)
-        ihc_sample_ids = ihc_qs.values_list('sample_ptr_id', flat=True)
+        # Same filters as the IHC changelist, applied by sample_kind without joining the IHC child table
+        ihc_samples = ihc_admin.filter_worklist(request, Sample.objects.of_kind(IhcWorkflow._meta.model_name))
 
-        accession_ids = Sample.objects.filter(
-            sample_id__in=ihc_sample_ids
-        ).values_list('accession_id', flat=True).distinct()
-
-        return Accession.objects.filter(accession_id__in=accession_ids)
+        return Accession.objects.filter(accession_id__in=ihc_samples.values('accession_id'))
 
     def accession_link(self, obj):
         url = reverse('controllerapp:ihcworkflow_ihcworkflow_changelist') + f'?q={obj.accession_id}'